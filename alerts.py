@@ -0,0 +1,409 @@
+"""
+Alert rules on the indicators add_indicators produces: thresholds ("RSI above
+70"), crosses ("Close crosses above SMA_50", "MACD crosses below Signal_Line")
+and volume spikes (analyze_technical's 1.5x the 20-bar average).
+
+Rules are compiled into NumPy arrays indexed by (ticker, timeframe). New bars
+only evaluate the rules of their own ticker, all of them in one vectorized pass
+over a (bars x fields) matrix of every bar not seen yet and the one before, so
+thousands of rules over hundreds of symbols stay cheap on a single core.
+"""
+import collections
+import datetime
+import json
+import threading
+import time
+import uuid
+
+import numpy as np
+
+import market_data
+from instrumentation import count, timed
+
+ALERTS_FILE = market_data.CACHE_DIR / "alerts.json"
+
+# Values a rule can read from a bar. Volume_Avg is the 20-bar average volume.
+FIELDS = ["Open", "High", "Low", "Close", "Volume", "SMA_50", "SMA_200", "RSI", "MACD", "Signal_Line", "Volume_Avg"]
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+# Extra slot holding 0.0, read by rules compared to a constant
+CONSTANT = len(FIELDS)
+
+OPS = ["above", "below", "crosses_above", "crosses_below", "volume_spike"]
+OP_LABELS = {
+    "above": "above",
+    "below": "below",
+    "crosses_above": "crosses above",
+    "crosses_below": "crosses below",
+    "volume_spike": "spikes above",
+}
+VOLUME_WINDOW = 20
+VOLUME_SPIKE_FACTOR = 1.5
+DEFAULT_TIMEFRAME = "1Y"  # daily bars
+POLL_SECONDS = 60
+HISTORY_SIZE = 1000
+# rules()/recent() of every user (None is a missing login, never "everyone")
+ALL_USERS = object()
+
+
+def _check_user(user):
+    if user is None:
+        raise ValueError("No user logged in")
+
+
+def make_rule(user, ticker, field, op, value=None, other=None, timeframe=DEFAULT_TIMEFRAME, repeat=False):
+    """
+    Builds a rule dict. `field` is compared to the constant `value` or to
+    another field `other`; "volume_spike" compares Volume to `value` (default
+    1.5) times its 20-bar average. Non-repeating rules fire once and disarm.
+    """
+    _check_user(user)
+    if op not in OPS:
+        raise ValueError(f"Unknown operator: {op}")
+    if timeframe not in market_data.FETCH_PARAMS:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    if op == "volume_spike":
+        field, other = "Volume", "Volume_Avg"
+        value = VOLUME_SPIKE_FACTOR if value is None else value
+    elif (value is None) == (other is None):
+        raise ValueError("A rule compares its field to either a value or another field")
+    for name in (field, other):
+        if name is not None and name not in FIELD_INDEX:
+            raise ValueError(f"Unknown field: {name}")
+    return {
+        "id": uuid.uuid4().hex[:12],
+        "user": user,
+        "ticker": ticker.upper(),
+        "timeframe": timeframe,
+        "field": field,
+        "op": op,
+        "value": None if value is None else float(value),
+        "other": other,
+        "repeat": bool(repeat),
+        "active": True,
+        "created": time.time(),
+    }
+
+
+def describe(rule):
+    if rule["op"] == "volume_spike":
+        target = f"{rule['value']:g}x its {VOLUME_WINDOW}-bar average"
+    else:
+        target = rule["other"] if rule["other"] else f"{rule['value']:g}"
+    return f"{rule['ticker']} {rule['field']} {OP_LABELS[rule['op']]} {target} ({rule['timeframe']})"
+
+
+def _compile(rules):
+    """
+    Turns a ticker's rules into arrays so that every rule reads
+        sign * (bar[lhs] - bar[rhs] * factor - const) > 0
+    and cross rules additionally require it to have been <= 0 on the bar before.
+    """
+    n = len(rules)
+    compiled = {
+        "ids": [r["id"] for r in rules],
+        "lhs": np.empty(n, dtype=np.intp),
+        "rhs": np.empty(n, dtype=np.intp),
+        "factor": np.zeros(n),
+        "const": np.zeros(n),
+        "sign": np.ones(n),
+        "cross": np.zeros(n, dtype=bool),
+        "repeat": np.zeros(n, dtype=bool),
+        "active": np.zeros(n, dtype=bool),
+    }
+    for i, rule in enumerate(rules):
+        compiled["lhs"][i] = FIELD_INDEX[rule["field"]]
+        if rule["other"]:
+            compiled["rhs"][i] = FIELD_INDEX[rule["other"]]
+            compiled["factor"][i] = rule["value"] if rule["op"] == "volume_spike" else 1.0
+        else:
+            compiled["rhs"][i] = CONSTANT
+            compiled["const"][i] = rule["value"]
+        compiled["sign"][i] = -1.0 if rule["op"] in ("below", "crosses_below") else 1.0
+        compiled["cross"][i] = rule["op"] in ("crosses_above", "crosses_below", "volume_spike")
+        compiled["repeat"][i] = rule["repeat"]
+        compiled["active"][i] = rule["active"]
+    return compiled
+
+
+def _margin(compiled, bars):
+    # Positive where the rule's condition holds on each bar; NaN inputs compare False
+    lhs, rhs = bars[..., compiled["lhs"]], bars[..., compiled["rhs"]]
+    return compiled["sign"] * (lhs - rhs * compiled["factor"] - compiled["const"])
+
+
+def evaluate(compiled, bars):
+    """
+    (bar, rule) positions of the active compiled rules that fire on bars[1:],
+    each bar read after the one before it, in bar order. `bars` is a matrix
+    with one row per bar laid out like FIELDS plus the CONSTANT slot. Rules
+    that don't repeat only fire on their first hit.
+    """
+    with np.errstate(invalid="ignore"):
+        holds = _margin(compiled, bars) > 0
+    hit = compiled["active"] & holds[1:]
+    if compiled["cross"].any():
+        hit &= ~compiled["cross"] | ~holds[:-1]
+    once = ~compiled["repeat"]
+    if once.any():
+        hit[:, once] &= np.cumsum(hit[:, once], axis=0) == 1
+    rows, cols = np.nonzero(hit)
+    return rows + 1, cols
+
+
+def bar_matrix(frame, start=None):
+    """
+    Bars of an indicator frame from position `start` (default the last bar) to
+    the end, preceded by the bar before `start`, as a FIELDS-ordered matrix.
+    None with fewer than two bars. Missing columns read as NaN.
+    """
+    if len(frame) < 2:
+        return None
+    start = len(frame) - 1 if start is None else min(max(start, 1), len(frame) - 1)
+    rows = frame.iloc[start - 1:]
+    bars = np.full((len(rows), len(FIELDS) + 1), np.nan)
+    bars[:, CONSTANT] = 0.0
+    for name in FIELDS[:-1]:
+        if name in rows.columns:
+            bars[:, FIELD_INDEX[name]] = rows[name].to_numpy(dtype=float)
+    # Same window as analyze_technical: the last 20 bars, the current one included
+    volume = frame["Volume"].iloc[max(start - VOLUME_WINDOW, 0):].astype(float)
+    bars[:, FIELD_INDEX["Volume_Avg"]] = volume.rolling(VOLUME_WINDOW, min_periods=1).mean().to_numpy()[-len(rows):]
+    return bars
+
+
+class AlertEngine:
+    """
+    Holds every user's rules, compiled per (ticker, timeframe), and the log of
+    fired alerts. `on_frame` is called with each updated indicator frame and
+    only evaluates when that key has a bar it has not seen yet.
+    """
+
+    def __init__(self, rules=()):
+        self._lock = threading.RLock()
+        self._rules = {}
+        self._by_key = collections.defaultdict(list)  # (ticker, timeframe) -> rule ids
+        self._compiled = {}  # (ticker, timeframe) -> arrays, rebuilt after edits
+        # (ticker, timeframe) -> (timestamp, values) of the last evaluated bar,
+        # which may still be forming and is evaluated again when it changes
+        self._last_bar = {}
+        self._fired = collections.defaultdict(set)  # (ticker, timeframe) -> (rule id, bar) fired on that last bar
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        for rule in rules:
+            self._add(rule)
+
+    def _add(self, rule):
+        key = (rule["ticker"], rule["timeframe"])
+        self._rules[rule["id"]] = rule
+        self._by_key[key].append(rule["id"])
+        self._compiled.pop(key, None)
+
+    def add_rule(self, rule):
+        with self._lock:
+            self._add(rule)
+        return rule["id"]
+
+    def remove_rule(self, rule_id):
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            key = (rule["ticker"], rule["timeframe"])
+            self._by_key[key].remove(rule_id)
+            if not self._by_key[key]:
+                del self._by_key[key]
+                self._last_bar.pop(key, None)
+                self._fired.pop(key, None)
+            self._compiled.pop(key, None)
+            return True
+
+    def set_active(self, rule_id, active):
+        with self._lock:
+            rule = self._rules[rule_id]
+            rule["active"] = bool(active)
+            self._compiled.pop((rule["ticker"], rule["timeframe"]), None)
+
+    def rules(self, user=ALL_USERS):
+        _check_user(user)
+        with self._lock:
+            return [dict(r) for r in self._rules.values() if user is ALL_USERS or r["user"] == user]
+
+    def keys(self):
+        """
+        (ticker, timeframe) pairs with at least one active rule.
+        """
+        with self._lock:
+            return [key for key, ids in self._by_key.items() if any(self._rules[i]["active"] for i in ids)]
+
+    def on_bars(self, key, bars, stamps=None):
+        """
+        Evaluates the rules of one (ticker, timeframe) against new bars: every
+        row of `bars` after the first (see bar_matrix), with `stamps` their
+        timestamps. A rule fires at most once per bar stamp. Returns the
+        fired alerts (also appended to `history`).
+        """
+        with self._lock:
+            if key not in self._by_key:
+                return []
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                compiled = _compile([self._rules[i] for i in self._by_key[key]])
+                self._compiled[key] = compiled
+            fired = []
+            now = time.time()
+            for row, pos in zip(*evaluate(compiled, bars)):
+                rule = self._rules[compiled["ids"][pos]]
+                bar = None if stamps is None else stamps[row - 1]
+                if bar is not None:
+                    if (rule["id"], bar) in self._fired[key]:
+                        continue
+                    self._fired[key].add((rule["id"], bar))
+                if not rule["repeat"]:
+                    rule["active"] = False
+                    compiled["active"][pos] = False
+                fired.append({
+                    "rule_id": rule["id"],
+                    "user": rule["user"],
+                    "ticker": rule["ticker"],
+                    "message": describe(rule),
+                    "value": float(bars[row, FIELD_INDEX[rule["field"]]]),
+                    "bar": bar,
+                    "fired": now,
+                })
+            self.history.extend(fired)
+        count("alert_evaluations", result="fired" if fired else "quiet")
+        return fired
+
+    def on_frame(self, ticker, timeframe, frame):
+        """
+        Feeds the latest indicator frame of a ticker. Does nothing unless the
+        ticker has rules on this timeframe and the frame has a new bar or its
+        last bar changed. The last bar seen is still forming (Yahoo updates
+        it until the close), so it is evaluated again along with every bar
+        after it (only the last bar the first time a key is seen).
+        """
+        key = (ticker.upper(), timeframe)
+        if frame is None or frame.empty:
+            return []
+        with self._lock:
+            if key not in self._by_key:
+                return []
+            last = self._last_bar.get(key)
+            start = None if last is None else frame.index.searchsorted(last[0], side="left")
+            if start == len(frame):
+                return []
+            bars = bar_matrix(frame, start)
+            if bars is None:
+                return []
+            stamp = frame.index[-1]
+            if last is not None and last[0] == stamp and np.array_equal(last[1], bars[-1], equal_nan=True):
+                return []
+            self._last_bar[key] = (stamp, bars[-1].copy())
+            fired = self.on_bars(key, bars, frame.index[len(frame) - len(bars) + 1:])
+            # Only the (still forming) last bar can be evaluated again
+            self._fired[key] = {f for f in self._fired[key] if f[1] >= stamp}
+            return fired
+
+    def recent(self, user=ALL_USERS, since=None):
+        """
+        Fired alerts, newest first, optionally for one user and after `since` (epoch).
+        """
+        _check_user(user)
+        with self._lock:
+            items = list(self.history)
+        return [
+            a for a in reversed(items)
+            if (user is ALL_USERS or a["user"] == user) and (since is None or a["fired"] > since)
+        ]
+
+
+_file_lock = threading.Lock()
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _read_file():
+    if not ALERTS_FILE.exists():
+        return {"rules": [], "history": []}
+    return json.loads(ALERTS_FILE.read_text())
+
+
+def save(engine):
+    # Bar timestamps are stored as ISO strings
+    history = [dict(a, bar=str(a["bar"]) if a["bar"] is not None else None) for a in engine.recent()[::-1]]
+    with _file_lock:
+        ALERTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ALERTS_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"rules": engine.rules(), "history": history}, indent=2))
+        tmp.replace(ALERTS_FILE)
+
+
+def get_engine():
+    """
+    The process-wide engine, loaded from disk on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            with _file_lock:
+                data = _read_file()
+            _engine = AlertEngine(data["rules"])
+            _engine.history.extend(data["history"])
+    return _engine
+
+
+def add_rule(rule):
+    engine = get_engine()
+    engine.add_rule(rule)
+    save(engine)
+    return rule["id"]
+
+
+def remove_rule(rule_id):
+    engine = get_engine()
+    if engine.remove_rule(rule_id):
+        save(engine)
+
+
+def set_active(rule_id, active):
+    engine = get_engine()
+    engine.set_active(rule_id, active)
+    save(engine)
+
+
+def check_frame(ticker, timeframe, frame):
+    """
+    Evaluates a frame a page already loaded (no download). Returns fired alerts.
+    """
+    engine = get_engine()
+    fired = engine.on_frame(ticker, timeframe, frame)
+    if fired:
+        save(engine)
+    return fired
+
+
+@timed("fetch.alerts")
+def poll():
+    """
+    Refreshes the bars of every ticker with active rules (one batched download
+    per timeframe) and evaluates the ones that got a new bar. Returns fired alerts.
+    """
+    engine = get_engine()
+    by_timeframe = collections.defaultdict(list)
+    for ticker, timeframe in engine.keys():
+        by_timeframe[timeframe].append(ticker)
+
+    fired = []
+    for timeframe, tickers in by_timeframe.items():
+        params = market_data.FETCH_PARAMS[timeframe]
+        market_data.get_bars_batch(tickers, params["period"], params["interval"])
+        for ticker in tickers:
+            # Served from the bars just batched; indicators only recomputed on new bars
+            frame = market_data.get_indicator_frame(ticker, timeframe)
+            fired += engine.on_frame(ticker, timeframe, frame)
+    if fired:
+        save(engine)
+    return fired
+
+
+def fired_at(alert):
+    return datetime.datetime.fromtimestamp(alert["fired"], datetime.timezone.utc)
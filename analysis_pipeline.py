@@ -0,0 +1,120 @@
+import threading
+import weakref
+
+import market_data
+import worker_pool
+from instrumentation import count
+from quantitative_analysis import analyze_quantitative
+from technical_analysis import add_indicators, analyze_technical
+
+_lock = threading.Lock()
+_reports = {}  # (ticker, period, interval) -> (weakref to frame, reports)
+_inflight = {}  # (ticker, period, interval) -> (weakref to bars, worker_pool Job)
+
+
+def analyze(frame):
+    """
+    Technical and quantitative reports for a frame that already has indicators.
+    Both read the same frame; neither copies nor modifies it.
+    """
+    return {
+        "technical": analyze_technical(frame),
+        "quantitative": analyze_quantitative(frame),
+    }
+
+
+def build(bars):
+    """
+    Indicators and reports for raw OHLCV bars in one pass: the bars are
+    shallow-copied once, indicators are computed once, and every report reads
+    that frame. Returns (frame, reports).
+    """
+    frame = add_indicators(bars.copy(deep=False))
+    return frame, analyze(frame)
+
+
+def get_analysis(ticker, timeframe, force=False):
+    """
+    Returns {"frame", "technical", "quantitative"} for a dashboard timeframe.
+    The frame comes from market_data's indicator cache and the reports are only
+    recomputed when it changed, so a rerun with unchanged bars computes nothing.
+    The frame is shared: slice it for display, never modify it in place.
+    """
+    frame = market_data.get_indicator_frame(ticker, timeframe, force=force)
+    if frame.empty:
+        return {"frame": frame, "technical": None, "quantitative": None}
+
+    params = market_data.FETCH_PARAMS[timeframe]
+    key = (ticker, params["period"], params["interval"])
+    entry = _reports.get(key)
+    # Weak reference: evicting the frame from market_data frees it for real
+    if entry is not None and entry[0]() is frame:
+        count("cache_requests", cache="analysis", result="hit")
+        reports = entry[1]
+    else:
+        count("cache_requests", cache="analysis", result="miss")
+        reports = analyze(frame)
+        with _lock:
+            _reports[key] = (weakref.ref(frame), reports)
+    return {"frame": frame, **reports}
+
+
+def with_indicators(bars, indicators):
+    """
+    `bars` plus indicator columns computed elsewhere (same index): a shallow
+    copy, so the price columns stay shared with the cached bars.
+    """
+    frame = bars.copy(deep=False)
+    for column in indicators.columns:
+        frame[column] = indicators[column].to_numpy()
+    return frame
+
+
+def submit_analysis(ticker, timeframe, force=False):
+    """
+    get_analysis for the pages: a cache miss is computed in the worker pool
+    instead of the calling thread. Returns a worker_pool Job whose result is
+    {"frame", "technical", "quantitative"}; on a cache hit it is already done.
+    Sessions asking for the same bars share one job, and its results are
+    cached like get_analysis's. The job comes back attached for the caller,
+    who must detach() it when done with it (the last one cancels it).
+    """
+    params = market_data.FETCH_PARAMS[timeframe]
+    bars = market_data.get_bars(ticker, params["period"], params["interval"], force=force)
+    if bars.empty:
+        return worker_pool.completed({"frame": bars, "technical": None, "quantitative": None})
+
+    key = (ticker, params["period"], params["interval"])
+    frame = market_data.cached_indicator_frame(ticker, timeframe, bars)
+    entry = _reports.get(key)
+    if frame is not None and entry is not None and entry[0]() is frame:
+        count("cache_requests", cache="analysis", result="hit")
+        return worker_pool.completed({"frame": frame, **entry[1]})
+    count("cache_requests", cache="analysis", result="miss")
+
+    def finish(result):
+        frame = market_data.store_indicator_frame(ticker, timeframe, bars, with_indicators(bars, result["indicators"]))
+        reports = {"technical": result["technical"], "quantitative": result["quantitative"]}
+        with _lock:
+            _reports[key] = (weakref.ref(frame), reports)
+        return {"frame": frame, **reports}
+
+    with _lock:
+        running = _inflight.get(key)
+        # attach() fails once the last waiter left and the job is being cancelled
+        if running is not None and running[0]() is bars and not running[1].done() and running[1].attach():
+            return running[1]
+    job = worker_pool.submit("analysis", bars, finish=finish)
+    with _lock:
+        # Attached before other sessions can see it
+        job.attach()
+        _inflight[key] = (weakref.ref(bars), job)
+    job.add_done_callback(lambda done: _forget(key, done))
+    return job
+
+
+def _forget(key, job):
+    # Finished jobs are not shared any more (and must not keep their frame alive)
+    with _lock:
+        if _inflight.get(key, (None, None))[1] is job:
+            del _inflight[key]
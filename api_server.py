@@ -0,0 +1,357 @@
+"""
+Async JSON API over the dashboard's data, for tools that must not scrape the UI.
+
+    python api_server.py                      # http://127.0.0.1:8600
+    python api_server.py --offline --port 0   # synthetic upstream data
+
+    GET /health
+    GET /v1/bars/{ticker}?timeframe=1Y&limit=250
+    GET /v1/indicators/{ticker}?timeframe=1Y&limit=250
+    GET /v1/analysis/{ticker}?timeframe=1Y        technical + quantitative
+    GET /v1/fundamentals/{ticker}
+    GET /v1/macro                                 latest macro_worker snapshot
+    GET /v1/exports/{name}?filename=AAPL.csv      a file prepared by data_viewer
+
+Data comes from the same market_data caches the pages use (imported lazily, so
+--offline can move the on-disk cache first). A response body is serialized once
+per cached object (frames straight through pandas' C JSON writer) and reused,
+with its ETag, until the object changes: repeated requests cost a dictionary
+lookup, and clients sending If-None-Match get a 304. `limit` views are cut out
+of the full frame's body rather than serialized again.
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+DEFAULT_PORT = 8600
+DEFAULT_TIMEFRAME = "1Y"
+MAX_LIMIT = 100_000
+# Memory for serialized bodies kept for reuse (most recently served first to survive)
+BODY_CACHE_MB = float(os.environ.get("STOCK_DASHBOARD_API_BODY_MB", 256))
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+DOUBLE_PRECISION = 8
+# Names data_viewer.export_file gives prepared exports (anything else is refused)
+EXPORT_NAME = re.compile(r"export_[0-9a-f]{32}\.(csv|parquet)")
+
+_bodies = collections.OrderedDict()  # key -> (source ref, etag, body, gzipped body or None)
+_bodies_bytes = 0
+_bodies_lock = threading.Lock()
+# Keys whose source object was garbage collected (appended by weakref callbacks)
+_dead = collections.deque()
+
+
+def to_json(value):
+    """
+    JSON text for report dicts, frames and scalars. Frames and series use
+    pandas' "split" layout ({"columns", "index", "data"}); NaN becomes null.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.to_json(orient="split", date_format="iso", double_precision=DOUBLE_PRECISION)
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{json.dumps(str(k))}:{to_json(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(to_json(v) for v in value) + "]"
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return "null"
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return json.dumps(value.isoformat())
+    return json.dumps(value)
+
+
+def _ref(source, key):
+    # Frames are held weakly so evicting them from market_data frees them (and
+    # drops their bodies); report dicts can't be, and are small
+    try:
+        return weakref.ref(source, lambda _: _dead.append(key))
+    except TypeError:
+        return lambda: source
+
+
+def _size(entry):
+    return len(entry[2]) + (len(entry[3]) if entry[3] is not None else 0)
+
+
+def _drop(key):
+    global _bodies_bytes
+    entry = _bodies.pop(key, None)
+    if entry is not None:
+        _bodies_bytes -= _size(entry)
+
+
+def _cached(key, source):
+    """
+    (etag, body, gzipped body) last built for `key` from `source`, or None.
+    """
+    with _bodies_lock:
+        while _dead:
+            dead = _dead.popleft()
+            # The key may have been rebuilt from a live object since
+            if dead in _bodies and _bodies[dead][0]() is None:
+                _drop(dead)
+        entry = _bodies.get(key)
+        if entry is not None and entry[0]() is source:
+            _bodies.move_to_end(key)
+            return entry[1:]
+    return None
+
+
+def _store(key, source, body):
+    global _bodies_bytes
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    zipped = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+    entry = (_ref(source, key), etag, body, zipped)
+    with _bodies_lock:
+        _drop(key)
+        _bodies[key] = entry
+        _bodies_bytes += _size(entry)
+        while _bodies_bytes > BODY_CACHE_MB * 1024 * 1024 and len(_bodies) > 1:
+            _drop(next(iter(_bodies)))
+    return etag, body, zipped
+
+
+def _body(key, source, build):
+    """
+    (etag, body, gzipped body) for `source`, serialized with `build(source)`
+    only if this key was last served from a different object.
+    """
+    cached = _cached(key, source)
+    if cached is not None:
+        return cached
+    return _store(key, source, build(source).encode("utf-8"))
+
+
+def _tail_rows(body, rows, limit):
+    """
+    A "split" frame body of `rows` rows cut down to its last `limit`, or None
+    unless it has the plain layout of a datetime index over numeric columns.
+    """
+    index_at = body.find(b'"index":[') + len(b'"index":[')
+    data_at = body.find(b'"data":[') + len(b'"data":[')
+    if index_at < len(b'"index":[') or data_at < index_at:
+        return None
+    index_end = body.rfind(b"]", index_at, data_at)
+    text = np.frombuffer(body, dtype=np.uint8)
+    commas = index_at + np.flatnonzero(text[index_at:index_end] == ord(","))
+    starts = data_at + np.flatnonzero(text[data_at:-2] == ord("["))
+    if len(commas) != rows - 1 or len(starts) != rows:
+        return None
+    first = rows - limit
+    index_from = index_at if first == 0 else commas[first - 1] + 1
+    return body[:index_at] + body[index_from:index_end] + body[index_end:data_at] + body[starts[first]:]
+
+
+def _frame_body(key, frame, columns, limit):
+    """
+    Body of the last `limit` rows of `frame` (all of them with 0). The full
+    frame is serialized once per object; shorter views are sliced from it.
+    """
+    def view(frame):
+        return frame[[c for c in columns if c in frame.columns]]
+
+    full = _body(key, frame, lambda frame: to_json(view(frame)))
+    if not limit or limit >= len(frame):
+        return full
+    cached = _cached(key + (limit,), frame)
+    if cached is not None:
+        return cached
+    body = _tail_rows(full[1], len(frame), limit)
+    if body is None:
+        body = to_json(view(frame).iloc[-limit:]).encode("utf-8")
+    return _store(key + (limit,), frame, body)
+
+
+def _send(request, etag, body, zipped, max_age):
+    headers = {"ETag": etag, "Cache-Control": f"max-age={max_age}", "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    if zipped is not None and "gzip" in request.headers.get("Accept-Encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = zipped
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+def _respond(request, key, source, build=to_json, max_age=0):
+    return _send(request, *_body(key, source, build), max_age)
+
+
+def _respond_frame(request, key, frame, columns, limit, max_age=0):
+    return _send(request, *_frame_body(key, frame, columns, limit), max_age)
+
+
+def _error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+def _params(request):
+    """
+    (ticker, timeframe, limit) from the path and query string.
+    """
+    import market_data
+
+    ticker = request.match_info["ticker"].upper()
+    timeframe = request.query.get("timeframe", DEFAULT_TIMEFRAME)
+    if timeframe not in market_data.FETCH_PARAMS:
+        raise web.HTTPBadRequest(text=to_json({"error": f"unknown timeframe {timeframe}"}),
+                                 content_type="application/json")
+    try:
+        limit = int(request.query.get("limit", 0))
+    except ValueError:
+        limit = 0
+    return ticker, timeframe, min(max(limit, 0), MAX_LIMIT)
+
+
+def _ttl(timeframe):
+    import market_data
+    return market_data.BAR_TTL.get(market_data.FETCH_PARAMS[timeframe]["interval"], 300)
+
+
+async def _run(fn, *args):
+    # market_data calls may block on a download: keep them off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def bars(request):
+    import market_data
+
+    ticker, timeframe, limit = _params(request)
+    params = market_data.FETCH_PARAMS[timeframe]
+    frame = await _run(market_data.get_bars, ticker, params["period"], params["interval"])
+    if frame.empty:
+        return _error(404, f"no data for {ticker}")
+    columns = market_data.PRICE_COLUMNS + ["Volume"]
+    return _respond_frame(request, ("bars", ticker, timeframe), frame, columns, limit, _ttl(timeframe))
+
+
+async def indicators(request):
+    import market_data
+
+    ticker, timeframe, limit = _params(request)
+    frame = await _run(market_data.get_indicator_frame, ticker, timeframe)
+    if frame.empty:
+        return _error(404, f"no data for {ticker}")
+    return _respond_frame(request, ("indicators", ticker, timeframe), frame, list(frame.columns), limit, _ttl(timeframe))
+
+
+async def analysis(request):
+    from analysis_pipeline import get_analysis
+
+    ticker, timeframe, _ = _params(request)
+    result = await _run(get_analysis, ticker, timeframe)
+    if result["frame"].empty:
+        return _error(404, f"no data for {ticker}")
+    key = ("analysis", ticker, timeframe)
+
+    def build(frame):
+        return to_json({
+            "ticker": ticker,
+            "timeframe": timeframe,
+            "last_bar": frame.index[-1],
+            "technical": result["technical"],
+            "quantitative": result["quantitative"],
+        })
+    # Reports only change with the frame they were computed from
+    return _respond(request, key, result["frame"], build, _ttl(timeframe))
+
+
+async def fundamentals(request):
+    import market_data
+    from fundamental_analysis import analyze_fundamental
+
+    ticker = request.match_info["ticker"].upper()
+    info = await _run(market_data.get_info, ticker)
+    if not info:
+        return _error(404, f"no fundamentals for {ticker}")
+    # Keyed on the cached .info dict: the report is rebuilt when it is refetched
+    return _respond(request, ("fundamentals", ticker), info,
+                    lambda info: to_json(analyze_fundamental(ticker, info=info)), 3600)
+
+
+def _macro_snapshot():
+    from macro_worker import get_snapshot
+
+    return get_snapshot()
+
+
+async def macro(request):
+    snapshot = await _run(_macro_snapshot)
+    return _respond(request, ("macro",), snapshot, max_age=60)
+
+
+async def export(request):
+    from data_viewer import EXPORT_DIR
+
+    name = request.match_info["name"]
+    if not EXPORT_NAME.fullmatch(name) or not (EXPORT_DIR / name).is_file():
+        return _error(404, "no such export")
+    filename = re.sub(r"[^A-Za-z0-9._^=-]", "_", request.query.get("filename", name))
+    # Streamed from disk in chunks: the file is never read into memory
+    return web.FileResponse(EXPORT_DIR / name, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+    })
+
+
+async def health(request):
+    import market_data
+    return web.json_response({"status": "ok", "cache": market_data.cache_memory()})
+
+
+@web.middleware
+async def errors(request, handler):
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except Exception as e:
+        print(f"API error on {request.path}: {e}")
+        return _error(500, str(e))
+
+
+def make_app():
+    app = web.Application(middlewares=[errors])
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/v1/bars/{ticker}", bars),
+        web.get("/v1/indicators/{ticker}", indicators),
+        web.get("/v1/analysis/{ticker}", analysis),
+        web.get("/v1/fundamentals/{ticker}", fundamentals),
+        web.get("/v1/macro", macro),
+        web.get("/v1/exports/{name}", export),
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard's prices, indicators and analyses as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--offline", action="store_true", help="synthetic data instead of the upstream APIs")
+    args = parser.parse_args()
+
+    if args.offline:
+        # Keep synthetic histories and snapshots out of the real .cache
+        os.environ.setdefault("STOCK_DASHBOARD_CACHE_DIR", tempfile.mkdtemp(prefix="stock-dashboard-api-"))
+        from synthetic_data import install_offline_stand_in
+        install_offline_stand_in()
+    web.run_app(make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import hmac
+
 import streamlit as st
 
 def check_password():
@@ -10,26 +12,50 @@ def check_password():
         st.stop()  # Stop execution to prevent KeyError
 
     def password_entered():
-        """Checks whether a password entered by the user is correct."""
-        if st.session_state["password"] == st.secrets["passwords"]["admin"]:
+        """Checks the password entered against the one of the user named."""
+        user = st.session_state.get("username", "").strip()
+        expected = st.secrets["passwords"].get(user)
+        # Constant-time compare; unknown users are compared too, against nothing
+        correct = hmac.compare_digest(
+            st.session_state["password"].encode(), str(expected or "").encode()
+        ) and expected is not None
+        if correct:
             st.session_state["password_correct"] = True
+            st.session_state["user"] = user
             del st.session_state["password"]  # don't store password
         else:
             st.session_state["password_correct"] = False
 
-    if "password_correct" not in st.session_state:
-        # First run, show input for password.
+    def login_form():
+        st.text_input("Username", key="username")
         st.text_input(
             "Password", type="password", on_change=password_entered, key="password"
         )
+
+    # Sessions authenticated before per-user logins don't know who they are: log in again
+    if st.session_state.get("password_correct") and "user" not in st.session_state:
+        del st.session_state["password_correct"]
+
+    if "password_correct" not in st.session_state:
+        # First run, show inputs for username and password.
+        login_form()
         return False
     elif not st.session_state["password_correct"]:
-        # Password not correct, show input + error.
-        st.text_input(
-            "Password", type="password", on_change=password_entered, key="password"
-        )
-        st.error("😕 Password incorrect")
+        # Password not correct, show inputs + error.
+        login_form()
+        st.error("😕 User not known or password incorrect")
         return False
     else:
         # Password correct.
         return True
+
+
+def current_user():
+    """Name of the logged-in user (the key under [passwords] in secrets), None if unknown."""
+    return st.session_state.get("user")
+
+
+def is_admin():
+    """True if the logged-in user is listed under `admins` in secrets (default: "admin")."""
+    user = current_user()
+    return user is not None and user in st.secrets.get("admins", ["admin"])
@@ -0,0 +1,207 @@
+"""
+Headless batch reports: technical, quantitative and fundamental analysis for
+a list of symbols, computed in parallel worker processes without Streamlit.
+
+    python batch_report.py AAPL MSFT NVDA --timeframe 1Y
+    python batch_report.py --symbols-file nightly.txt --workers 8 --max-upstream 2
+    python batch_report.py --popular --format csv --out reports/popular
+    python batch_report.py --popular --offline          # synthetic data, no network
+
+Symbols are split into chunks; every chunk downloads its bars in one batched
+request and then analyzes them locally. Upstream calls from all workers share
+one semaphore, so at most --max-upstream requests hit Yahoo at a time however
+many processes compute.
+"""
+import argparse
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TIMEFRAME = "1Y"
+CHUNK_SIZE = 10
+DEFAULT_MAX_UPSTREAM = 2
+
+_upstream = None  # multiprocessing semaphore, set in every worker
+
+
+def _init_worker(semaphore, offline):
+    global _upstream
+    _upstream = semaphore
+    if offline:
+        from synthetic_data import install_offline_stand_in
+        install_offline_stand_in()
+
+
+def _has_fundamentals(symbol):
+    return not symbol.endswith("-USD") and not symbol.startswith("^")
+
+
+def analyze_chunk(symbols, timeframe):
+    """
+    Reports for a chunk of symbols (runs in a worker process): one batched bar
+    download, then indicators, technical and quantitative reports from one
+    shared frame, and the fundamental report from `.info`.
+    """
+    import market_data
+    from analysis_pipeline import build
+
+    params = market_data.FETCH_PARAMS[timeframe]
+    with _upstream:
+        bars = market_data.get_bars_batch(symbols, params["period"], params["interval"])
+
+    reports = []
+    for symbol in symbols:
+        report = {"symbol": symbol, "timeframe": timeframe, "error": None}
+        started = time.perf_counter()
+        try:
+            df = bars.get(symbol)
+            if df is None or df.empty:
+                raise ValueError("no price data")
+            frame, analysis = build(df)
+            report["last_bar"] = frame.index[-1]
+            report["bars"] = len(frame)
+            report.update(analysis)
+            if _has_fundamentals(symbol):
+                with _upstream:
+                    report["fundamental"] = market_data.get_fundamentals(symbol)
+            else:
+                report["fundamental"] = {"valid": False, "message": "No fundamentals for indices and crypto"}
+        except Exception as e:
+            report["error"] = f"{type(e).__name__}: {e}"
+        report["seconds"] = time.perf_counter() - started
+        reports.append(report)
+    return reports
+
+
+def run(symbols, timeframe, workers, max_upstream, chunk_size=CHUNK_SIZE, offline=False):
+    """
+    Analyzes every symbol across `workers` processes. Returns the reports in
+    input order.
+    """
+    # Fresh interpreters: the parent may already run market_data's upstream threads
+    ctx = multiprocessing.get_context("spawn")
+    semaphore = ctx.BoundedSemaphore(max_upstream)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(semaphore, offline)) as pool:
+        futures = {pool.submit(analyze_chunk, chunk, timeframe): chunk for chunk in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            chunk = futures[future]
+            try:
+                for report in future.result():
+                    results[report["symbol"]] = report
+            except Exception as e:
+                # A crashed worker loses its whole chunk
+                for symbol in chunk:
+                    results[symbol] = {"symbol": symbol, "timeframe": timeframe, "error": f"{type(e).__name__}: {e}"}
+            print(f"[{done}/{len(chunks)}] {', '.join(chunk)}", file=sys.stderr)
+    return [results[s] for s in symbols]
+
+
+def _plain(value):
+    """
+    JSON-safe copy: numpy scalars to Python, NaN to None, timestamps to ISO.
+    """
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def write_json(reports, meta, path):
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "reports": _plain(reports)}, f, indent=2)
+
+
+def write_csv(reports, path):
+    # One row per symbol, nested report keys flattened to "technical.rsi" etc.
+    pd.json_normalize(_plain(reports), sep=".").to_csv(path, index=False)
+
+
+def _read_symbols(args):
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        for line in Path(args.symbols_file).read_text().splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                symbols.append(line)
+    if args.popular:
+        from tickers_data import TICKERS
+        symbols += [s for s in TICKERS.values() if s != "CUSTOM"]
+    return list(dict.fromkeys(s.upper() for s in symbols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch technical/quantitative/fundamental reports without Streamlit.")
+    parser.add_argument("symbols", nargs="*", help="ticker symbols")
+    parser.add_argument("--symbols-file", help="file with one symbol per line (# comments allowed)")
+    parser.add_argument("--popular", action="store_true", help="add every symbol of tickers_data")
+    parser.add_argument("--timeframe", default=DEFAULT_TIMEFRAME, help="dashboard timeframe, e.g. 1D, 6M, 1Y, 5Y")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="analysis processes")
+    parser.add_argument("--max-upstream", type=int, default=DEFAULT_MAX_UPSTREAM,
+                        help="upstream requests in flight across all workers")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="symbols per batched download")
+    parser.add_argument("--format", nargs="+", choices=["json", "csv"], default=["json", "csv"])
+    parser.add_argument("--out", help="output path without extension (default: reports/batch_<timeframe>_<date>)")
+    parser.add_argument("--offline", action="store_true", help="synthetic data instead of the upstream APIs")
+    args = parser.parse_args()
+
+    if args.offline:
+        # Keep synthetic histories out of the real .cache
+        os.environ.setdefault("STOCK_DASHBOARD_CACHE_DIR", tempfile.mkdtemp(prefix="stock-dashboard-batch-"))
+
+    from market_data import FETCH_PARAMS
+    if args.timeframe not in FETCH_PARAMS:
+        parser.error(f"unknown timeframe {args.timeframe!r}; choose from {', '.join(FETCH_PARAMS)}")
+    symbols = _read_symbols(args)
+    if not symbols:
+        parser.error("no symbols given")
+
+    started = time.time()
+    reports = run(symbols, args.timeframe, max(1, args.workers), max(1, args.max_upstream),
+                  chunk_size=max(1, args.chunk_size), offline=args.offline)
+    failed = [r["symbol"] for r in reports if r["error"]]
+    meta = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "timeframe": args.timeframe,
+        "symbols": len(symbols),
+        "failed": failed,
+        "seconds": time.time() - started,
+        "offline": args.offline,
+    }
+
+    out = Path(args.out or f"reports/batch_{args.timeframe}_{datetime.date.today():%Y%m%d}")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if "json" in args.format:
+        write_json(reports, meta, out.with_suffix(".json"))
+        print(f"Wrote {out.with_suffix('.json')}")
+    if "csv" in args.format:
+        write_csv(reports, out.with_suffix(".csv"))
+        print(f"Wrote {out.with_suffix('.csv')}")
+    print(f"{len(symbols) - len(failed)}/{len(symbols)} symbols analyzed in {meta['seconds']:.1f}s")
+    for symbol in failed:
+        print(f"  {symbol}: {next(r['error'] for r in reports if r['symbol'] == symbol)}")
+    if len(failed) == len(symbols):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
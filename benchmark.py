@@ -0,0 +1,243 @@
+"""
+Offline micro-benchmarks for the analysis modules on synthetic OHLCV data.
+
+    python benchmark.py run --out baseline.json              # 1e3 .. 1e7 rows
+    python benchmark.py run --sizes 1e3 1e5 --out quick.json # custom sizes
+    python benchmark.py compare baseline.json current.json --threshold 0.15
+
+`compare` exits with status 1 if any case got slower (or allocated more at
+peak) than the baseline by more than the threshold. Slowdowns smaller than
+--min-ms are timer noise and never count.
+"""
+import argparse
+import datetime
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from quantitative_analysis import analyze_quantitative, rolling_volatility, volatility_cone
+from synthetic_data import synthetic_ohlcv, synthetic_yields
+from technical_analysis import add_indicators, analyze_technical, calculate_rsi
+
+DEFAULT_SIZES = [1e3, 1e4, 1e5, 1e6, 1e7]
+# Absolute slowdowns below this are timer noise, whatever their relative size
+MIN_DELTA_MS = 1.0
+# Daily yield histories longer than this are not realistic, so curve cases are capped.
+MAX_YIELD_DAYS = 50_000
+# Alert rules are Python objects built one by one: 1e7 of them take minutes and
+# gigabytes before the timer starts, so the alert case stops at this many rules.
+MAX_ALERT_RULES = 1_000_000
+CURVE_MATURITIES = [1 / 12, 4 / 12, 8 / 12, 1, 2, 3, 5, 7, 10, 20, 30]
+
+
+def _curve_case(method):
+    def run(history):
+        from yield_curve import fit_curves
+        fit_curves(history, CURVE_MATURITIES, method=method)
+    return run
+
+
+def _pipeline_case(bars):
+    # Indicators + technical + quantitative reports, as one dashboard rerun computes them
+    from analysis_pipeline import build
+    build(bars)
+
+
+def _option_quotes(n, seed=0):
+    # Cent-rounded Black-Scholes prices of random contracts around spot 100
+    from options_analysis import bs_price
+    rng = np.random.default_rng(seed)
+    strike = rng.uniform(50, 150, n)
+    t = rng.uniform(0.01, 2, n)
+    is_call = rng.random(n) < 0.5
+    price = np.round(bs_price(100.0, strike, t, 0.04, rng.uniform(0.05, 1.2, n), is_call), 2)
+    return price, strike, t, is_call
+
+
+def _iv_case(quotes):
+    from options_analysis import implied_volatility
+    price, strike, t, is_call = quotes
+    implied_volatility(price, 100.0, strike, t, 0.04, is_call)
+
+
+ALERT_TICKERS = 500
+
+
+def _alert_engine(n, seed=0):
+    # n random rules over ALERT_TICKERS symbols, compiled, plus a two-bar matrix per symbol
+    from alerts import FIELDS, AlertEngine, make_rule
+    rng = np.random.default_rng(seed)
+    engine = AlertEngine()
+    fields = FIELDS[:-1]
+    for i in range(n):
+        ticker = f"T{rng.integers(ALERT_TICKERS)}"
+        op = rng.choice(["above", "below", "crosses_above", "crosses_below", "volume_spike"])
+        if op == "volume_spike" or rng.random() < 0.5:
+            rule = make_rule("bench", ticker, "RSI", op, value=rng.uniform(20, 80), repeat=True)
+        else:
+            rule = make_rule("bench", ticker, "Close", op, other=str(rng.choice(fields)), repeat=True)
+        engine.add_rule(rule)
+    bars = {}
+    for key in engine.keys():
+        matrix = rng.uniform(0, 100, (2, len(FIELDS) + 1))
+        matrix[:, -1] = 0.0
+        bars[key] = matrix
+        engine.on_bars(key, matrix)
+    engine.history.clear()
+    return engine, bars
+
+
+def _alert_case(arg):
+    # One new bar on every symbol
+    engine, bars = arg
+    for key, matrix in bars.items():
+        engine.on_bars(key, matrix)
+
+
+def _portfolio_moments(n, seed=0):
+    # Annualized moments of n // 10 assets (up to the optimizer's limit) from a year of factor-model returns
+    from portfolio import MAX_ASSETS
+    assets = max(2, min(int(n) // 10, MAX_ASSETS))
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (252, 3))
+    returns = factors @ rng.normal(1, 0.5, (3, assets)) / 3 + rng.normal(0.0004, 0.015, (252, assets))
+    return returns.mean(axis=0) * 252, np.cov(returns.T) * 252
+
+
+def _frontier_case(moments):
+    from portfolio import efficient_frontier
+    mean, cov = moments
+    return efficient_frontier(mean, cov, cap=min(1.0, 10 / len(mean)))
+
+
+# name -> (input builder, function under test). Builders run outside the timer.
+CASES = {
+    "calculate_rsi": (lambda n: synthetic_ohlcv(n)["Close"], calculate_rsi),
+    "add_indicators": (lambda n: synthetic_ohlcv(n), lambda df: add_indicators(df.copy())),
+    "analyze_technical": (lambda n: synthetic_ohlcv(n), analyze_technical),
+    "analyze_quantitative": (lambda n: synthetic_ohlcv(n), analyze_quantitative),
+    "range_volatility": (lambda n: synthetic_ohlcv(n), lambda df: rolling_volatility(df)),
+    "volatility_cone": (lambda n: synthetic_ohlcv(n), volatility_cone),
+    "analysis_pipeline": (lambda n: synthetic_ohlcv(n), _pipeline_case),
+    "implied_volatility": (_option_quotes, _iv_case),
+    "alert_rules": (lambda n: _alert_engine(min(n, MAX_ALERT_RULES)), _alert_case),
+    "portfolio_frontier": (_portfolio_moments, _frontier_case),
+    "yield_curve_linear": (lambda n: synthetic_yields(min(n, MAX_YIELD_DAYS)), _curve_case("Linear")),
+    "yield_curve_spline": (lambda n: synthetic_yields(min(n, MAX_YIELD_DAYS)), _curve_case("Cubic Spline")),
+    "yield_curve_nelson_siegel": (lambda n: synthetic_yields(min(n, MAX_YIELD_DAYS)), _curve_case("Nelson-Siegel")),
+}
+
+
+def measure(fn, arg, repeat):
+    """
+    Best wall time over `repeat` runs, then one traced run for peak memory.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 1e6}
+
+
+def run(sizes, cases, repeat):
+    results = {}
+    for size in sizes:
+        rows = int(size)
+        for name in cases:
+            build, fn = CASES[name]
+            arg = build(rows)
+            results[f"{name}@{rows}"] = measure(fn, arg, repeat)
+            r = results[f"{name}@{rows}"]
+            print(f"{name:<28} {rows:>10,} rows  {r['seconds'] * 1000:>10.2f} ms  {r['peak_mb']:>9.1f} MB peak")
+            del arg
+    return {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold, min_ms=MIN_DELTA_MS):
+    """
+    Prints a side-by-side table and returns the list of regressed cases.
+    A case only regresses in time if it got slower by more than `threshold`
+    and by more than `min_ms` milliseconds.
+    """
+    regressions = []
+    print(f"{'case':<40} {'base ms':>10} {'new ms':>10} {'Δ time':>8} {'base MB':>9} {'new MB':>9} {'Δ mem':>8}")
+    for key in sorted(set(baseline["results"]) & set(current["results"])):
+        b = baseline["results"][key]
+        c = current["results"][key]
+        dt = c["seconds"] / b["seconds"] - 1 if b["seconds"] else 0.0
+        dm = c["peak_mb"] / b["peak_mb"] - 1 if b["peak_mb"] else 0.0
+        slower = dt > threshold and (c["seconds"] - b["seconds"]) * 1000 > min_ms
+        flag = ""
+        if slower or dm > threshold:
+            regressions.append(key)
+            flag = "  << REGRESSION"
+        print(
+            f"{key:<40} {b['seconds'] * 1000:>10.2f} {c['seconds'] * 1000:>10.2f} {dt:>+8.0%}"
+            f" {b['peak_mb']:>9.1f} {c['peak_mb']:>9.1f} {dm:>+8.0%}{flag}"
+        )
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"Not in current run: {', '.join(missing)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis modules on synthetic data.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run the benchmarks and write a JSON result file")
+    p_run.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES, help="row counts, e.g. 1e3 1e7")
+    p_run.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    p_run.add_argument("--repeat", type=int, default=3)
+    p_run.add_argument("--out", default="benchmark_results.json")
+
+    p_cmp = sub.add_parser("compare", help="compare a result file against a baseline")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown (0.15 = 15%%)")
+    p_cmp.add_argument("--min-ms", type=float, default=MIN_DELTA_MS, help="ignore slowdowns below this many ms")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        result = run(args.sizes, args.cases, args.repeat)
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Wrote {args.out}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold, args.min_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import datetime
+import threading
+import time
+
+import alerts
+import market_calendar
+import market_data
+import resampling
+from tickers_data import TICKERS
+
+# Refresh period (seconds) per bar interval while the market is open.
+# When it is closed the bars cannot change, so they are refreshed rarely.
+OPEN_REFRESH = {
+    "1m": 60,
+    "5m": 120,
+    "15m": 300,
+    "1h": 900,
+    "1d": 1800,
+    "1wk": 6 * 3600,
+}
+CLOSED_REFRESH = 3 * 3600
+FUNDAMENTAL_REFRESH = 6 * 3600
+NEWS_REFRESH = 10 * 60
+
+# Rate limiting: minimum spacing between upstream calls, and how long to back
+# off after an error (Yahoo answers bursts with empty frames or 429s).
+MIN_CALL_SPACING = 1.5
+ERROR_BACKOFF = 60
+
+TOP_REQUESTED = 10
+
+
+def is_crypto(symbol):
+    return symbol.endswith("-USD")
+
+
+def is_market_open(symbol, now=None):
+    """
+    True if the market `symbol` trades on is in its regular session (holidays
+    and early closes included). Crypto trades around the clock.
+    """
+    return market_calendar.is_open(symbol, now)
+
+
+def refresh_interval(symbol, interval, now=None):
+    """
+    Seconds between refreshes of `interval` bars for `symbol` right now.
+    """
+    if is_market_open(symbol, now):
+        return OPEN_REFRESH.get(interval, 900)
+    return CLOSED_REFRESH
+
+
+def warm_symbols():
+    """
+    Curated TICKERS plus the symbols users request most often.
+    """
+    symbols = [t for t in TICKERS.values() if t != "CUSTOM"]
+    for symbol in market_data.most_requested(TOP_REQUESTED):
+        if symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+def warm_timeframes():
+    """
+    One representative timeframe per distinct upstream download. Intraday
+    timeframes that are resampled from the same finer bars (e.g. 1H and 4H
+    from 1m) share it.
+    """
+    seen = {}
+    for timeframe, params in market_data.FETCH_PARAMS.items():
+        source = resampling.source_interval(params["period"], params["interval"])
+        seen.setdefault((params["period"], source), timeframe)
+    return list(seen.values())
+
+
+def _warm_bars(symbols, timeframe, force=False):
+    # One batched download for the timeframe, then indicators computed locally
+    # from the bars it cached (get_indicator_frame no longer goes upstream)
+    params = market_data.FETCH_PARAMS[timeframe]
+    market_data.get_bars_batch(symbols, params["period"], params["interval"], force=force)
+    for symbol in symbols:
+        market_data.get_indicator_frame(symbol, timeframe)
+
+
+def _poll_alerts(force=False):
+    # _call passes force=True; alerts.poll serves fresh bars from the cache
+    alerts.poll()
+
+
+class CacheWarmer(threading.Thread):
+    """
+    Daemon thread that walks the warm set and refreshes whatever is due,
+    spacing upstream calls to stay within Yahoo's rate limits.
+    """
+
+    def __init__(self):
+        super().__init__(name="cache-warmer", daemon=True)
+        self._stop_event = threading.Event()
+        self._last_done = {}
+        self._last_call = 0.0
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _due(self, key, every):
+        last = self._last_done.get(key)
+        return last is None or (time.time() - last) >= every
+
+    def _call(self, key, fn, *args):
+        # Space out upstream calls
+        wait = MIN_CALL_SPACING - (time.time() - self._last_call)
+        if wait > 0:
+            self._stop_event.wait(wait)
+        self._last_call = time.time()
+        try:
+            fn(*args, force=True)
+            self._last_done[key] = time.time()
+            return True
+        except Exception as e:
+            print(f"Cache warmer: {key} failed: {e}")
+            self._stop_event.wait(ERROR_BACKOFF)
+            return False
+
+    def run_once(self):
+        """
+        Refreshes every due item once. Returns the number of upstream calls made.
+        """
+        calls = 0
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        if self._due("news", NEWS_REFRESH):
+            self._call("news", market_data.get_general_news)
+            calls += 1
+
+        # Alert rules may cover symbols outside the warm set: one batch per timeframe
+        if alerts.get_engine().keys() and self._due("alerts", alerts.POLL_SECONDS):
+            self._call("alerts", _poll_alerts)
+            calls += 1
+
+        symbols = warm_symbols()
+        for timeframe in warm_timeframes():
+            if self._stop_event.is_set():
+                return calls
+            params = market_data.FETCH_PARAMS[timeframe]
+            due = []
+            for symbol in symbols:
+                every = refresh_interval(symbol, params["interval"], now)
+                # A user request may already have refreshed it
+                age = market_data.bars_age(symbol, params["period"], params["interval"])
+                if age is not None and age < every:
+                    continue
+                if self._due(("bars", symbol, timeframe), every):
+                    due.append(symbol)
+            # One upstream call per timeframe for every symbol that is due
+            if due and self._call(("bars", timeframe), _warm_bars, due, timeframe):
+                for symbol in due:
+                    self._last_done[("bars", symbol, timeframe)] = self._last_done[("bars", timeframe)]
+            calls += bool(due)
+
+        for symbol in symbols:
+            if self._stop_event.is_set():
+                return calls
+            if not is_crypto(symbol) and not symbol.startswith("^"):
+                key = ("fundamentals", symbol)
+                if self._due(key, FUNDAMENTAL_REFRESH):
+                    self._call(key, market_data.get_fundamentals, symbol)
+                    calls += 1
+
+            key = ("ticker_news", symbol)
+            if self._due(key, NEWS_REFRESH):
+                self._call(key, market_data.get_ticker_news, symbol)
+                calls += 1
+        return calls
+
+    def run(self):
+        while not self._stop_event.is_set():
+            calls = self.run_once()
+            # Nothing was due: sleep a bit before scanning again
+            if calls == 0:
+                self._stop_event.wait(15)
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_cache_warmer():
+    """
+    Starts the process-wide warmer thread once. Safe to call on every rerun.
+    """
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None or not _warmer.is_alive():
+            _warmer = CacheWarmer()
+            _warmer.start()
+    return _warmer
@@ -0,0 +1,49 @@
+import pandas as pd
+
+import market_data
+import resampling
+
+# Comparison horizons: the dashboard timeframe whose download (FETCH_PARAMS)
+# is reused, so its bars are shared with the other pages, and the period the
+# aligned closes are trimmed to (None keeps everything).
+COMPARE_PARAMS = {
+    "1M": {"timeframe": "1Y", "period": "1mo"},
+    "6M": {"timeframe": "1Y", "period": "6mo"},
+    "1Y": {"timeframe": "1Y", "period": "1y"},
+    "5Y": {"timeframe": "5Y", "period": "5y"},
+    "Max": {"timeframe": "Max", "period": None},
+}
+
+MAX_SYMBOLS = 40
+
+
+def fetch_closes(tickers, horizon):
+    """
+    Close prices of all tickers aligned on a common index (one column per symbol).
+    Markets with different calendars (crypto trades weekends) are forward-filled.
+    """
+    horizon = COMPARE_PARAMS[horizon]
+    params = market_data.FETCH_PARAMS[horizon["timeframe"]]
+    bars = market_data.get_bars_batch(tickers, params["period"], params["interval"])
+    if not bars:
+        return pd.DataFrame()
+
+    closes = pd.concat({symbol: df["Close"] for symbol, df in bars.items()}, axis=1)
+    # Mixed timezones (e.g. .MC vs US) are compared on the trading date
+    if isinstance(closes.index, pd.DatetimeIndex) and closes.index.tz is not None:
+        closes.index = closes.index.tz_localize(None)
+    closes = closes.groupby(closes.index.normalize()).last()
+    if horizon["period"] is not None:
+        closes = resampling.trim_to_period(closes, horizon["period"])
+    return closes[[t for t in tickers if t in closes.columns]].ffill()
+
+
+def rebase(closes, base=100.0):
+    """
+    Rebases every column to `base` at the first date on which all symbols trade.
+    """
+    if closes.empty:
+        return closes
+    start = closes.apply(lambda s: s.first_valid_index()).max()
+    window = closes.loc[start:]
+    return window / window.iloc[0] * base
@@ -0,0 +1,195 @@
+import math
+import os
+import secrets
+import tempfile
+import time
+import weakref
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+PAGE_SIZES = [25, 50, 100, 250]
+EXPORT_CHUNK_ROWS = 50_000
+# Prepared exports left behind (e.g. by a crashed process) are deleted after this
+EXPORT_MAX_AGE = 3600
+EXPORT_DIR = Path(os.environ.get("STOCK_DASHBOARD_EXPORT_DIR",
+                                 Path(tempfile.gettempdir()) / "stock-dashboard-exports"))
+# Exports are streamed from disk by api_server.py (GET /v1/exports/{name}), never
+# loaded into the Streamlit process
+API_URL = os.environ.get("STOCK_DASHBOARD_API_URL", "http://127.0.0.1:8600").rstrip("/")
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def sort_order(df, sort_by=None, ascending=True):
+    """
+    Row positions of `df` in sorted order. Only the key column is sorted,
+    the frame itself is never reordered or copied.
+    """
+    if sort_by is None or sort_by not in df.columns:
+        keys = np.arange(len(df))
+    else:
+        keys = df[sort_by].to_numpy()
+    order = np.argsort(keys, kind="stable")
+    return order if ascending else order[::-1]
+
+
+def paginate(df, page, page_size, sort_by=None, ascending=True):
+    """
+    Returns the rows of one page (0-based) after a server-side sort.
+    """
+    order = sort_order(df, sort_by, ascending)
+    start = page * page_size
+    return df.iloc[order[start:start + page_size]]
+
+
+def iter_csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yields the frame as CSV text, `chunk_rows` rows at a time.
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(header=(start == 0))
+
+
+def write_csv(df, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    with open(path, "w", newline="") as f:
+        for text in iter_csv_chunks(df, chunk_rows):
+            f.write(text)
+
+
+def write_parquet(df, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Writes the frame as Parquet, one row group per chunk.
+    """
+    if pq is None:
+        raise RuntimeError("Parquet export needs the optional 'pyarrow' package")
+
+    writer = None
+    try:
+        for start in range(0, len(df), chunk_rows):
+            table = pa.Table.from_pandas(df.iloc[start:start + chunk_rows], preserve_index=True)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def cleanup_exports(max_age=EXPORT_MAX_AGE):
+    """
+    Deletes prepared exports older than `max_age` seconds.
+    """
+    cutoff = time.time() - max_age
+    for path in EXPORT_DIR.glob("export_*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ExportFile:
+    """
+    A prepared export on disk. The file is deleted with the object, i.e. when
+    a new export replaces it or the session holding it ends.
+    """
+
+    def __init__(self, path, fmt, ticker):
+        self.path = path
+        self.fmt = fmt
+        self.ticker = ticker
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def url(self):
+        extension = "parquet" if self.fmt == "Parquet" else "csv"
+        return f"{API_URL}/v1/exports/{os.path.basename(self.path)}?filename={self.ticker}.{extension}"
+
+    def remove(self):
+        self._finalizer()
+
+
+def export_file(df, fmt, ticker=None):
+    """
+    Writes the frame to a temporary file in chunks and returns it as an ExportFile.
+    """
+    cleanup_exports()
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    suffix = ".parquet" if fmt == "Parquet" else ".csv"
+    # The name is the only thing guarding the download link, so it must not be guessable
+    path = EXPORT_DIR / f"export_{secrets.token_hex(16)}{suffix}"
+    export = ExportFile(str(path), fmt, ticker)
+    try:
+        if fmt == "Parquet":
+            write_parquet(df, export.path)
+        else:
+            write_csv(df, export.path)
+    except Exception:
+        export.remove()
+        raise
+    return export
+
+
+def render_raw_data(df, ticker, key="raw"):
+    """
+    Paginated, server-side sorted table. Only the visible page is sent to the browser.
+    """
+    show_indicators = st.checkbox("Show indicator columns", value=False, key=f"{key}_ind")
+    if not show_indicators:
+        df = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+
+    col_sort, col_dir, col_size, col_page = st.columns([2, 1, 1, 1])
+    with col_sort:
+        sort_by = st.selectbox("Sort by", ["Date"] + list(df.columns), key=f"{key}_sort")
+    with col_dir:
+        descending = st.toggle("Descending", value=True, key=f"{key}_desc")
+    with col_size:
+        page_size = st.selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_size")
+
+    pages = max(1, math.ceil(len(df) / page_size))
+    with col_page:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+
+    window = paginate(df, page - 1, page_size, None if sort_by == "Date" else sort_by, not descending)
+    st.dataframe(window, use_container_width=True)
+    st.caption(f"Page {page} of {pages} · {len(df):,} rows")
+
+    # --- EXPORT ---
+    formats = ["CSV", "Parquet"] if pq is not None else ["CSV"]
+    col_fmt, col_btn = st.columns([1, 2])
+    with col_fmt:
+        fmt = st.selectbox("Export format", formats, key=f"{key}_fmt")
+    with col_btn:
+        # Only build the file on demand, not on every rerun
+        if st.button("Prepare export", key=f"{key}_prep"):
+            previous = st.session_state.pop(f"{key}_export", None)
+            if previous is not None:
+                previous.remove()
+            st.session_state[f"{key}_export"] = export_file(df, fmt, ticker)
+
+    prepared = st.session_state.get(f"{key}_export")
+    if prepared is not None and (prepared.fmt, prepared.ticker) == (fmt, ticker) and prepared.exists():
+        # The API server streams the file from disk, so its size doesn't matter here
+        st.link_button(f"Download {fmt} ({prepared.size() / 1024 / 1024:.1f} MB)", prepared.url())
+        st.caption("Served by api_server.py")
@@ -0,0 +1,64 @@
+import pandas as pd
+import plotly.graph_objs as go
+import streamlit as st
+
+import instrumentation
+import market_data
+from auth import is_admin
+
+
+def render_debug_panel():
+    """
+    Admin-only waterfall of the current rerun's spans plus cache counters and
+    a Prometheus export of the aggregated histograms.
+    """
+    if not is_admin():
+        return
+    if not st.sidebar.checkbox("🛠️ Show debug panel", value=False, key="debug_panel"):
+        return
+
+    rerun = instrumentation.current_rerun()
+    with st.expander("🛠️ Rerun timings (admin)", expanded=True):
+        if not rerun or not rerun["spans"]:
+            st.info("No spans recorded in this rerun.")
+        else:
+            spans = pd.DataFrame(sorted(rerun["spans"], key=lambda s: s["start"]))
+            duration = rerun.get("duration", 0.0)
+            st.caption(f"Rerun: {duration * 1000:.0f} ms · {len(spans)} spans")
+
+            labels = ["  " * d + n for d, n in zip(spans["depth"], spans["name"])]
+            fig = go.Figure(go.Bar(
+                y=labels,
+                x=spans["duration"] * 1000,
+                base=spans["start"] * 1000,
+                orientation='h',
+                marker_color=['#00C805' if d == 0 else '#888' for d in spans["depth"]],
+                hovertemplate="%{y}: %{x:.1f} ms<extra></extra>",
+            ))
+            fig.update_layout(
+                xaxis_title="ms since rerun start",
+                yaxis=dict(autorange="reversed"),
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                margin=dict(t=10, b=10, l=10, r=10),
+                height=max(250, 22 * len(spans)),
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        memory = market_data.cache_memory()
+        st.caption(
+            f"Cached frames: {memory['total'] / 1e6:.0f} of {market_data.CACHE_BUDGET_MB:.0f} MB · "
+            f"{memory['entries']} entries · {memory['sessions']} sessions"
+        )
+
+        counters = instrumentation.counter_snapshot()
+        if counters:
+            rows = [dict(metric=name, **dict(labels), value=value) for (name, labels), value in counters.items()]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "Export metrics (Prometheus)",
+            data=instrumentation.prometheus_text(),
+            file_name="stock_dashboard_metrics.prom",
+            mime="text/plain",
+        )
@@ -0,0 +1,189 @@
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pandas_datareader.data as web
+
+from market_data import CACHE_DIR
+
+# Declarative list of FRED series shown on the Macro page.
+# transform: how the headline number is derived from the raw series
+#   level   - latest value as published
+#   yoy     - % change vs the value one year earlier
+#   mom     - % change vs the value one month earlier
+#   ann     - month-over-month change, annualized
+#   diff    - absolute change vs one month earlier
+CATALOGUE = [
+    # Inflation
+    {"key": "cpi", "series": "CPIAUCSL", "name": "CPI", "category": "Inflation", "transform": "yoy", "units": "%"},
+    {"key": "core_cpi", "series": "CPILFESL", "name": "Core CPI", "category": "Inflation", "transform": "yoy", "units": "%"},
+    {"key": "pce", "series": "PCEPI", "name": "PCE Price Index", "category": "Inflation", "transform": "yoy", "units": "%"},
+    {"key": "core_pce", "series": "PCEPILFE", "name": "Core PCE", "category": "Inflation", "transform": "yoy", "units": "%"},
+    {"key": "core_cpi_ann", "series": "CPILFESL", "name": "Core CPI (MoM ann.)", "category": "Inflation", "transform": "ann", "units": "%"},
+    {"key": "breakeven_10y", "series": "T10YIE", "name": "10Y Breakeven", "category": "Inflation", "transform": "level", "units": "%"},
+    # Labor
+    {"key": "unemployment", "series": "UNRATE", "name": "Unemployment Rate", "category": "Labor", "transform": "level", "units": "%"},
+    {"key": "payrolls", "series": "PAYEMS", "name": "Nonfarm Payrolls (chg)", "category": "Labor", "transform": "diff", "units": "K"},
+    {"key": "claims", "series": "ICSA", "name": "Initial Claims", "category": "Labor", "transform": "level", "units": ""},
+    {"key": "participation", "series": "CIVPART", "name": "Participation Rate", "category": "Labor", "transform": "level", "units": "%"},
+    # Growth
+    {"key": "gdp_growth", "series": "A191RL1Q225SBEA", "name": "Real GDP (QoQ ann.)", "category": "Growth", "transform": "level", "units": "%"},
+    {"key": "industrial_production", "series": "INDPRO", "name": "Industrial Production", "category": "Growth", "transform": "yoy", "units": "%"},
+    {"key": "retail_sales", "series": "RSAFS", "name": "Retail Sales", "category": "Growth", "transform": "yoy", "units": "%"},
+    {"key": "retail_sales_mom", "series": "RSAFS", "name": "Retail Sales (MoM)", "category": "Growth", "transform": "mom", "units": "%"},
+    {"key": "housing_starts", "series": "HOUST", "name": "Housing Starts", "category": "Growth", "transform": "level", "units": "K"},
+    {"key": "sentiment", "series": "UMCSENT", "name": "UMich Sentiment", "category": "Growth", "transform": "level", "units": ""},
+    # Rates
+    {"key": "fed_funds", "series": "FEDFUNDS", "name": "Fed Funds Rate", "category": "Rates", "transform": "level", "units": "%"},
+    {"key": "us10y", "series": "DGS10", "name": "10Y Treasury", "category": "Rates", "transform": "level", "units": "%"},
+    {"key": "us2y", "series": "DGS2", "name": "2Y Treasury", "category": "Rates", "transform": "level", "units": "%"},
+    {"key": "t10y2y", "series": "T10Y2Y", "name": "10Y - 2Y", "category": "Rates", "transform": "level", "units": "%"},
+    {"key": "mortgage_30y", "series": "MORTGAGE30US", "name": "30Y Mortgage", "category": "Rates", "transform": "level", "units": "%"},
+    # Credit
+    {"key": "hy_spread", "series": "BAMLH0A1HYBB", "name": "HY Spread (BB)", "category": "Credit", "transform": "level", "units": "%"},
+    {"key": "ig_spread", "series": "BAMLC0A0CM", "name": "IG Corporate Spread", "category": "Credit", "transform": "level", "units": "%"},
+    {"key": "nfci", "series": "NFCI", "name": "Chicago Fed NFCI", "category": "Credit", "transform": "level", "units": ""},
+    # Money supply
+    {"key": "m2", "series": "M2SL", "name": "M2 Money Stock", "category": "Money", "transform": "yoy", "units": "%"},
+    {"key": "fed_balance_sheet", "series": "WALCL", "name": "Fed Balance Sheet", "category": "Money", "transform": "yoy", "units": "%"},
+    {"key": "reverse_repo", "series": "RRPONTSYD", "name": "Reverse Repo", "category": "Money", "transform": "level", "units": "$B"},
+]
+
+HISTORY_START = datetime.datetime(2000, 1, 1)
+HISTORY_FILE = CACHE_DIR / "fred_series.pkl"
+HISTORY_TTL = 6 * 3600
+# FRED revises recent prints: re-download this far back on each refresh
+REVISION_WINDOW = datetime.timedelta(days=120)
+
+ZSCORE_WINDOW = "1826D"      # 5 years
+PERCENTILE_WINDOW = "3652D"  # 10 years
+
+_lock = threading.Lock()
+_history = None  # (fetched_at, {series_id: Series})
+
+
+def fetch_series_history(series_ids=None, force=False):
+    """
+    Raw history of the catalogue's FRED series, kept on disk. Each refresh only
+    downloads the revision window since the oldest last print.
+    """
+    global _history
+    series_ids = sorted(set(series_ids or [item["series"] for item in CATALOGUE]))
+    with _lock:
+        if not force and _history is not None and time.time() - _history[0] < HISTORY_TTL \
+                and all(s in _history[1] for s in series_ids):
+            return {s: _history[1][s] for s in series_ids}
+
+        stored = pd.read_pickle(HISTORY_FILE) if HISTORY_FILE.exists() else {}
+        known = [s for s in series_ids if s in stored and not stored[s].empty]
+        new = [s for s in series_ids if s not in known]
+
+        batches = []
+        if known:
+            start = min(stored[s].index[-1] for s in known) - REVISION_WINDOW
+            batches.append((known, start))
+        if new:
+            batches.append((new, HISTORY_START))
+
+        for ids, start in batches:
+            try:
+                df = web.DataReader(ids, 'fred', start, datetime.datetime.now())
+            except Exception as e:
+                print(f"FRED catalogue fetch failed: {e}")
+                continue
+            for s in ids:
+                if s not in df.columns:
+                    continue
+                fresh = df[s].dropna()
+                if fresh.empty:
+                    continue
+                old = stored.get(s)
+                stored[s] = fresh if old is None else pd.concat([old[old.index < fresh.index[0]], fresh])
+
+        if stored:
+            HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+            pd.to_pickle(stored, HISTORY_FILE)
+        _history = (time.time(), stored)
+        return {s: stored[s] for s in series_ids if s in stored}
+
+
+def lag(series, offset):
+    """
+    Value of `series` as of (date - offset) for every date, by binary search on
+    the index. Works for any publication frequency, unlike a fixed row shift.
+    """
+    target = series.index - offset
+    pos = series.index.searchsorted(target, side="right") - 1
+    values = series.to_numpy()[np.clip(pos, 0, None)].astype(float)
+    values[pos < 0] = np.nan
+    return pd.Series(values, index=series.index)
+
+
+def transform(series, how):
+    """
+    Applies a catalogue transform to a whole series at once.
+    """
+    if how == "yoy":
+        return (series / lag(series, pd.DateOffset(years=1)) - 1) * 100
+    if how == "mom":
+        return (series / lag(series, pd.DateOffset(months=1)) - 1) * 100
+    if how == "ann":
+        return ((series / lag(series, pd.DateOffset(months=1))) ** 12 - 1) * 100
+    if how == "diff":
+        return series - lag(series, pd.DateOffset(months=1))
+    return series
+
+
+def zscore(series, window=ZSCORE_WINDOW):
+    rolling = series.rolling(window, min_periods=12)
+    return (series - rolling.mean()) / rolling.std()
+
+
+def percentile(series, window=PERCENTILE_WINDOW):
+    """
+    Rolling percentile rank (0-100) of each value within its trailing window.
+    """
+    return series.rolling(window, min_periods=12).rank(pct=True) * 100
+
+
+def derived_series(keys=None, force=False):
+    """
+    {key: transformed series} for the selected catalogue entries (all by default).
+    """
+    items = [item for item in CATALOGUE if keys is None or item["key"] in keys]
+    raw = fetch_series_history([item["series"] for item in items], force=force)
+    out = {}
+    for item in items:
+        series = raw.get(item["series"])
+        if series is None or series.empty:
+            continue
+        out[item["key"]] = transform(series, item["transform"]).dropna()
+    return out
+
+
+def indicator_table(keys=None, force=False):
+    """
+    Latest reading of each catalogue entry with its previous reading, 5-year
+    z-score and 10-year percentile.
+    """
+    derived = derived_series(keys, force=force)
+    rows = []
+    for item in CATALOGUE:
+        series = derived.get(item["key"])
+        if series is None or series.empty:
+            continue
+        z = zscore(series)
+        pct = percentile(series)
+        rows.append({
+            "Category": item["category"],
+            "Indicator": item["name"],
+            "Latest": series.iloc[-1],
+            "Previous": series.iloc[-2] if len(series) > 1 else np.nan,
+            "Units": item["units"],
+            "Z-Score (5Y)": z.iloc[-1],
+            "Percentile (10Y)": pct.iloc[-1],
+            "Date": series.index[-1].strftime('%Y-%m-%d'),
+        })
+    return pd.DataFrame(rows)
@@ -1,12 +1,15 @@
 import yfinance as yf
+from instrumentation import timed
 
-def analyze_fundamental(ticker_symbol):
+@timed("compute.analyze_fundamental")
+def analyze_fundamental(ticker_symbol, info=None):
     """
     Extracts fundamental data for a given ticker.
+    Pass an already fetched `.info` dict to skip the network call.
     """
     try:
-        stock = yf.Ticker(ticker_symbol)
-        info = stock.info
+        if info is None:
+            info = yf.Ticker(ticker_symbol).info
         
         # Valuation Metrics
         valuation = {
@@ -0,0 +1,307 @@
+"""
+Quarterly and annual financial statements (income, balance sheet, cash flow)
+per ticker, kept on disk in columnar form: one frame per frequency indexed by
+(ticker, period end) with one float column per line item.
+
+Ratio time series are computed for every stored ticker at once, and a sector's
+peer table is one groupby over that frame. Statements are only downloaded
+again once `.info` reports a quarter or fiscal year newer than the stored one.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import market_data
+import resilience
+from instrumentation import count, timed
+from tickers_data import TICKERS
+
+STORE_FILE = market_data.CACHE_DIR / "fundamental_statements.pkl"
+
+# yfinance Ticker attributes per frequency
+STATEMENTS = {
+    "quarterly": ["quarterly_income_stmt", "quarterly_balance_sheet", "quarterly_cashflow"],
+    "annual": ["income_stmt", "balance_sheet", "cashflow"],
+}
+# Line items kept from the statements (all others are dropped)
+LINE_ITEMS = [
+    "Total Revenue", "Gross Profit", "Operating Income", "Net Income",
+    "Total Assets", "Stockholders Equity", "Total Debt", "Cash And Cash Equivalents",
+    "Current Assets", "Current Liabilities", "Ordinary Shares Number",
+    "Operating Cash Flow", "Capital Expenditure", "Free Cash Flow",
+]
+# Flow items are summed over the last 4 quarters for trailing-twelve-month ratios
+FLOW_ITEMS = ["Total Revenue", "Gross Profit", "Operating Income", "Net Income",
+              "Operating Cash Flow", "Capital Expenditure", "Free Cash Flow"]
+PERIODS_PER_YEAR = {"quarterly": 4, "annual": 1}
+# Peers' .info and statements are fetched this many at a time
+PEER_WORKERS = 8
+
+RATIOS = {
+    "Gross Margin": "gross_margin",
+    "Operating Margin": "operating_margin",
+    "Net Margin": "net_margin",
+    "ROE": "roe",
+    "Debt/Equity": "debt_to_equity",
+    "Current Ratio": "current_ratio",
+    "FCF Yield": "fcf_yield",
+    "Revenue Growth (YoY)": "revenue_growth",
+}
+
+# Without filing dates in `.info`, look again this long after the last period end
+FILING_CHECK_DAYS = {"quarterly": 100, "annual": 400}
+# ...and look at most once per day, also when `.info` announces a filing the
+# last download did not include yet
+RECHECK_SECONDS = 24 * 3600
+
+_lock = threading.RLock()
+_store = None  # {"quarterly": frame, "annual": frame, "meta": {ticker: {...}}}
+
+
+def _empty_frame():
+    index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=["ticker", "period"])
+    return pd.DataFrame(columns=LINE_ITEMS, index=index, dtype=float)
+
+
+def _load():
+    global _store
+    if _store is None:
+        try:
+            _store = pd.read_pickle(STORE_FILE) if STORE_FILE.exists() else None
+        except Exception as e:
+            print(f"Could not read fundamentals store: {e}")
+        if _store is None:
+            _store = {"quarterly": _empty_frame(), "annual": _empty_frame(), "meta": {}}
+    return _store
+
+
+def _save():
+    STORE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STORE_FILE.with_suffix(".tmp")
+    pd.to_pickle(_store, tmp)
+    tmp.replace(STORE_FILE)
+
+
+def _columnar(ticker, statements):
+    """
+    yfinance statements (items x periods, newest first) -> rows per period end,
+    one float column per LINE_ITEMS entry, oldest first.
+    """
+    parts = [s for s in statements if s is not None and not s.empty]
+    if not parts:
+        return _empty_frame()
+    merged = pd.concat(parts)
+    merged = merged[~merged.index.duplicated()]
+    frame = merged.reindex(LINE_ITEMS).T.astype(float)
+    frame.index = pd.MultiIndex.from_product([[ticker], pd.to_datetime(frame.index).normalize()], names=["ticker", "period"])
+    return frame.sort_index()
+
+
+def _download(ticker):
+    t = yf.Ticker(ticker)
+    return {freq: _columnar(ticker, [getattr(t, attr) for attr in attrs]) for freq, attrs in STATEMENTS.items()}
+
+
+def _latest_filings(info):
+    # Period ends of the newest quarter and fiscal year the market knows about
+    latest = {}
+    for freq, key in (("quarterly", "mostRecentQuarter"), ("annual", "lastFiscalYearEnd")):
+        value = info.get(key)
+        if isinstance(value, (int, float)):
+            latest[freq] = pd.Timestamp(value, unit="s").normalize()
+    return latest
+
+
+def _needs_refresh(ticker, meta):
+    """
+    True when a filing newer than the stored statements should exist.
+    """
+    if meta is None:
+        return True
+    if time.time() - meta["checked"] <= RECHECK_SECONDS:
+        return False
+    # The last download found nothing: try again
+    if all(stored is None for stored in meta["latest"].values()):
+        return True
+    try:
+        info = market_data.get_info(ticker)
+    except Exception:
+        info = {}
+    filed = _latest_filings(info)
+    for freq in STATEMENTS:
+        stored = meta["latest"].get(freq)
+        if stored is None:
+            continue
+        if freq in filed:
+            if filed[freq] > stored:
+                return True
+        elif (pd.Timestamp.now() - stored).days > FILING_CHECK_DAYS[freq]:
+            return True
+    return False
+
+
+@timed("fetch.statements")
+def get_statements(ticker, frequency="quarterly", force=False):
+    """
+    Stored statements of one ticker (rows: period ends, oldest first),
+    downloading them first if missing or if a newer filing is out.
+    """
+    with _lock:
+        store = _load()
+        meta = store["meta"].get(ticker)
+    if force or _needs_refresh(ticker, meta):
+        count("cache_requests", cache="statements", result="miss")
+        refresh(ticker)
+    else:
+        count("cache_requests", cache="statements", result="hit")
+    with _lock:
+        frame = _store[frequency]
+        if ticker not in frame.index.get_level_values("ticker"):
+            return _empty_frame().droplevel("ticker")
+        return frame.xs(ticker, level="ticker")
+
+
+def refresh(ticker):
+    """
+    Downloads all statements of a ticker and replaces its rows in the store.
+    """
+    try:
+        fresh = resilience.call("yahoo", _download, ticker, valid=lambda f: not f["quarterly"].empty or not f["annual"].empty)
+    except Exception as e:
+        print(f"Statements for {ticker} unavailable: {e}")
+        # Remember the attempt so the next lookups don't download again right away
+        with _lock:
+            meta = _load()["meta"].setdefault(ticker, {"latest": {}})
+            meta["checked"] = time.time()
+            _save()
+        return
+    with _lock:
+        store = _load()
+        for freq, frame in fresh.items():
+            kept = store[freq][store[freq].index.get_level_values("ticker") != ticker]
+            store[freq] = pd.concat([kept, frame]).sort_index()
+        store["meta"][ticker] = {
+            "checked": time.time(),
+            "latest": {freq: frame.index.get_level_values("period").max() if not frame.empty else None
+                       for freq, frame in fresh.items()},
+        }
+        _save()
+
+
+def _period_end_prices(frame):
+    """
+    Close of each (ticker, period) row on or before its period end, from the
+    cached weekly bars (one batched download for all tickers).
+    """
+    params = market_data.FETCH_PARAMS["5Y"]
+    tickers = list(frame.index.get_level_values("ticker").unique())
+    bars = market_data.get_bars_batch(tickers, params["period"], params["interval"])
+    prices = np.full(len(frame), np.nan)
+    for ticker, positions in frame.groupby(level="ticker").indices.items():
+        df = bars.get(ticker)
+        if df is None or df.empty:
+            continue
+        close = df["Close"].dropna()
+        periods = frame.index.get_level_values("period")[positions]
+        if close.index.tz is not None:
+            periods = periods.tz_localize(close.index.tz)
+        pos = close.index.searchsorted(periods, side="right") - 1
+        prices[positions] = np.where(pos >= 0, close.to_numpy()[np.clip(pos, 0, None)], np.nan)
+    return prices
+
+
+@timed("compute.fundamental_ratios")
+def ratio_series(frame, frequency="quarterly", prices=None):
+    """
+    Ratio time series for every (ticker, period) row of a statements frame at
+    once. Quarterly flows are summed over the trailing four quarters for ROE
+    and FCF yield; growth compares with the same period a year earlier.
+    `prices` (close at each period end) defaults to the cached weekly bars.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=list(RATIOS.values()), index=frame.index, dtype=float)
+    per_year = PERIODS_PER_YEAR[frequency]
+    by_ticker = frame.groupby(level="ticker")
+    flows = frame[FLOW_ITEMS]
+    if per_year > 1:
+        flows = by_ticker[FLOW_ITEMS].rolling(per_year, min_periods=per_year).sum().droplevel(0)
+    equity = frame["Stockholders Equity"]
+    avg_equity = (equity + by_ticker["Stockholders Equity"].shift(1)) / 2
+    if prices is None:
+        prices = _period_end_prices(frame)
+    market_cap = frame["Ordinary Shares Number"] * prices
+    revenue = frame["Total Revenue"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = pd.DataFrame({
+            "gross_margin": frame["Gross Profit"] / revenue,
+            "operating_margin": frame["Operating Income"] / revenue,
+            "net_margin": frame["Net Income"] / revenue,
+            "roe": flows["Net Income"] / avg_equity.fillna(equity),
+            "debt_to_equity": frame["Total Debt"] / equity,
+            "current_ratio": frame["Current Assets"] / frame["Current Liabilities"],
+            "fcf_yield": flows["Free Cash Flow"] / market_cap,
+            "revenue_growth": revenue / by_ticker["Total Revenue"].shift(per_year) - 1,
+        }, index=frame.index)
+    # Negative equity or zero revenue make ratios meaningless rather than infinite
+    return ratios.replace([np.inf, -np.inf], np.nan)
+
+
+def ticker_ratios(ticker, frequency="quarterly"):
+    """
+    Ratio time series of one ticker, indexed by period end.
+    """
+    statements = get_statements(ticker, frequency)
+    frame = pd.concat({ticker: statements}, names=["ticker", "period"])
+    return ratio_series(frame, frequency).droplevel("ticker")
+
+
+def sector_peers(ticker, universe=None):
+    """
+    Symbols of `universe` (default: the curated stocks plus the most requested
+    symbols) reported in the same sector as `ticker`, `ticker` first.
+    """
+    sector = market_data.get_info(ticker).get("sector")
+    if universe is None:
+        universe = [s for s in TICKERS.values() if s != "CUSTOM" and not s.endswith("-USD") and not s.startswith("^")]
+        universe += [s for s in market_data.most_requested(20) if s not in universe]
+    candidates = [s for s in universe if s != ticker] if sector else []
+
+    def sector_of(symbol):
+        try:
+            return market_data.get_info(symbol).get("sector")
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=PEER_WORKERS, thread_name_prefix="peers") as pool:
+        sectors = list(pool.map(sector_of, candidates))
+    return [ticker] + [s for s, other in zip(candidates, sectors) if other == sector]
+
+
+@timed("compute.peer_table")
+def peer_table(tickers, frequency="quarterly"):
+    """
+    Latest ratios of every ticker side by side, with the peer median and each
+    ticker's percentile rank within the group, in one pass over the store.
+    Returns (table, ranks), both indexed by ticker.
+    """
+    with ThreadPoolExecutor(max_workers=PEER_WORKERS, thread_name_prefix="peers") as pool:
+        list(pool.map(lambda t: get_statements(t, frequency), tickers))
+    with _lock:
+        stored = _store[frequency]
+        frame = stored[stored.index.get_level_values("ticker").isin(tickers)]
+    ratios = ratio_series(frame, frequency)
+    if ratios.empty:
+        return ratios, ratios
+    # Latest period with data per ticker (ffill so a missing item uses its last print)
+    latest = ratios.groupby(level="ticker").ffill().groupby(level="ticker").tail(1).droplevel("period")
+    latest = latest.reindex([t for t in tickers if t in latest.index])
+    ranks = latest.rank(pct=True)
+    # Lower is better for leverage
+    ranks["debt_to_equity"] = latest["debt_to_equity"].rank(pct=True, ascending=False)
+    table = pd.concat([latest, latest.median().to_frame("Peer median").T])
+    return table, ranks
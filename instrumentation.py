@@ -0,0 +1,152 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Histogram buckets (seconds) shared by every span.
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Optional Prometheus textfile-collector target, rewritten after each rerun.
+METRICS_FILE = os.environ.get("STOCK_DASHBOARD_METRICS_FILE")
+
+# Spans of the rerun running in the current script thread (None outside a rerun,
+# e.g. in the cache warmer or background refreshes: those only feed histograms).
+_current = contextvars.ContextVar("current_rerun", default=None)
+_depth = contextvars.ContextVar("span_depth", default=0)
+
+_lock = threading.Lock()
+_histograms = defaultdict(lambda: {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+_counters = defaultdict(int)
+
+
+def start_rerun(page):
+    """
+    Begins collecting spans for a new script run of `page`.
+    """
+    rerun = {"page": page, "started": time.perf_counter(), "spans": []}
+    _current.set(rerun)
+    _depth.set(0)
+    return rerun
+
+
+def current_rerun():
+    return _current.get()
+
+
+def end_rerun():
+    """
+    Closes the current rerun, records its total duration and returns its spans.
+    """
+    rerun = _current.get()
+    if rerun is None:
+        return None
+    rerun["duration"] = time.perf_counter() - rerun["started"]
+    observe(f"rerun.{rerun['page']}", rerun["duration"])
+    if METRICS_FILE:
+        write_metrics(METRICS_FILE)
+    return rerun
+
+
+def observe(name, seconds):
+    with _lock:
+        h = _histograms[name]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h["buckets"][i] += 1
+        h["sum"] += seconds
+        h["count"] += 1
+
+
+def count(name, **labels):
+    """
+    Increments a counter, e.g. count("cache_requests", cache="bars", result="hit").
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += 1
+
+
+@contextmanager
+def span(name):
+    """
+    Times a block. Nested spans are shown indented in the debug waterfall.
+    """
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        _depth.reset(token)
+        observe(name, duration)
+        rerun = _current.get()
+        if rerun is not None:
+            rerun["spans"].append({
+                "name": name,
+                "start": start - rerun["started"],
+                "duration": duration,
+                "depth": depth,
+            })
+
+
+def timed(name):
+    """
+    Decorator form of span().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _metric_name(name):
+    return "stock_dashboard_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text():
+    """
+    All histograms and counters in the Prometheus text exposition format.
+    """
+    lines = []
+    with _lock:
+        histograms = {name: dict(h, buckets=list(h["buckets"])) for name, h in _histograms.items()}
+        counters = dict(_counters)
+
+    if histograms:
+        lines.append("# HELP stock_dashboard_span_seconds Duration of instrumented blocks.")
+        lines.append("# TYPE stock_dashboard_span_seconds histogram")
+    for name, h in sorted(histograms.items()):
+        for bound, value in zip(BUCKETS, h["buckets"]):
+            lines.append(f'stock_dashboard_span_seconds_bucket{{span="{name}",le="{bound}"}} {value}')
+        lines.append(f'stock_dashboard_span_seconds_bucket{{span="{name}",le="+Inf"}} {h["count"]}')
+        lines.append(f'stock_dashboard_span_seconds_sum{{span="{name}"}} {h["sum"]:.6f}')
+        lines.append(f'stock_dashboard_span_seconds_count{{span="{name}"}} {h["count"]}')
+
+    seen = set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = _metric_name(name) + "_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+def counter_snapshot():
+    with _lock:
+        return dict(_counters)
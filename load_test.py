@@ -0,0 +1,284 @@
+"""
+Concurrent-session load test for the Streamlit pages, on synthetic data.
+
+    python load_test.py --sessions 8 --reruns 25                  # app.py + Macro page
+    python load_test.py --pages app --sessions 32 --latency 0.05  # slow fake upstream
+    python load_test.py --out load.json                           # keep the numbers
+
+Every simulated session is a Streamlit AppTest that logs in and keeps changing
+ticker, timeframe and chart type (or the Macro page's horizon, category, curve
+fit...) like a user clicking around. All sessions run in this one process, so
+they share the market_data caches and the GIL exactly like sessions of a single
+Streamlit server do. Upstream APIs are replaced by synthetic_data's offline
+stand-in and the on-disk cache goes to a temporary directory.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent
+PAGES = {
+    "app": ROOT / "app.py",
+    "macro": ROOT / "pages" / "1_🌍_Macro_Economy.py",
+}
+PASSWORD = "load-test"
+
+
+def _choose(at, widget, label, rng, weights=None):
+    """
+    Picks a new value for the widget labelled `label` and reruns the page.
+    """
+    element = next(w for w in getattr(at, widget) if w.label == label)
+    options = [o for o in element.options if o != element.value]
+    if weights is not None:
+        w = [weights.get(o, 1.0) for o in options]
+        return element.set_value(rng.choices(options, weights=w)[0]).run()
+    return element.set_value(rng.choice(options)).run()
+
+
+def _app_action(at, rng):
+    from tickers_data import TICKERS
+
+    # Users mostly look at the first few popular assets
+    labels = [label for label, symbol in TICKERS.items() if symbol != "CUSTOM"]
+    popularity = {label: 1.0 / (rank + 1) for rank, label in enumerate(labels)}
+    popularity.update({label: 0.0 for label, symbol in TICKERS.items() if symbol == "CUSTOM"})
+
+    kind = rng.choices(["timeframe", "chart", "ticker"], weights=[0.4, 0.3, 0.3])[0]
+    if kind == "ticker":
+        return _choose(at, "selectbox", "Select Asset (Popular)", rng, weights=popularity)
+    if kind == "timeframe":
+        return _choose(at, "selectbox", "Timeframe", rng)
+    return _choose(at, "selectbox", "Chart Type", rng)
+
+
+def _macro_action(at, rng):
+    kind = rng.choices(["horizon", "category", "method", "years", "rerun"], weights=[0.35, 0.2, 0.15, 0.1, 0.2])[0]
+    if kind == "horizon":
+        return _choose(at, "radio", "Horizon", rng)
+    if kind == "category":
+        return _choose(at, "radio", "Category", rng)
+    if kind == "method":
+        return _choose(at, "selectbox", "Curve fit", rng)
+    if kind == "years":
+        slider = next(s for s in at.slider if s.label == "Years")
+        return slider.set_value(rng.randint(slider.min, slider.max)).run()
+    return at.run()
+
+
+ACTIONS = {"app": _app_action, "macro": _macro_action}
+
+
+def _share_app_test_globals():
+    """
+    AppTest swaps process globals (runtime, secrets, config) around each run
+    and compiles the page again every time, which is only safe one test at a
+    time. Pin them so concurrent sessions see one shared runtime, one set of
+    secrets and one script cache, like a real server.
+    """
+    import streamlit as st
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+
+    secrets = Secrets()
+    secrets._secrets = {"passwords": {"loadtest": PASSWORD}, "admins": []}
+    st.secrets = secrets
+    config.set_option("global.appTest", True)
+    # Deprecation / bare-mode warnings would repeat on every rerun of every session
+    set_log_level("error")
+
+    last = {}
+
+    def instance(cls):
+        runtime = cls._instance
+        if runtime is not None:
+            last["runtime"] = runtime
+            return runtime
+        if "runtime" in last:
+            return last["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in last)
+
+    # ast.parse is not thread-safe on some CPython versions
+    compile_bytecode = ScriptCache.get_bytecode
+    compiled = {}
+    compile_lock = threading.Lock()
+
+    def get_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = compile_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = get_bytecode
+
+
+def run_session(page, reruns, think, seed, timeout):
+    """
+    One simulated user: logs in, then performs `reruns` widget changes.
+    Returns {"page", "first", "latencies", "errors"}.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(PAGES[page]), default_timeout=timeout)
+    at.session_state["password_correct"] = True
+    at.session_state["user"] = "loadtest"
+    at.session_state["welcome_seen"] = True
+
+    result = {"page": page, "first": None, "latencies": [], "errors": []}
+    start = time.perf_counter()
+    at.run()
+    result["first"] = time.perf_counter() - start
+    if at.exception:
+        result["errors"].append(at.exception[0].message)
+
+    for _ in range(reruns):
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+        start = time.perf_counter()
+        try:
+            ACTIONS[page](at, rng)
+        except Exception as e:
+            result["errors"].append(f"{type(e).__name__}: {e}")
+            continue
+        result["latencies"].append(time.perf_counter() - start)
+        if at.exception:
+            result["errors"].append(at.exception[0].message)
+    return result
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def _summary(latencies):
+    if not latencies:
+        return {"count": 0}
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+def run(pages, sessions, reruns, think, latency, timeout, worker, seed):
+    from synthetic_data import install_offline_stand_in
+
+    install_offline_stand_in(latency=latency)
+    _share_app_test_globals()
+    if worker and "macro" in pages:
+        # Production runs macro_worker.py next to the app; start from its snapshot
+        from macro_worker import build_snapshot, write_snapshot
+        write_snapshot(build_snapshot())
+
+    baseline_rss = _peak_rss_mb()
+    plan = [(pages[i % len(pages)], seed + i) for i in range(sessions)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+        futures = [pool.submit(run_session, page, reruns, think, s, timeout) for page, s in plan]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - started
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sessions": sessions,
+            "reruns_per_session": reruns,
+            "think_seconds": think,
+            "upstream_latency_seconds": latency,
+            "macro_worker_snapshot": worker,
+        },
+        "wall_seconds": wall,
+        "reruns": sum(len(r["latencies"]) for r in results),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "pages": {},
+    }
+    report["throughput_rps"] = report["reruns"] / wall if wall else 0.0
+    for page in pages:
+        page_results = [r for r in results if r["page"] == page]
+        stats = _summary([x for r in page_results for x in r["latencies"]])
+        stats["first_run"] = _summary([r["first"] for r in page_results])
+        stats["errors"] = [e for r in page_results for e in r["errors"]]
+        report["pages"][page] = stats
+    return report
+
+
+def print_report(report):
+    print(f"{'page':<8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'first p50':>10} {'errors':>7}")
+    for page, s in report["pages"].items():
+        if not s["count"]:
+            print(f"{page:<8} {0:>7} {'-':>9} {'-':>9} {'-':>9} {'-':>9} {'-':>10} {len(s['errors']):>7}")
+            continue
+        print(
+            f"{page:<8} {s['count']:>7} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}"
+            f" {s['max_ms']:>9.1f} {s['first_run'].get('p50_ms', 0):>10.1f} {len(s['errors']):>7}"
+        )
+    print(
+        f"{report['reruns']} reruns in {report['wall_seconds']:.1f}s = {report['throughput_rps']:.1f} reruns/s, "
+        f"peak RSS {report['peak_rss_mb']:.0f} MB (before sessions: {report['baseline_rss_mb']:.0f} MB)"
+    )
+    for page, s in report["pages"].items():
+        for error in sorted(set(s["errors"]))[:5]:
+            print(f"  {page} error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit pages with concurrent simulated sessions.")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--reruns", type=int, default=20, help="widget changes per session")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between actions (s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="added to every fake upstream call (s)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-rerun timeout (s)")
+    parser.add_argument("--no-worker", dest="worker", action="store_false",
+                        help="Macro page builds its snapshot live instead of reading the worker's")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    # Keep synthetic histories and snapshots out of the real .cache
+    os.environ.setdefault("STOCK_DASHBOARD_CACHE_DIR", tempfile.mkdtemp(prefix="stock-dashboard-load-"))
+    # Sessions must not rewrite the production metrics file
+    os.environ.pop("STOCK_DASHBOARD_METRICS_FILE", None)
+    sys.path.insert(0, str(ROOT))
+
+    report = run(args.pages, args.sessions, args.reruns, args.think, args.latency, args.timeout, args.worker, args.seed)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    if any(s["errors"] for s in report["pages"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,78 +4,38 @@ import requests
 import streamlit as st
 import pandas_datareader.data as web
 import datetime
+import market_data
+from resilience import resilient
+from economic_catalogue import derived_series, indicator_table
+from sector_rotation import HORIZONS, horizon_returns, relative_strength, rrg_series
+from yield_curve import fetch_yield_history, fit_curves
 
+@resilient("fred", ttl=3600, default=pd.DataFrame)
 def fetch_yield_curve():
     """
     Fetches Custom US Treasury Yields (4M, 8M, 1Y, 3Y, 5Y) using FRED data.
-    4M and 8M are interpolated.
+    4M and 8M are interpolated linearly on the full tenor grid (see yield_curve.py).
     Returns: DataFrame sorted by maturity.
     """
     try:
-        # FRED Series IDs
-        series_ids = ['DGS3MO', 'DGS6MO', 'DGS1', 'DGS3', 'DGS5']
-        
-        start = datetime.datetime.now() - datetime.timedelta(days=45) # Get enough history for 1M ago
-        end = datetime.datetime.now()
-        
-        df = web.DataReader(series_ids, 'fred', start, end)
-        
-        if df.empty:
+        history = fetch_yield_history()
+        if history.empty:
             return pd.DataFrame()
-            
-        latest = df.iloc[-1]
-        
-        # Calculate 1 Month Ago (approx 22 trading days)
-        if len(df) > 22:
-            prev = df.iloc[-22]
-        else:
-            prev = df.iloc[0]
-            
+
+        # Only the last couple of months are needed for "now vs 1 month ago"
+        recent = history.loc[history.index[-1] - pd.DateOffset(months=2):]
+        maturities = [4/12, 8/12, 1, 3, 5]
+        curves = fit_curves(recent, maturities, method="Linear")
+
+        latest = curves.iloc[-1]
+        # Calendar month, not a fixed row count
+        prev = curves.asof(curves.index[-1] - pd.DateOffset(months=1))
+
+        names = ["4 Month", "8 Month", "1 Year", "3 Year", "5 Year"]
         data = []
-        
-        # Helper for interpolation
-        def interpolate(val1, val2, weight1=0.5):
-            return val1 * weight1 + val2 * (1 - weight1)
-            
-        # --- CALCULATE CURRENT YIELDS ---
-        y3m = latest['DGS3MO']
-        y6m = latest['DGS6MO']
-        y1y = latest['DGS1']
-        y3y = latest['DGS3']
-        y5y = latest['DGS5']
-        
-        # Interpolations
-        # 4 Month: roughly 1/3 way from 3M to 6M? Or simple average?
-        # 3M (90d) -> 4M (120d) -> 6M (180d). 4M is 30d from 3M, 60d from 6M.
-        # It's closer to 3M. Weight 3M: 2/3, 6M: 1/3?
-        # Linear: y = y1 + (x - x1) * (y2 - y1) / (x2 - x1)
-        # x1=3, x2=6, x=4. (4-3)/(6-3) = 1/3. So 1/3 of the way from 3M to 6M.
-        y4m = y3m + (1/3) * (y6m - y3m)
-        
-        # 8 Month: between 6M and 1Y (12M).
-        # x1=6, x2=12, x=8. (8-6)/(12-6) = 2/6 = 1/3.
-        y8m = y6m + (1/3) * (y1y - y6m)
-        
-        # --- CALCULATE PREVIOUS YIELDS ---
-        p3m = prev['DGS3MO']
-        p6m = prev['DGS6MO']
-        p1y = prev['DGS1']
-        p3y = prev['DGS3']
-        p5y = prev['DGS5']
-        
-        p4m = p3m + (1/3) * (p6m - p3m)
-        p8m = p6m + (1/3) * (p1y - p6m)
-        
-        # Store in list
-        obs = [
-            ("4 Month", y4m, p4m, 4/12),
-            ("8 Month", y8m, p8m, 8/12),
-            ("1 Year", y1y, p1y, 1),
-            ("3 Year", y3y, p3y, 3),
-            ("5 Year", y5y, p5y, 5)
-        ]
-        
-        for name, val, prev_val, sort_key in obs:
+        for name, label, sort_key in zip(names, curves.columns, maturities):
+            val = latest[label]
+            prev_val = prev[label]
             data.append({
                 "Maturity": name,
                 "Yield": float(val),
@@ -90,6 +50,7 @@ def fetch_yield_curve():
         print(f"Error fetching yields (FRED): {e}")
         return pd.DataFrame()
 
+@resilient("fred", ttl=6 * 3600)
 def fetch_high_yield_spread():
     """
     Fetches ICE BofA US High Yield Index Option-Adjusted Spread (BAMLH0A1HYBB).
@@ -114,6 +75,7 @@ def fetch_high_yield_spread():
         print(f"Error fetching HY Spread: {e}")
     return None
 
+@resilient("alternative.me", ttl=30 * 60)
 def fetch_crypto_fear_greed():
     """
     Fetches Crypto Fear & Greed Index from alternative.me API.
@@ -133,6 +95,7 @@ def fetch_crypto_fear_greed():
         print(f"Error fetching Crypto F&G: {e}")
     return None
 
+@resilient("yahoo", ttl=5 * 60)
 def fetch_market_fear_vix():
     """
     Fetches VIX (CBOE Volatility Index) via yfinance.
@@ -149,36 +112,29 @@ def fetch_market_fear_vix():
         print(f"Error fetching VIX: {e}")
     return None
 
+ECONOMIC_FALLBACK = {
+    "cpi_yoy": 2.6, 
+    "unemployment": 4.2, 
+    "gdp_growth": 2.8,
+    "source": "Estimate (FRED API Unavailable)"
+}
+
+@resilient("fred", ttl=6 * 3600, default=lambda: dict(ECONOMIC_FALLBACK),
+           valid=lambda data: data["source"] == "FRED (Live)")
 def fetch_economic_data():
     """
-    Fetches CPI, Unemployment, and GDP using pandas_datareader (FRED).
+    CPI YoY, Unemployment and GDP growth from the FRED catalogue.
     Fallbacks to recent known values.
     """
-    fallback_data = {
-        "cpi_yoy": 2.6, 
-        "unemployment": 4.2, 
-        "gdp_growth": 2.8,
-        "source": "Estimate (FRED API Unavailable)"
-    }
-    
-    start = datetime.datetime.now() - datetime.timedelta(days=365*2)
-    end = datetime.datetime.now()
-
     try:
-        cpi = web.DataReader('CPIAUCSL', 'fred', start, end)
-        unrate = web.DataReader('UNRATE', 'fred', start, end)
+        # Derived from the locally cached catalogue history (economic_catalogue.py)
+        derived = derived_series(["cpi", "unemployment", "gdp_growth"])
         
-        # GDP: Real Gross Domestic Product, Percent Change from Preceding Period, Seasonally Adjusted Annual Rate
-        gdp = web.DataReader('A191RL1Q225SBEA', 'fred', start, end)
-        
-        latest_cpi = cpi['CPIAUCSL'].iloc[-1]
-        year_ago_cpi = cpi['CPIAUCSL'].iloc[-13] 
-        cpi_yoy = ((latest_cpi - year_ago_cpi) / year_ago_cpi) * 100
-        
-        latest_unrate = unrate['UNRATE'].iloc[-1]
+        cpi_yoy = derived["cpi"].iloc[-1]
+        latest_unrate = derived["unemployment"].iloc[-1]
         
         # Value is already annualized % change
-        gdp_growth = gdp['A191RL1Q225SBEA'].iloc[-1]
+        gdp_growth = derived["gdp_growth"].iloc[-1]
         
         return {
             "cpi_yoy": round(cpi_yoy, 2),
@@ -189,8 +145,9 @@ def fetch_economic_data():
         
     except Exception as e:
         print(f"FRED Fetch failed: {e}. Using fallback.")
-        return fallback_data
+        return dict(ECONOMIC_FALLBACK)
 
+@resilient("yahoo", ttl=5 * 60, default=dict)
 def fetch_basic_market_data():
     """
     Fetches DXY (Dollar Index) and Gold Futures.
@@ -224,43 +181,86 @@ def fetch_basic_market_data():
         
     return results
 
-def fetch_sector_performance():
+SECTORS = {
+    "XLE": "Energy",
+    "XLF": "Financials",
+    "XLK": "Technology",
+    "XLV": "Health Care",
+    "XLP": "Cons. Staples",
+    "XLY": "Cons. Discret.",
+    "XLI": "Industrials",
+    "XLC": "Comm. Svcs",
+    "XLB": "Materials",
+    "XLRE": "Real Estate",
+    "XLU": "Utilities"
+}
+SECTOR_BENCHMARK = "SPY"
+
+def fetch_sector_history():
     """
-    Fetches major US Sector ETFs and calculates 1D % Change.
+    Daily closes of the sector ETFs plus SPY over 2 years, from the shared bar
+    cache (one batched download when stale). Every horizon is derived from it.
+    """
+    symbols = list(SECTORS) + [SECTOR_BENCHMARK]
+    try:
+        bars = market_data.get_bars_batch(symbols, "2y", "1d")
+        if bars:
+            closes = pd.concat({symbol: df["Close"] for symbol, df in bars.items()}, axis=1)
+            return closes[[s for s in symbols if s in closes.columns]]
+    except Exception as e:
+        print(f"Error fetching sector history: {e}")
+    return pd.DataFrame()
+
+# The sector fetchers only read bars through market_data, which already runs
+# them through the breaker: wrapping them in @resilient too would block an
+# upstream thread on another upstream call and count each failure twice.
+def fetch_sector_analytics():
+    """
+    Multi-horizon sector returns (%), relative strength vs SPY and RRG series.
+    """
+    closes = fetch_sector_history()
+    if closes.empty or SECTOR_BENCHMARK not in closes.columns:
+        return None
+
+    try:
+        returns = horizon_returns(closes)
+        return {
+            "returns": returns.rename(columns=SECTORS),
+            "relative": relative_strength(returns, SECTOR_BENCHMARK).rename(columns=SECTORS),
+            "rrg": rrg_series(closes, SECTOR_BENCHMARK).replace({"Symbol": SECTORS}),
+        }
+    except Exception as e:
+        print(f"Error computing sector analytics: {e}")
+    return None
+
+def fetch_sector_performance(horizon="1D"):
+    """
+    Major US Sector ETFs % Change over `horizon` (1D by default).
     """
-    sectors = {
-        "XLE": "Energy",
-        "XLF": "Financials",
-        "XLK": "Technology",
-        "XLV": "Health Care",
-        "XLP": "Cons. Staples",
-        "XLY": "Cons. Discret.",
-        "XLI": "Industrials",
-        "XLC": "Comm. Svcs",
-        "XLB": "Materials",
-        "XLRE": "Real Estate",
-        "XLU": "Utilities"
-    }
-    
     data = []
     try:
-        ticker_str = " ".join(sectors.keys())
-        df = yf.download(ticker_str, period="2d", progress=False)['Close']
-        
-        if not df.empty:
-             for symbol, name in sectors.items():
-                if symbol in df.columns:
-                    series = df[symbol].dropna()
-                    if len(series) > 0:
-                        val = series.iloc[-1]
-                        prev = series.iloc[-2] if len(series) > 1 else val
-                        pct_change = ((val - prev) / prev) * 100
-                        
-                        data.append({
-                            "Sector": name,
-                            "Change (%)": pct_change
-                        })
+        closes = fetch_sector_history()
+        if not closes.empty:
+            returns = horizon_returns(closes[[s for s in SECTORS if s in closes.columns]], {horizon: HORIZONS[horizon]})
+            for symbol, pct_change in returns.iloc[0].dropna().items():
+                data.append({
+                    "Sector": SECTORS[symbol],
+                    "Change (%)": pct_change
+                })
     except Exception as e:
         print(f"Error fetching sectors: {e}")
-        
+
+    if not data:
+        return pd.DataFrame(columns=["Sector", "Change (%)"])
     return pd.DataFrame(data).sort_values("Change (%)", ascending=False)
+
+@resilient("fred", ttl=6 * 3600, default=pd.DataFrame)
+def fetch_indicator_table():
+    """
+    Latest reading, z-score and percentile of every catalogue indicator.
+    """
+    try:
+        return indicator_table()
+    except Exception as e:
+        print(f"Error building indicator table: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,186 @@
+"""
+Offline worker that precomputes the Macro Economy page.
+
+    python macro_worker.py              # refresh every 15 minutes
+    python macro_worker.py --once       # write a single snapshot and exit
+"""
+import argparse
+import datetime
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+from macro_data import (
+    fetch_basic_market_data,
+    fetch_crypto_fear_greed,
+    fetch_economic_data,
+    fetch_high_yield_spread,
+    fetch_indicator_table,
+    fetch_market_fear_vix,
+    fetch_sector_analytics,
+    fetch_sector_performance,
+    fetch_yield_curve,
+)
+from market_data import CACHE_DIR
+from sector_rotation import HORIZONS
+from yield_curve import METHODS, animation_frames, fetch_yield_history, fit_curves, spread_series
+
+SNAPSHOT_DIR = CACHE_DIR / "macro_snapshots"
+# Bump when the payload layout changes; older files are then ignored.
+SNAPSHOT_VERSION = 3
+DEFAULT_INTERVAL = 15 * 60
+KEEP_SNAPSHOTS = 20
+# The page warns when the newest snapshot is older than this (worker stopped)
+STALE_AFTER = 3 * DEFAULT_INTERVAL
+
+# Inputs the yield history section opens with; precomputed in every snapshot
+YIELD_HISTORY_METHOD = METHODS[0]
+YIELD_HISTORY_MATURITIES = (0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30)
+YIELD_HISTORY_YEARS = 3
+
+_loaded = {}  # path -> payload, so reruns don't unpickle the same file again
+_loaded_lock = threading.Lock()
+_live = {"payload": None}  # built in-process when no worker is writing snapshots
+_live_lock = threading.Lock()
+
+
+# Fetchers whose staleness is reported on the page
+STATUS_SOURCES = {
+    "VIX": fetch_market_fear_vix,
+    "Fear & Greed": fetch_crypto_fear_greed,
+    "Economic data": fetch_economic_data,
+    "Yield curve": fetch_yield_curve,
+    "HY spread": fetch_high_yield_spread,
+    "DXY / Gold": fetch_basic_market_data,
+}
+
+
+def build_yield_history(method=YIELD_HISTORY_METHOD, maturities=YIELD_HISTORY_MATURITIES,
+                        years=YIELD_HISTORY_YEARS):
+    """
+    Weekly curve frames and 10Y spreads over the last `years`, or None without history.
+    """
+    history = fetch_yield_history()
+    if history.empty:
+        return None
+    window = history.loc[history.index[-1] - pd.DateOffset(years=years):]
+    curves = fit_curves(window, list(maturities), method=method)
+    return {
+        "method": method,
+        "maturities": tuple(maturities),
+        "years": years,
+        "frames": animation_frames(curves),
+        "spreads": pd.concat([spread_series(window, 10, 2), spread_series(window, 10, 0.25)], axis=1),
+    }
+
+
+def build_snapshot():
+    """
+    Runs every Macro page fetch once and returns the page payload.
+    """
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc),
+        "vix": fetch_market_fear_vix(),
+        "fear_greed": fetch_crypto_fear_greed(),
+        "economic": fetch_economic_data(),
+        "indicators": fetch_indicator_table(),
+        "yield_curve": fetch_yield_curve(),
+        "hy_spread": fetch_high_yield_spread(),
+        "market": fetch_basic_market_data(),
+        "sectors": {horizon: fetch_sector_performance(horizon) for horizon in HORIZONS},
+        "sector_analytics": fetch_sector_analytics(),
+        "yield_history": build_yield_history(),
+    }
+    # Sources that served a last-good value because the upstream is slow or down
+    payload["stale"] = [name for name, fn in STATUS_SOURCES.items() if fn.status()["stale"]]
+    return payload
+
+
+def write_snapshot(payload):
+    """
+    Writes the payload atomically as macro_v<version>_<timestamp>.pkl and prunes old files.
+    """
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = payload["created_at"].strftime("%Y%m%dT%H%M%S")
+    path = SNAPSHOT_DIR / f"macro_v{SNAPSHOT_VERSION}_{stamp}.pkl"
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    for old in sorted(SNAPSHOT_DIR.glob(f"macro_v{SNAPSHOT_VERSION}_*.pkl"))[:-KEEP_SNAPSHOTS]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def latest_snapshot_path():
+    files = sorted(SNAPSHOT_DIR.glob(f"macro_v{SNAPSHOT_VERSION}_*.pkl"))
+    return files[-1] if files else None
+
+
+def load_latest_snapshot():
+    """
+    Returns the newest snapshot payload written by the worker, or None.
+    """
+    path = latest_snapshot_path()
+    if path is None:
+        return None
+    with _loaded_lock:
+        if path not in _loaded:
+            try:
+                with open(path, "rb") as f:
+                    payload = pickle.load(f)
+            except Exception as e:
+                print(f"Could not read macro snapshot {path.name}: {e}")
+                return None
+            if payload.get("version") != SNAPSHOT_VERSION:
+                return None
+            _loaded.clear()
+            _loaded[path] = payload
+        return _loaded[path]
+
+
+def get_snapshot():
+    """
+    The worker's newest snapshot or, without a worker, a live build that is
+    reused for DEFAULT_INTERVAL so reruns and sessions don't rebuild it.
+    """
+    snapshot = load_latest_snapshot()
+    if snapshot is not None:
+        return snapshot
+    with _live_lock:
+        payload = _live["payload"]
+        if payload is None or snapshot_age(payload) > DEFAULT_INTERVAL:
+            payload = build_snapshot()
+            _live["payload"] = payload
+        return payload
+
+
+def snapshot_age(payload):
+    """
+    Seconds since the payload was built.
+    """
+    return (datetime.datetime.now(datetime.timezone.utc) - payload["created_at"]).total_seconds()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the Macro Economy page payload.")
+    parser.add_argument("--once", action="store_true", help="write one snapshot and exit")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="seconds between snapshots")
+    args = parser.parse_args()
+
+    while True:
+        started = time.time()
+        path = write_snapshot(build_snapshot())
+        print(f"Wrote {path.name} in {time.time() - started:.1f}s")
+        if args.once:
+            break
+        time.sleep(max(0, args.interval - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Trading sessions per exchange (regular hours, holidays, early closes) and
+calendar-aware cuts of cached bars for the dashboard's timeframes.
+
+Session open/close times are precomputed once per exchange and year as sorted
+UTC nanosecond arrays, so finding the session of a timestamp, or the point N
+trading hours before it, is a binary search. Views are then cut from the bar
+index with one `searchsorted`: O(log n) however long the cached series is.
+"""
+import datetime
+import functools
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    EasterMonday,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        # A Saturday New Year's Day is not made up on the Friday before
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+class BMEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        Holiday("New Year's Day", month=1, day=1),
+        GoodFriday,
+        EasterMonday,
+        Holiday("Labour Day", month=5, day=1),
+        Holiday("Christmas", month=12, day=25),
+        Holiday("St. Stephen's Day", month=12, day=26),
+    ]
+
+
+def _nyse_early_closes(year):
+    thanksgiving = USThanksgivingDay.dates(f"{year}-01-01", f"{year}-12-31")[0]
+    return [
+        datetime.date(year, 7, 3),
+        (thanksgiving + pd.Timedelta(days=1)).date(),
+        datetime.date(year, 12, 24),
+    ]
+
+
+def _bme_early_closes(year):
+    return [datetime.date(year, 12, 24), datetime.date(year, 12, 31)]
+
+
+# exchange -> timezone, regular open/close, early close, holiday calendar,
+# early-close dates per year. CRYPTO trades around the clock.
+EXCHANGES = {
+    "XNYS": {
+        "tz": "America/New_York",
+        "open": datetime.time(9, 30),
+        "close": datetime.time(16, 0),
+        "early_close": datetime.time(13, 0),
+        "holidays": NYSEHolidayCalendar,
+        "early_closes": _nyse_early_closes,
+    },
+    "XMAD": {
+        "tz": "Europe/Madrid",
+        "open": datetime.time(9, 0),
+        "close": datetime.time(17, 30),
+        "early_close": datetime.time(14, 0),
+        "holidays": BMEHolidayCalendar,
+        "early_closes": _bme_early_closes,
+    },
+    "CRYPTO": {"tz": "UTC"},
+}
+
+# Timeframes shown as the last N trading hours / sessions of intraday bars
+TRADING_HOURS_VIEWS = {"1H": 1, "4H": 4}
+SESSION_VIEWS = {"1D": 1, "5D": 5}
+# Timeframes shown as calendar time back from the last bar (None: since Jan 1)
+CALENDAR_VIEWS = {
+    "1M": pd.DateOffset(months=1),
+    "6M": pd.DateOffset(months=6),
+    "YTD": None,
+    "1Y": pd.DateOffset(years=1),
+    "5Y": pd.DateOffset(years=5),
+}
+
+
+def exchange_for(symbol):
+    """
+    Exchange code for a symbol: crypto pairs, Madrid listings and the IBEX,
+    and US for everything else (indices included).
+    """
+    if symbol.endswith("-USD"):
+        return "CRYPTO"
+    if symbol.endswith(".MC") or symbol == "^IBEX":
+        return "XMAD"
+    return "XNYS"
+
+
+def timezone(exchange):
+    return ZoneInfo(EXCHANGES[exchange]["tz"])
+
+
+def _time_delta(t):
+    return np.timedelta64(t.hour * 60 + t.minute, "m").astype("timedelta64[ns]")
+
+
+@functools.lru_cache(maxsize=64)
+def sessions(exchange, year):
+    """
+    (opens, closes) of every regular session of `year` as sorted int64 UTC
+    nanoseconds. Computed once per exchange and year.
+    """
+    spec = EXCHANGES[exchange]
+    days = pd.bdate_range(f"{year}-01-01", f"{year}-12-31")
+    holidays = spec["holidays"]().holidays(f"{year}-01-01", f"{year}-12-31")
+    days = days[~days.isin(holidays)]
+
+    early = days.isin(pd.DatetimeIndex(spec["early_closes"](year)))
+    closes_at = np.where(early, _time_delta(spec["early_close"]), _time_delta(spec["close"]))
+
+    opens = (days + _time_delta(spec["open"])).tz_localize(spec["tz"]).tz_convert("UTC")
+    closes = (days + pd.TimedeltaIndex(closes_at)).tz_localize(spec["tz"]).tz_convert("UTC")
+    return opens.asi8, closes.asi8
+
+
+def _sessions_around(exchange, ts):
+    # Sessions of the timestamp's year and the one before, for look-backs over Jan 1
+    year = pd.Timestamp(ts, tz="UTC").year
+    prev_opens, prev_closes = sessions(exchange, year - 1)
+    opens, closes = sessions(exchange, year)
+    return np.concatenate([prev_opens, opens]), np.concatenate([prev_closes, closes])
+
+
+def is_open(symbol, now=None):
+    """
+    True if `symbol`'s exchange is in a regular session at `now` (UTC by default).
+    """
+    exchange = exchange_for(symbol)
+    if exchange == "CRYPTO":
+        return True
+    now = pd.Timestamp(now or datetime.datetime.now(datetime.timezone.utc)).value
+    opens, closes = _sessions_around(exchange, now)
+    i = np.searchsorted(opens, now, side="right") - 1
+    return i >= 0 and now < closes[i]
+
+
+def sessions_back(exchange, ts, n):
+    """
+    UTC ns open of the n-th session counting back from the one containing (or
+    last before) `ts`: n=1 is that session's open.
+    """
+    opens, _ = _sessions_around(exchange, ts)
+    i = np.searchsorted(opens, ts, side="right") - 1
+    return int(opens[max(i - (n - 1), 0)])
+
+
+def trading_time_back(exchange, ts, duration):
+    """
+    UTC ns point such that exactly `duration` (ns) of regular trading time lies
+    between it and `ts`, skipping nights, weekends and holidays.
+    """
+    if exchange == "CRYPTO":
+        return ts - duration
+    opens, closes = _sessions_around(exchange, ts)
+    i = np.searchsorted(opens, ts, side="right") - 1
+    end = min(ts, closes[i]) if i >= 0 else ts
+    while i >= 0:
+        available = end - opens[i]
+        if duration <= available:
+            return int(end - duration)
+        duration -= max(available, 0)
+        i -= 1
+        if i >= 0:
+            end = closes[i]
+    return int(opens[0])
+
+
+def _to_utc_ns(ts, exchange):
+    # Naive indexes (daily yfinance bars, synthetic data) are exchange-local time
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(timezone(exchange), ambiguous=True, nonexistent="shift_forward")
+    return ts.tz_convert("UTC").value
+
+
+def _from_utc_ns(value, exchange, index):
+    # The cut point expressed like the index, so searchsorted compares like with like
+    ts = pd.Timestamp(value, tz="UTC").as_unit(index.unit)
+    if index.tz is None:
+        return ts.tz_convert(timezone(exchange)).tz_localize(None)
+    return ts.tz_convert(index.tz)
+
+
+def view_start(index, symbol, timeframe):
+    """
+    First timestamp of the `timeframe` view of a bar index ending at its last
+    bar, expressed in the index's own timezone. None means the whole index.
+    """
+    if timeframe not in TRADING_HOURS_VIEWS and timeframe not in SESSION_VIEWS and timeframe not in CALENDAR_VIEWS:
+        return None
+    exchange = exchange_for(symbol)
+    last = _to_utc_ns(index[-1], exchange)
+
+    # 24/7 markets have no sessions: their "days" are 24 hours of trading time
+    if timeframe in TRADING_HOURS_VIEWS or (exchange == "CRYPTO" and timeframe in SESSION_VIEWS):
+        hours = TRADING_HOURS_VIEWS.get(timeframe) or 24 * SESSION_VIEWS[timeframe]
+        duration = pd.Timedelta(hours=hours).value
+        # The last bar itself covers one interval of the window
+        step = (index[-1] - index[-2]).value if len(index) > 1 else 0
+        start = trading_time_back(exchange, last, duration - min(step, duration))
+    elif timeframe in SESSION_VIEWS:
+        start = sessions_back(exchange, last, SESSION_VIEWS[timeframe])
+    else:
+        local = pd.Timestamp(last, tz="UTC").tz_convert(timezone(exchange))
+        offset = CALENDAR_VIEWS[timeframe]
+        if offset is None:
+            local = local.normalize().replace(month=1, day=1)
+        else:
+            local = (local - offset).normalize()
+        start = local.tz_convert("UTC").value
+    return _from_utc_ns(start, exchange, index)
+
+
+def slice_view(frame, symbol, timeframe):
+    """
+    The rows of `frame` (sorted DatetimeIndex) that the `timeframe` view shows:
+    trading hours for 1H/4H, whole sessions for 1D/5D (24h days for crypto),
+    calendar time for 1M/6M/YTD/1Y/5Y and everything for Max. One binary search;
+    returns a positional slice of `frame`, not a copy.
+    """
+    if frame.empty:
+        return frame
+    start = view_start(frame.index, symbol, timeframe)
+    if start is None:
+        return frame
+    return frame.iloc[frame.index.searchsorted(start, side="left"):]
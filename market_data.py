@@ -0,0 +1,639 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+
+import resampling
+import resilience
+from instrumentation import count
+from fundamental_analysis import analyze_fundamental
+from news_service import fetch_general_news
+from technical_analysis import add_indicators
+
+# Cached frames are shared by every session. With copy-on-write, views (tail,
+# iloc, column selections) are free and a consumer writing to one gets its own
+# copy instead of corrupting the shared frame. The default from pandas 3 on.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Map timeframe to yfinance arguments
+# STRATEGY: Fetch MORE data than needed for valid indicators, then slice for view.
+FETCH_PARAMS = {
+    "1H": {"period": "5d", "interval": "1m"},   # Need days for indicators on 1m
+    "4H": {"period": "5d", "interval": "5m"},   # Need days for indicators on 5m
+    "1D": {"period": "5d", "interval": "1m"},
+    "5D": {"period": "1mo", "interval": "15m"}, # 1 month history for 5D view?
+    "1M": {"period": "6mo", "interval": "1h"},
+    "6M": {"period": "2y", "interval": "1d"},
+    "YTD": {"period": "2y", "interval": "1d"},
+    "1Y": {"period": "2y", "interval": "1d"},
+    "5Y": {"period": "10y", "interval": "1wk"},
+    "Max": {"period": "max", "interval": "1wk"},
+}
+
+# Local on-disk state (watchlists, archives, snapshots...). Overridable so load
+# tests and demos on synthetic data never touch the real cache.
+CACHE_DIR = Path(os.environ.get("STOCK_DASHBOARD_CACHE_DIR", Path(__file__).parent / ".cache"))
+
+# Seconds a cached entry is served without going upstream again.
+BAR_TTL = {
+    "1m": 60,
+    "5m": 120,
+    "15m": 300,
+    "1h": 900,
+    "1d": 3600,
+    "1wk": 6 * 3600,
+}
+INFO_TTL = 6 * 3600
+NEWS_TTL = 10 * 60
+OPTIONS_TTL = 15 * 60
+# Columns kept from each yfinance option chain.
+OPTION_COLUMNS = ["contractSymbol", "strike", "lastPrice", "bid", "ask", "volume", "openInterest", "impliedVolatility"]
+
+# Cached bars are stored as float32 prices and int64 volume (~2/3 of a float64
+# yfinance frame). Set STOCK_DASHBOARD_COMPACT_BARS=0 to keep the raw dtypes.
+COMPACT_BARS = os.environ.get("STOCK_DASHBOARD_COMPACT_BARS", "1") != "0"
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close"]
+# Download errors that mean the symbol doesn't exist or no longer trades:
+# Yahoo answered, so they must not count against the circuit breaker
+UNKNOWN_SYMBOL_ERRORS = ("delisted", "not found", "doesn't exist")
+
+# Memory budgets (MB) for the bar and indicator caches. Past the global budget
+# the least recently used frames are evicted; the per-session budget bounds
+# what one user browsing many tickers can keep cached at everybody's expense.
+CACHE_BUDGET_MB = float(os.environ.get("STOCK_DASHBOARD_CACHE_MB", 512))
+SESSION_BUDGET_MB = float(os.environ.get("STOCK_DASHBOARD_SESSION_MB", 96))
+
+# Process-wide caches, shared by every Streamlit session and the cache warmer.
+# Each entry is (fetched_at, value). Stale entries are served immediately and
+# refreshed in the background (see resilience.py).
+_lock = threading.RLock()
+_bars = {}
+_indicators = {}
+_info = {}
+_ticker_news = {}
+_general_news = {}
+_options = {}
+
+# LRU order of the budgeted entries: (store, key) -> (bytes, session id that used it last)
+_usage = OrderedDict()
+_usage_bytes = Counter()  # session id (None = warmer/worker) -> bytes charged
+
+# How often each symbol was picked by a user, used to decide what to keep warm.
+request_counts = Counter()
+
+
+def _is_fresh(entry, ttl):
+    return entry is not None and (time.time() - entry[0]) < ttl
+
+
+class _DownloadErrors(logging.Handler):
+    """
+    Collects the "['SYM', ...]: reason" failures yf.download logs (instead of
+    raising) on the thread that created it.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.errors = {}  # symbol -> reason
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+        match = re.match(r"\[(.*)\]: (.*)", record.getMessage(), re.S)
+        if match:
+            for symbol in re.findall(r"'([^']+)'", match.group(1)):
+                self.errors[symbol] = match.group(2)
+
+
+def _yf_download(tickers, period, interval):
+    """
+    yf.download of several symbols. Returns (frame, set of the symbols Yahoo
+    reported as unknown or delisted).
+    """
+    handler = _DownloadErrors()
+    logger = logging.getLogger("yfinance")
+    logger.addHandler(handler)
+    try:
+        df = yf.download(" ".join(tickers), period=period, interval=interval, progress=False)
+    finally:
+        logger.removeHandler(handler)
+    unknown = {
+        symbol for symbol, reason in handler.errors.items()
+        if any(marker in reason.lower() for marker in UNKNOWN_SYMBOL_ERRORS)
+    }
+    return df, unknown
+
+
+def _has_bars(tickers):
+    """
+    valid= test for _yf_download: an empty answer is a source failure (Yahoo
+    answers rate limits and outages that way) unless every requested symbol
+    was reported unknown.
+    """
+    def valid(result):
+        df, unknown = result
+        if not isinstance(df, pd.DataFrame):
+            return False
+        return not df.empty or set(tickers) <= unknown
+    return valid
+
+
+def compact_bars(df):
+    """
+    Returns `df` with float32 prices and int64 volume. The DatetimeIndex is
+    already int64 epoch nanoseconds underneath and is kept, so slicing,
+    resampling and charts work unchanged.
+    """
+    if df.empty:
+        return df
+    dtypes = {col: "float32" for col in PRICE_COLUMNS if col in df.columns and df[col].dtype != "float32"}
+    if "Volume" in df.columns and df["Volume"].dtype != "int64":
+        df = df.assign(Volume=df["Volume"].fillna(0).astype("int64"))
+    return df.astype(dtypes) if dtypes else df
+
+
+def _session_id():
+    # Streamlit session running this call, None in the warmer/worker threads
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+def _nbytes(df):
+    return int(df.memory_usage(index=True).sum()) if isinstance(df, pd.DataFrame) else 0
+
+
+def _evict(item):
+    store, key = item
+    nbytes, session = _usage.pop(item)
+    _usage_bytes[session] -= nbytes
+    if store == "bars":
+        _bars.pop(key, None)
+        # The indicator frame shares the bars' columns: drop it too to free them
+        if ("indicators", key) in _usage:
+            _evict(("indicators", key))
+        _indicators.pop(key, None)
+    else:
+        _indicators.pop(key, None)
+    count("cache_evictions", cache=store)
+
+
+def _touch(store, key, nbytes=None):
+    """
+    Marks a bars/indicators entry as just used (charging it to the current
+    session) and evicts least recently used entries over the budgets.
+    `nbytes` is given when the entry was (re)stored.
+    """
+    item = (store, key)
+    session = _session_id()
+    with _lock:
+        if item in _usage:
+            old_bytes, old_session = _usage[item]
+            _usage_bytes[old_session] -= old_bytes
+            nbytes = old_bytes if nbytes is None else nbytes
+        elif nbytes is None:
+            return
+        _usage[item] = (nbytes, session)
+        _usage.move_to_end(item)
+        _usage_bytes[session] += nbytes
+
+        budget = SESSION_BUDGET_MB * 1e6
+        if session is not None and _usage_bytes[session] > budget:
+            for other in [i for i, (_, s) in _usage.items() if s == session and i != item]:
+                if other in _usage:
+                    _evict(other)
+                if _usage_bytes[session] <= budget:
+                    break
+        while sum(_usage_bytes.values()) > CACHE_BUDGET_MB * 1e6 and len(_usage) > 1:
+            oldest = next(iter(_usage))
+            if oldest == item:
+                break
+            _evict(oldest)
+
+
+def _store_bars(key, fetched_at, df):
+    if COMPACT_BARS:
+        df = compact_bars(df)
+    with _lock:
+        _bars[key] = (fetched_at, df)
+    _touch("bars", key, _nbytes(df))
+    return df
+
+
+def cache_memory():
+    """
+    Bytes held by the budgeted caches: {"total", "entries", "sessions"}.
+    """
+    with _lock:
+        return {
+            "total": sum(_usage_bytes.values()),
+            "entries": len(_usage),
+            "sessions": sum(1 for s, n in _usage_bytes.items() if s is not None and n > 0),
+        }
+
+
+def _download(ticker, period, interval):
+    df, _ = resilience.call(
+        "yahoo", _yf_download, [ticker], period, interval, valid=_has_bars([ticker])
+    )
+    # Flatten MultiIndex columns if present
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+
+def record_request(ticker):
+    """
+    Counts a user selection of `ticker` so the warmer can prioritise it.
+    """
+    with _lock:
+        request_counts[ticker] += 1
+
+
+def most_requested(n=10):
+    """
+    Returns the `n` symbols users picked most often in this process.
+    """
+    with _lock:
+        return [symbol for symbol, _ in request_counts.most_common(n)]
+
+
+def bars_age(ticker, period, interval):
+    """
+    Seconds since the bars for this key were fetched, or None if not cached.
+    """
+    entry = _bars.get((ticker, period, interval))
+    return None if entry is None else time.time() - entry[0]
+
+
+def _derive_from_cache(ticker, period, interval):
+    """
+    Builds `interval` bars from a fresh cached download of finer bars covering
+    `period`. Returns (fetched_at, df) or None if no cached frame qualifies.
+    """
+    with _lock:
+        candidates = [
+            (key, entry) for key, entry in _bars.items()
+            if key[0] == ticker
+            and resampling.can_derive(key[2], interval)
+            and resampling.covers(key[1], period)
+            and _is_fresh(entry, BAR_TTL.get(key[2], 300))
+        ]
+    if not candidates:
+        return None
+
+    # Coarsest usable source means the least work
+    key, entry = max(candidates, key=lambda c: resampling.INTERVAL_DELTA[c[0][2]])
+    df = resampling.resample_ohlcv(entry[1], interval)
+    if key[1] != period:
+        df = resampling.trim_to_period(df, period)
+    return entry[0], df
+
+
+def get_bars(ticker, period, interval, force=False):
+    """
+    Returns OHLCV bars for a ticker, downloading only when the cached copy is stale.
+    Coarse intraday bars are resampled locally from finer cached bars when these
+    cover the requested period, so timeframe switches rarely go upstream.
+    The returned frame is shared: callers must not modify it in-place.
+    """
+    key = (ticker, period, interval)
+    entry = _bars.get(key)
+    if not force and _is_fresh(entry, BAR_TTL.get(interval, 300)):
+        count("cache_requests", cache="bars", result="hit")
+        _touch("bars", key)
+        return entry[1]
+
+    if not force:
+        derived = _derive_from_cache(ticker, period, interval)
+        if derived is not None:
+            count("cache_requests", cache="bars", result="resampled")
+            return _store_bars(key, *derived)
+        if entry is not None:
+            count("cache_requests", cache="bars", result="stale")
+            _touch("bars", key)
+            resilience.revalidate(("bars",) + key, get_bars, ticker, period, interval, force=True)
+            return entry[1]
+
+    if not force:
+        count("cache_requests", cache="bars", result="miss")
+
+    # One fine download can serve several timeframes: fetch the finest bars
+    # Yahoo allows for this period and derive the requested interval from them
+    source = resampling.source_interval(period, interval)
+    if source != interval:
+        source_entry = _bars.get((ticker, period, source))
+        refresh_source = force and not _is_fresh(source_entry, BAR_TTL.get(source, 300))
+        fine = get_bars(ticker, period, source, force=refresh_source)
+        if not fine.empty:
+            source_entry = _bars.get((ticker, period, source))
+            fetched_at = source_entry[0] if source_entry is not None else time.time()
+            return _store_bars(key, fetched_at, resampling.resample_ohlcv(fine, interval))
+
+    try:
+        df = _download(ticker, period, interval)
+    except resilience.SourceUnavailable as e:
+        # Nothing is cached for an outage, so the next call tries again
+        print(f"Bars for {ticker} unavailable: {e}")
+        return entry[1] if entry is not None else pd.DataFrame()
+    except Exception:
+        if entry is None:
+            raise
+        df = pd.DataFrame()
+    if df.empty and entry is not None:
+        # Keep serving the last good copy if the upstream hiccups
+        return entry[1]
+
+    return _store_bars(key, time.time(), df)
+
+
+def _split_batch(df, symbols):
+    """
+    Splits a multi-ticker yf.download frame into one OHLCV frame per symbol.
+    """
+    frames = {}
+    if df.empty:
+        return frames
+    if not isinstance(df.columns, pd.MultiIndex):
+        # A single symbol comes back flat
+        return {symbols[0]: df.dropna(how="all")} if len(symbols) == 1 else frames
+
+    available = set(df.columns.get_level_values(-1))
+    for symbol in symbols:
+        if symbol in available:
+            frame = df.xs(symbol, axis=1, level=-1).dropna(how="all")
+            if not frame.empty:
+                frames[symbol] = frame
+    return frames
+
+
+def get_bars_batch(tickers, period, interval, force=False, max_age=None):
+    """
+    Returns {symbol: bars} for several tickers. Symbols already cached are served
+    from the shared cache; the rest are fetched in ONE batched yf.download, and
+    stored per symbol so the single-ticker pages reuse them. Like get_bars,
+    coarse intraday bars are resampled from the finest download that serves them.
+    `max_age` (seconds) overrides the interval's TTL, e.g. for live quotes.
+    """
+    ttl = max_age if max_age is not None else BAR_TTL.get(interval, 300)
+    result = {}
+    missing = []
+    stale = []
+    for symbol in dict.fromkeys(tickers):
+        entry = _bars.get((symbol, period, interval))
+        if not force and _is_fresh(entry, ttl):
+            count("cache_requests", cache="bars", result="hit")
+            _touch("bars", (symbol, period, interval))
+            result[symbol] = entry[1]
+        elif not force and entry is not None:
+            count("cache_requests", cache="bars", result="stale")
+            _touch("bars", (symbol, period, interval))
+            result[symbol] = entry[1]
+            stale.append(symbol)
+        else:
+            derived = None if force else _derive_from_cache(symbol, period, interval)
+            if derived is not None:
+                count("cache_requests", cache="bars", result="resampled")
+                result[symbol] = _store_bars((symbol, period, interval), *derived)
+                continue
+            if not force:
+                count("cache_requests", cache="bars", result="miss")
+            missing.append(symbol)
+
+    if stale:
+        # Serve the stale copies now, refresh them all in one background batch
+        resilience.revalidate(
+            ("batch", tuple(stale), period, interval), get_bars_batch, stale, period, interval, force=True
+        )
+
+    source = resampling.source_interval(period, interval)
+    if missing and source != interval:
+        # One fine batch serves several timeframes: refresh it only where it is stale
+        if force:
+            outdated = [s for s in missing if not _is_fresh(_bars.get((s, period, source)), BAR_TTL.get(source, 300))]
+            if outdated:
+                get_bars_batch(outdated, period, source, force=True)
+        for symbol, fine in get_bars_batch(missing, period, source).items():
+            if not fine.empty:
+                source_entry = _bars.get((symbol, period, source))
+                fetched_at = source_entry[0] if source_entry is not None else time.time()
+                result[symbol] = _store_bars((symbol, period, interval), fetched_at,
+                                             resampling.resample_ohlcv(fine, interval))
+        for symbol in missing:
+            entry = _bars.get((symbol, period, interval))
+            if symbol not in result and entry is not None:
+                result[symbol] = entry[1]
+    elif missing:
+        try:
+            df, _ = resilience.call(
+                "yahoo", _yf_download, missing, period, interval, valid=_has_bars(missing),
+            )
+        except resilience.SourceUnavailable as e:
+            print(f"Batch download skipped: {e}")
+            df = pd.DataFrame()
+        fetched_at = time.time()
+        frames = _split_batch(df, missing)
+        for symbol, frame in frames.items():
+            frames[symbol] = _store_bars((symbol, period, interval), fetched_at, frame)
+        for symbol in missing:
+            entry = _bars.get((symbol, period, interval))
+            if symbol in frames:
+                result[symbol] = frames[symbol]
+            elif entry is not None:
+                # Upstream returned nothing: fall back to the last good copy
+                result[symbol] = entry[1]
+    return result
+
+
+def get_indicator_frame(ticker, timeframe, force=False):
+    """
+    Returns the bars for a dashboard timeframe with indicators already added.
+    Timeframes sharing the same download (e.g. 1H and 1D) share one entry.
+    """
+    params = FETCH_PARAMS[timeframe]
+    bars = get_bars(ticker, params["period"], params["interval"], force=force)
+    if bars.empty:
+        return bars
+
+    cached = cached_indicator_frame(ticker, timeframe, bars)
+    if cached is not None:
+        return cached
+    # Shallow copy: the indicator frame shares the OHLCV columns with `bars`
+    return store_indicator_frame(ticker, timeframe, bars, add_indicators(bars.copy(deep=False)))
+
+
+def cached_indicator_frame(ticker, timeframe, bars):
+    """
+    The cached indicator frame computed from exactly `bars`, or None.
+    """
+    params = FETCH_PARAMS[timeframe]
+    key = (ticker, params["period"], params["interval"])
+    entry = _indicators.get(key)
+    # Indicators are only recomputed when the underlying bars changed
+    if entry is not None and entry[1] is bars:
+        count("cache_requests", cache="indicators", result="hit")
+        _touch("indicators", key)
+        return entry[2]
+    count("cache_requests", cache="indicators", result="miss")
+    return None
+
+
+def store_indicator_frame(ticker, timeframe, bars, full_data):
+    """
+    Caches `full_data` (a shallow copy of `bars` plus indicator columns, e.g.
+    computed by worker_pool) as the indicator frame of `bars`. Returns it.
+    """
+    params = FETCH_PARAMS[timeframe]
+    key = (ticker, params["period"], params["interval"])
+    with _lock:
+        _indicators[key] = (time.time(), bars, full_data)
+    # Only the indicator columns are new memory
+    _touch("indicators", key, _nbytes(full_data) - _nbytes(bars))
+    return full_data
+
+
+def get_info(ticker, force=False):
+    """
+    Returns the yfinance `.info` dict for a ticker.
+    """
+    entry = _info.get(ticker)
+    if not force and _is_fresh(entry, INFO_TTL):
+        count("cache_requests", cache="info", result="hit")
+        return entry[1]
+    if not force and entry is not None:
+        count("cache_requests", cache="info", result="stale")
+        resilience.revalidate(("info", ticker), get_info, ticker, force=True)
+        return entry[1]
+
+    info = resilience.call("yahoo", lambda: yf.Ticker(ticker).info, valid=lambda info: isinstance(info, dict))
+    with _lock:
+        _info[ticker] = (time.time(), info)
+    return info
+
+
+def get_fundamentals(ticker, force=False):
+    """
+    Returns the analyze_fundamental report built from the cached `.info` dict.
+    """
+    try:
+        info = get_info(ticker, force=force)
+    except Exception as e:
+        return {"valid": False, "message": str(e)}
+    return analyze_fundamental(ticker, info=info)
+
+
+def _archive(news, ticker=None):
+    # Every fetched headline is kept in the local archive (news_archive imports
+    # this module, hence the late import)
+    import news_archive
+    try:
+        news_archive.ingest(news, ticker=ticker)
+    except Exception as e:
+        print(f"News archive ingest failed: {e}")
+
+
+def get_ticker_news(ticker, force=False):
+    """
+    Returns the raw yfinance news items for a ticker.
+    """
+    entry = _ticker_news.get(ticker)
+    if not force and _is_fresh(entry, NEWS_TTL):
+        count("cache_requests", cache="ticker_news", result="hit")
+        return entry[1]
+    if not force and entry is not None:
+        count("cache_requests", cache="ticker_news", result="stale")
+        resilience.revalidate(("ticker_news", ticker), get_ticker_news, ticker, force=True)
+        return entry[1]
+
+    news = resilience.call("yahoo", lambda: yf.Ticker(ticker).news, valid=lambda news: news is not None)
+    with _lock:
+        _ticker_news[ticker] = (time.time(), news)
+    _archive(news, ticker=ticker)
+    return news
+
+
+def get_general_news(force=False):
+    """
+    Returns the combined RSS headlines from news_service.
+    """
+    entry = _general_news.get("all")
+    if not force and _is_fresh(entry, NEWS_TTL):
+        count("cache_requests", cache="general_news", result="hit")
+        return entry[1]
+    if not force and entry is not None:
+        count("cache_requests", cache="general_news", result="stale")
+        resilience.revalidate(("general_news",), get_general_news, force=True)
+        return entry[1]
+
+    try:
+        news = resilience.call("rss", fetch_general_news)
+    except resilience.SourceUnavailable as e:
+        print(f"General news unavailable: {e}")
+        news = []
+    if not news and entry is not None:
+        return entry[1]
+    with _lock:
+        _general_news["all"] = (time.time(), news)
+    _archive(news)
+    return news
+
+
+def _load_option_chain(ticker):
+    """
+    Every expiry of a ticker's option chain as one frame (type, expiry, strike...).
+    Expiries are requested concurrently; one failing expiry is skipped.
+    """
+    yt = yf.Ticker(ticker)
+    expiries = resilience.call("yahoo", lambda: yt.options, valid=lambda e: e is not None)
+
+    def load(expiry):
+        try:
+            chain = resilience.call("yahoo", yt.option_chain, expiry, valid=lambda c: c is not None)
+        except Exception as e:
+            print(f"Option chain {ticker} {expiry} failed: {e}")
+            return None
+        sides = [
+            df.reindex(columns=OPTION_COLUMNS).assign(type=kind, expiry=expiry)
+            for kind, df in (("call", chain.calls), ("put", chain.puts))
+        ]
+        return pd.concat(sides, ignore_index=True)
+
+    if not expiries:
+        return pd.DataFrame(columns=["type", "expiry"] + OPTION_COLUMNS)
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="options") as pool:
+        frames = [f for f in pool.map(load, expiries) if f is not None]
+    if not frames:
+        raise resilience.SourceUnavailable(f"yahoo: no option chain for {ticker}")
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_option_chain(ticker, force=False):
+    """
+    Returns the full option chain (all expiries) of a ticker. Empty for
+    symbols without listed options.
+    """
+    entry = _options.get(ticker)
+    if not force and _is_fresh(entry, OPTIONS_TTL):
+        count("cache_requests", cache="options", result="hit")
+        return entry[1]
+    if not force and entry is not None:
+        count("cache_requests", cache="options", result="stale")
+        resilience.revalidate(("options", ticker), get_option_chain, ticker, force=True)
+        return entry[1]
+
+    chain = _load_option_chain(ticker)
+    with _lock:
+        _options[ticker] = (time.time(), chain)
+    return chain
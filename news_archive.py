@@ -0,0 +1,273 @@
+"""
+Local archive of every headline the dashboard fetches (RSS feeds and yfinance
+ticker news), in SQLite with an FTS5 full-text index. Items are deduplicated by
+link and by title, and tagged with the tickers of tickers_data they mention, so
+full-text and per-ticker queries over months of headlines never hit the feeds.
+"""
+import datetime
+import email.utils
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from market_data import CACHE_DIR
+from tickers_data import TICKERS
+
+ARCHIVE_FILE = CACHE_DIR / "news_archive.sqlite3"
+
+# Extra names headlines use for the popular symbols, on top of their labels.
+ALIASES = {
+    "NVDA": ["Nvidia"],
+    "GOOGL": ["Google"],
+    "META": ["Facebook"],
+    "AMZN": ["Amazon"],
+    "JPM": ["JPMorgan", "JP Morgan"],
+    "SAN.MC": ["Santander"],
+    "ITX.MC": ["Zara"],
+    "BTC-USD": ["BTC"],
+    "ETH-USD": ["Ether", "ETH"],
+    "^GSPC": ["S&P 500", "S&P"],
+    "^NDX": ["Nasdaq"],
+    "^DJI": ["Dow Jones", "Dow"],
+}
+# Corporate suffixes dropped from labels to get the name used in headlines.
+NAME_SUFFIXES = re.compile(r"(\.com)?( Inc\.?| Corp\.?| Corporation| Platforms| Chase)*$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    link_hash TEXT NOT NULL UNIQUE,
+    title_hash TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    source TEXT,
+    summary TEXT,
+    published REAL NOT NULL,
+    fetched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_published ON items (published);
+CREATE TABLE IF NOT EXISTS item_tickers (
+    ticker TEXT NOT NULL,
+    item_id INTEGER NOT NULL REFERENCES items (id),
+    PRIMARY KEY (ticker, item_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, summary, content='items', content_rowid='id'
+);
+"""
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_tagger = None
+
+
+def _connect():
+    # One connection per thread; WAL lets readers run while the warmer writes
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        ARCHIVE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(ARCHIVE_FILE, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def normalize_link(link):
+    """
+    Drops the fragment and utm_* tracking parameters so reposts of one article match.
+    """
+    parts = urlsplit(link.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def normalize_title(title):
+    return " ".join(re.findall(r"\w+", title.lower()))
+
+
+def _build_tagger():
+    terms = {}
+    for label, symbol in TICKERS.items():
+        if symbol == "CUSTOM":
+            continue
+        name = NAME_SUFFIXES.sub("", label.rsplit(" (", 1)[0]).strip()
+        for term in [name, *ALIASES.get(symbol, [])]:
+            terms[term] = symbol
+        base = re.split(r"[.\-]", symbol.lstrip("^"))[0]
+        terms["$" + base] = symbol
+        # Bare 1-2 letter tickers (V, MA, KO) are ordinary words: only "$KO" counts
+        if len(base) >= 3:
+            terms[base] = symbol
+        if symbol != base:
+            terms[symbol] = symbol
+    alternatives = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<![\w$^])({alternatives})(?![\w&])"), terms
+
+
+def tag_tickers(text):
+    """
+    Symbols from tickers_data mentioned in `text`, by name, symbol or $cashtag.
+    """
+    global _tagger
+    if _tagger is None:
+        _tagger = _build_tagger()
+    pattern, terms = _tagger
+    return sorted({terms[m] for m in pattern.findall(text)})
+
+
+def _timestamp(value, default):
+    """
+    RSS date string, ISO string or epoch seconds -> epoch seconds.
+    """
+    if value in (None, "", "N/A"):
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        return default
+
+
+def _from_yahoo(item):
+    """
+    Flattens both yfinance news layouts (flat, and nested under 'content').
+    """
+    content = item.get("content") or {}
+    link = item.get("link")
+    if not link:
+        link = ((content.get("clickThroughUrl") or content.get("canonicalUrl")) or {}).get("url")
+    provider = item.get("publisher") or (item.get("provider") or content.get("provider") or {}).get("displayName")
+    return {
+        "title": item.get("title") or content.get("title"),
+        "link": link,
+        "source": provider or "Yahoo Finance",
+        "summary": item.get("summary") or content.get("summary") or "",
+        "published": item.get("providerPublishTime") or content.get("pubDate"),
+    }
+
+
+def ingest(items, ticker=None):
+    """
+    Adds fetched news items to the archive, skipping ones already stored
+    (same link or same title). Accepts news_service dicts and raw yfinance
+    items; `ticker` tags every item with the symbol it was fetched for.
+    Returns the number of new items.
+    """
+    now = time.time()
+    rows = []
+    for item in items or []:
+        if "source" not in item:
+            # news_service items carry their feed name; yfinance items don't
+            item = _from_yahoo(item)
+        title, link = item.get("title"), item.get("link")
+        if not title or not link:
+            continue
+        summary = re.sub(r"<[^>]+>", " ", item.get("summary") or "").strip()
+        tickers = set(tag_tickers(f"{title} {summary}"))
+        if ticker:
+            tickers.add(ticker)
+        rows.append((
+            _hash(normalize_link(link)), _hash(normalize_title(title)), title, link,
+            item.get("source"), summary, _timestamp(item.get("published"), now), now, tickers,
+        ))
+    if not rows:
+        return 0
+
+    added = 0
+    with _write_lock:
+        conn = _connect()
+        with conn:
+            for *values, tickers in rows:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO items (link_hash, title_hash, title, link, source, summary, published, fetched)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    values,
+                )
+                if cur.rowcount:
+                    item_id = cur.lastrowid
+                    conn.execute("INSERT INTO items_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                                 (item_id, values[2], values[5]))
+                    added += 1
+                else:
+                    # Already archived: a ticker feed may still add its tag
+                    row = conn.execute("SELECT id FROM items WHERE link_hash = ? OR title_hash = ?",
+                                       values[:2]).fetchone()
+                    item_id = row["id"]
+                conn.executemany("INSERT OR IGNORE INTO item_tickers (ticker, item_id) VALUES (?, ?)",
+                                 [(t, item_id) for t in tickers])
+    return added
+
+
+def _fts_query(text):
+    # Every word must match (prefix match on the last one, for search-as-you-type)
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    quoted = [f'"{w}"' for w in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(query="", ticker=None, days=None, limit=50):
+    """
+    Archived items, newest first. `query` is matched against titles and
+    summaries (all words, any order), `ticker` restricts to tagged items and
+    `days` to the last N days. Returns a list of dicts with a "tickers" list.
+    """
+    sql = ["SELECT items.*, (SELECT group_concat(ticker, ' ') FROM item_tickers WHERE item_id = items.id) AS tickers",
+           "FROM items"]
+    where, params = [], []
+    match = _fts_query(query) if query else None
+    if match:
+        sql.append("JOIN items_fts ON items_fts.rowid = items.id")
+        where.append("items_fts MATCH ?")
+        params.append(match)
+    if ticker:
+        where.append("items.id IN (SELECT item_id FROM item_tickers WHERE ticker = ?)")
+        params.append(ticker)
+    if days:
+        where.append("items.published >= ?")
+        params.append(time.time() - days * 86400)
+    if where:
+        sql.append("WHERE " + " AND ".join(where))
+    sql.append("ORDER BY items.published DESC LIMIT ?")
+    params.append(limit)
+
+    rows = _connect().execute(" ".join(sql), params).fetchall()
+    return [
+        dict(row, tickers=(row["tickers"] or "").split(),
+             published=datetime.datetime.fromtimestamp(row["published"], datetime.timezone.utc))
+        for row in rows
+    ]
+
+
+def stats():
+    """
+    {"items", "tickers", "oldest"} for the archive caption.
+    """
+    conn = _connect()
+    count, oldest = conn.execute("SELECT count(*), min(published) FROM items").fetchone()
+    tickers = conn.execute("SELECT count(DISTINCT ticker) FROM item_tickers").fetchone()[0]
+    return {
+        "items": count,
+        "tickers": tickers,
+        "oldest": datetime.datetime.fromtimestamp(oldest, datetime.timezone.utc) if oldest else None,
+    }
@@ -19,7 +19,7 @@ def fetch_general_news():
     for source_name, url in rss_feeds.items():
         try:
             feed = feedparser.parse(url)
-            for entry in feed.entries[:5]: # Top 5 from each
+            for entry in feed.entries: # Everything: the news archive keeps it all
                 # Parse date
                 published = "N/A"
                 if hasattr(entry, 'published'):
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from instrumentation import timed
+
+# Contracts with a mid price below this are quotes, not prices: no IV for them.
+MIN_PRICE = 0.01
+# Quotes move in cents: less time value than this over intrinsic can't pin down an IV.
+MIN_TIME_VALUE = 0.005
+IV_BOUNDS = (1e-4, 5.0)
+IV_TOLERANCE = 1e-6
+MAX_ITERATIONS = 60
+DAYS_PER_YEAR = 365.0
+# US listed options expire at the close of this exchange timezone
+MARKET_TZ = "America/New_York"
+
+# Numerical Recipes erfc coefficients (fractional error < 1.2e-7 everywhere,
+# tails included). scipy is not a dependency; this keeps the CDF vectorized.
+_ERFC_COEFFS = [
+    0.17087277, -0.82215223, 1.48851587, -1.13520398, 0.27886807,
+    -0.18628806, 0.09678418, 0.37409196, 1.00002368, -1.26551223,
+]
+
+
+def erfc(x):
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = np.zeros_like(t)
+    for c in _ERFC_COEFFS:
+        poly = poly * t + c
+    ans = t * np.exp(-z * z + poly)
+    return np.where(x >= 0, ans, 2.0 - ans)
+
+
+def norm_cdf(x):
+    return 0.5 * erfc(-np.asarray(x, dtype=float) / np.sqrt(2.0))
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(spot, strike, t, rate, sigma, div=0.0):
+    vol_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate - div + 0.5 * sigma ** 2) * t) / vol_t
+    return d1, d1 - vol_t
+
+
+def bs_price(spot, strike, t, rate, sigma, is_call, div=0.0):
+    """
+    Black-Scholes price, element-wise over arrays (is_call: bool array).
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma, div)
+    disc_s = spot * np.exp(-div * t)
+    disc_k = strike * np.exp(-rate * t)
+    call = disc_s * norm_cdf(d1) - disc_k * norm_cdf(d2)
+    put = disc_k * norm_cdf(-d2) - disc_s * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_vega(spot, strike, t, rate, sigma, div=0.0):
+    d1, _ = _d1_d2(spot, strike, t, rate, sigma, div)
+    return spot * np.exp(-div * t) * norm_pdf(d1) * np.sqrt(t)
+
+
+def greeks(spot, strike, t, rate, sigma, is_call, div=0.0):
+    """
+    Delta, gamma, vega (per 1 vol point), theta (per day) and rho (per 1% rate)
+    for every contract at once. Returns a dict of arrays.
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma, div)
+    pdf = norm_pdf(d1)
+    disc_s = spot * np.exp(-div * t)
+    disc_k = strike * np.exp(-rate * t)
+    sqrt_t = np.sqrt(t)
+
+    delta = np.where(is_call, np.exp(-div * t) * norm_cdf(d1), -np.exp(-div * t) * norm_cdf(-d1))
+    gamma = np.exp(-div * t) * pdf / (spot * sigma * sqrt_t)
+    vega = disc_s * pdf * sqrt_t
+    decay = -disc_s * pdf * sigma / (2 * sqrt_t)
+    theta_call = decay - rate * disc_k * norm_cdf(d2) + div * disc_s * norm_cdf(d1)
+    theta_put = decay + rate * disc_k * norm_cdf(-d2) - div * disc_s * norm_cdf(-d1)
+    rho = np.where(is_call, disc_k * t * norm_cdf(d2), -disc_k * t * norm_cdf(-d2))
+    return {
+        "delta": delta,
+        "gamma": gamma,
+        "vega": vega / 100,
+        "theta": np.where(is_call, theta_call, theta_put) / DAYS_PER_YEAR,
+        "rho": rho / 100,
+    }
+
+
+@timed("compute.implied_volatility")
+def implied_volatility(price, spot, strike, t, rate, is_call, div=0.0):
+    """
+    Implied volatility of every contract at once: Newton steps on vega, with
+    a per-contract bisection bracket that takes over whenever a Newton step
+    leaves it (deep ITM/OTM, tiny vega). Prices outside the no-arbitrage
+    bounds, below MIN_PRICE or with less than MIN_TIME_VALUE over intrinsic
+    get NaN.
+    """
+    price, spot, strike, t, is_call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (price, spot, strike, t, is_call))
+    )
+    is_call = is_call.astype(bool)
+    disc_s = spot * np.exp(-div * t)
+    disc_k = strike * np.exp(-rate * t)
+    lower = np.where(is_call, np.maximum(disc_s - disc_k, 0.0), np.maximum(disc_k - disc_s, 0.0))
+    upper = np.where(is_call, disc_s, disc_k)
+    valid = (price >= MIN_PRICE) & (price - lower >= MIN_TIME_VALUE) & (price < upper) & (t > 0) & (strike > 0)
+
+    lo = np.full(price.shape, IV_BOUNDS[0])
+    hi = np.full(price.shape, IV_BOUNDS[1])
+    # Brenner-Subrahmanyam start, good near the money
+    sigma = np.clip(np.sqrt(2 * np.pi / np.maximum(t, 1e-8)) * price / spot, 0.05, 2.0)
+    active = valid.copy()
+
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        s = sigma[idx]
+        diff = bs_price(spot[idx], strike[idx], t[idx], rate, s, is_call[idx], div) - price[idx]
+        # Price is increasing in sigma: shrink the bracket around the root
+        hi[idx] = np.where(diff > 0, s, hi[idx])
+        lo[idx] = np.where(diff <= 0, s, lo[idx])
+
+        vega = bs_vega(spot[idx], strike[idx], t[idx], rate, s, div)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            step = s - diff / vega
+        inside = np.isfinite(step) & (step > lo[idx]) & (step < hi[idx])
+        new = np.where(inside, step, 0.5 * (lo[idx] + hi[idx]))
+
+        done = (np.abs(diff) < IV_TOLERANCE * np.maximum(price[idx], 1.0)) | (hi[idx] - lo[idx] < IV_TOLERANCE)
+        sigma[idx] = np.where(done, s, new)
+        active[idx[done]] = False
+
+    return np.where(valid, sigma, np.nan)
+
+
+def mid_price(chain):
+    """
+    Bid/ask midpoint, falling back to the last trade when the book is empty.
+    """
+    bid = chain["bid"].fillna(0)
+    ask = chain["ask"].fillna(0)
+    quoted = (bid > 0) & (ask > 0) & (ask >= bid)
+    return np.where(quoted, (bid + ask) / 2, chain["lastPrice"])
+
+
+@timed("compute.analyze_chain")
+def analyze_chain(chain, spot, rate=0.04, now=None):
+    """
+    Adds mid, years to expiry, implied volatility and greeks to a chain with
+    columns type ("call"/"put"), expiry, strike, bid, ask, lastPrice.
+    Everything is computed over the whole chain in one vectorized pass.
+    """
+    if chain.empty:
+        return chain
+    # Naive `now` is read as UTC
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    if now.tz is None:
+        now = now.tz_localize("UTC")
+    out = chain.copy()
+    # Contracts expire at the 16:00 New York close of their expiry date, whatever the server's timezone
+    expiry_close = (pd.to_datetime(out["expiry"]) + pd.Timedelta(hours=16)).dt.tz_localize(MARKET_TZ)
+    out["T"] = ((expiry_close - now).dt.total_seconds() / (DAYS_PER_YEAR * 86400)).clip(lower=0).to_numpy()
+    out["mid"] = mid_price(out)
+    is_call = (out["type"] == "call").to_numpy()
+    strike = out["strike"].to_numpy(dtype=float)
+    t = out["T"].to_numpy()
+
+    iv = implied_volatility(out["mid"].to_numpy(), spot, strike, t, rate, is_call)
+    out["iv"] = iv
+    solved = np.isfinite(iv)
+    g = greeks(spot, strike[solved], t[solved], rate, iv[solved], is_call[solved])
+    for name, values in g.items():
+        out[name] = np.nan
+        out.loc[solved, name] = values
+    out["moneyness"] = strike / spot
+    return out
+
+
+def otm_slice(analyzed, spot):
+    """
+    The out-of-the-money side of the chain (puts below spot, calls above),
+    whose quotes are the liquid ones a smile is read from.
+    """
+    otm = np.where(analyzed["type"] == "call", analyzed["strike"] >= spot, analyzed["strike"] < spot)
+    return analyzed[otm & analyzed["iv"].notna()]
+
+
+def volatility_smile(analyzed, spot, expiry):
+    """
+    IV by strike for one expiry, OTM contracts only, sorted by strike.
+    """
+    otm = otm_slice(analyzed, spot)
+    return otm[otm["expiry"] == expiry].sort_values("strike")[["strike", "moneyness", "type", "iv"]]
+
+
+def term_structure(analyzed, spot):
+    """
+    At-the-money IV per expiry, interpolated linearly in strike at the spot.
+    """
+    otm = otm_slice(analyzed, spot).sort_values(["expiry", "strike"])
+    rows = []
+    for expiry, group in otm.groupby("expiry"):
+        strikes = group["strike"].to_numpy()
+        if strikes.min() > spot or strikes.max() < spot:
+            continue
+        rows.append({
+            "expiry": expiry,
+            "days": group["T"].iloc[0] * DAYS_PER_YEAR,
+            "atm_iv": float(np.interp(spot, strikes, group["iv"].to_numpy())),
+        })
+    return pd.DataFrame(rows, columns=["expiry", "days", "atm_iv"])
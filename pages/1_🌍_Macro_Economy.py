@@ -2,8 +2,22 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objs as go
 import pandas as pd
-from macro_data import fetch_yield_curve, fetch_crypto_fear_greed, fetch_market_fear_vix, fetch_economic_data, fetch_basic_market_data, fetch_sector_performance, fetch_high_yield_spread
+from macro_worker import (
+    STALE_AFTER,
+    YIELD_HISTORY_MATURITIES,
+    YIELD_HISTORY_METHOD,
+    YIELD_HISTORY_YEARS,
+    build_yield_history,
+    get_snapshot,
+    load_latest_snapshot,
+    snapshot_age,
+)
+from sector_rotation import HORIZONS
+from yield_curve import METHODS
 from auth import check_password
+from debug_panel import render_debug_panel
+import instrumentation
+from instrumentation import span
 
 if not check_password():
     st.stop()
@@ -14,188 +28,306 @@ st.set_page_config(
     layout="wide"
 )
 
-st.title("🌍 Macro Economic Dashboard")
-st.markdown("---")
-
-# --- ROW 1: KEY METRICS ---
-col1, col2, col3 = st.columns(3)
-
-# 1. Market Fear (VIX)
-with col1:
-    st.subheader("📉 Market Fear (VIX)")
-    vix_data = fetch_market_fear_vix()
-    if vix_data:
-        val = vix_data['value']
-        prev = vix_data['previous']
-        delta = val - prev
-        st.metric("VIX Index", f"{val:.2f}", f"{delta:.2f}", delta_color="inverse")
-        
-        if val < 15:
-            st.success("Market Complacent / Greed")
-        elif val > 30:
-            st.error("Market Fear / High Volatility")
+instrumentation.start_rerun("macro")
+
+try:
+    st.title("🌍 Macro Economic Dashboard")
+
+    # Everything on this page comes from the snapshot written by macro_worker.py.
+    # Without a running worker, fall back to a live build shared for one worker interval.
+    with span("fetch.macro_snapshot"):
+        snapshot = load_latest_snapshot()
+    if snapshot is None:
+        with st.spinner("Loading macro data..."), span("fetch.build_snapshot"):
+            snapshot = get_snapshot()
+    st.caption(f"Data as of {snapshot['created_at']:%Y-%m-%d %H:%M} UTC")
+    if snapshot_age(snapshot) > STALE_AFTER:
+        st.warning(f"Macro snapshot is {snapshot_age(snapshot) / 3600:.1f} hours old: is macro_worker.py still running?")
+    if snapshot.get("stale"):
+        st.caption(f"⚠️ Showing last known values for: {', '.join(snapshot['stale'])} (source slow or unavailable, refreshing in background)")
+    st.markdown("---")
+
+    # --- ROW 1: KEY METRICS ---
+    col1, col2, col3 = st.columns(3)
+
+    # 1. Market Fear (VIX)
+    with col1:
+        st.subheader("📉 Market Fear (VIX)")
+        vix_data = snapshot['vix']
+        if vix_data:
+            val = vix_data['value']
+            prev = vix_data['previous']
+            delta = val - prev
+            st.metric("VIX Index", f"{val:.2f}", f"{delta:.2f}", delta_color="inverse")
+
+            if val < 15:
+                st.success("Market Complacent / Greed")
+            elif val > 30:
+                st.error("Market Fear / High Volatility")
+            else:
+                st.info("Normal Volatility")
         else:
-            st.info("Normal Volatility")
-    else:
-        st.warning("VIX data unavailable")
-
-# 2. Crypto Sentiment
-with col2:
-    st.subheader("₿ Crypto Sentiment")
-    fg_data = fetch_crypto_fear_greed()
-    if fg_data:
-        val = fg_data['value']
-        label = fg_data['classification']
-        
-        # Color logic
-        color = "red" if val < 25 else "green" if val > 75 else "orange"
-        
-        st.metric("Fear & Greed Index", f"{val}/100", label)
-        st.progress(val / 100)
-    else:
-        st.warning("API unavailable")
-
-# 3. Reference Rates (Placeholder/Simple)
-with col3:
-    st.subheader("🏛️ Reference Rates")
-    # Hardcoded or fetchable if possible.
-    # Showing static info for now as placeholder for FRED integration
-    st.markdown("""
-    **Fed Funds Rate**: ~4.25% - 4.50%
-    **ECB Deposit Rate**: ~3.25%
-    **BoJ Policy Rate**: ~0.25%
-    """)
-    st.caption("*Rates are approximate/latest known.*")
-
-    st.caption("*Rates are approximate/latest known.*")
-
-st.markdown("---")
-
-# --- ROW 2: ECONOMIC HEALTH (v0.2) ---
-st.subheader("🇺🇸 US Economic Health")
-eco_col1, eco_col2, eco_col3 = st.columns(3)
-
-eco_data = fetch_economic_data()
-
-with eco_col1:
-    st.metric("Inflation Rate (CPI YoY)", f"{eco_data['cpi_yoy']}%")
-with eco_col2:
-    st.metric("Unemployment Rate", f"{eco_data['unemployment']}%")
-with eco_col3:
-    st.metric("GDP Growth (Ann.)", f"{eco_data['gdp_growth']}%")
-
-st.caption(f"Source: {eco_data['source']}")
-
-st.markdown("---")
-
-
-st.subheader("📈 US Treasury Yields (Custom: 4M, 8M, 1Y, 3Y, 5Y)")
-
-yield_df = fetch_yield_curve()
-
-if not yield_df.empty:
-    # --- High Yield Spread (Replacement for Inversion Check) ---
-    hy_data = fetch_high_yield_spread()
-    
-    col_spread1, col_spread2 = st.columns([1, 2])
-    with col_spread1:
-        if hy_data:
-            st.metric(
-                "High Yield Spread (BofA)", 
-                f"{hy_data['value']:.2f}%", 
-                f"{hy_data['delta']:.2f}%", 
-                delta_color="inverse" # Rising spread is bad (red)
-            )
+            st.warning("VIX data unavailable")
+
+    # 2. Crypto Sentiment
+    with col2:
+        st.subheader("₿ Crypto Sentiment")
+        fg_data = snapshot['fear_greed']
+        if fg_data:
+            val = fg_data['value']
+            label = fg_data['classification']
+
+            # Color logic
+            color = "red" if val < 25 else "green" if val > 75 else "orange"
+
+            st.metric("Fear & Greed Index", f"{val}/100", label)
+            st.progress(val / 100)
         else:
-            st.warning("Spread data unavailable")
-    
-    with col_spread2:
-        st.caption("**ICE BofA US High Yield Index Option-Adjusted Spread**")
-        st.caption("A proxy for credit risk. Rising spread = Stress/Fear. Falling spread = Confident market.")
-
-    # Plot
-    fig = go.Figure()
-    
-    # Trace 1: Current
-    fig.add_trace(go.Scatter(
-        x=yield_df['Maturity'], 
-        y=yield_df['Yield'], 
-        name='Current',
-        line=dict(color='#00FF00', width=3),
-        mode='lines+markers'
-    ))
-    
-    # Trace 2: 1 Month Ago
-    fig.add_trace(go.Scatter(
-        x=yield_df['Maturity'], 
-        y=yield_df['Yield 1M Ago'], 
-        name='1 Month Ago',
-        line=dict(color='gray', width=2, dash='dot'),
-        mode='lines+markers'
-    ))
-    
-    fig.update_layout(
-        title="Yield Curve: Current vs 1 Month Ago",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(title="Yield (%)", showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
-        xaxis=dict(showgrid=False),
-        dragmode='pan',
-        hovermode='x unified'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': True})
-    
-else:
-    st.error("Could not load Yield Curve data.")
-
-st.markdown("---")
-
-# --- ROW 4: GLOBAL MARKETS & SECTORS ---
-st.subheader("🌐 Global Markets & Sectors")
-gm_col1, gm_col2 = st.columns([1, 2])
-
-with gm_col1:
-    st.markdown("#### Key Assets")
-    market_data = fetch_basic_market_data()
-    
-    if "DXY" in market_data:
-        d = market_data["DXY"]
-        st.metric("🇺🇸 Dollar Index (DXY)", f"{d['price']:.2f}", f"{d['pct']:.2f}%")
-        
-    if "Gold" in market_data:
-        g = market_data["Gold"]
-        st.metric("🥇 Gold (Futures)", f"${g['price']:.2f}", f"{g['pct']:.2f}%")
-    
-    st.info("Performance vs previous close.")
-
-with gm_col2:
-    st.markdown("#### 🏗️ Sector Performance (1D)")
-    sector_df = fetch_sector_performance()
-    
-    if not sector_df.empty:
-        # Bar Chart
-        # Color based on value
-        sector_df['Color'] = sector_df['Change (%)'].apply(lambda x: '#00FF00' if x >= 0 else '#FF0000')
-        
-        fig_sec = px.bar(
-            sector_df, 
-            x='Change (%)', 
-            y='Sector', 
-            orientation='h', 
-            text_auto='.2f',
-            title="S&P 500 Sectors",
-        )
-        fig_sec.update_traces(marker_color=sector_df['Color'])
-        fig_sec.update_layout(
+            st.warning("API unavailable")
+
+    # 3. Reference Rates (Placeholder/Simple)
+    with col3:
+        st.subheader("🏛️ Reference Rates")
+        # Hardcoded or fetchable if possible.
+        # Showing static info for now as placeholder for FRED integration
+        st.markdown("""
+        **Fed Funds Rate**: ~4.25% - 4.50%
+        **ECB Deposit Rate**: ~3.25%
+        **BoJ Policy Rate**: ~0.25%
+        """)
+        st.caption("*Rates are approximate/latest known.*")
+
+        st.caption("*Rates are approximate/latest known.*")
+
+    st.markdown("---")
+
+    # --- ROW 2: ECONOMIC HEALTH (v0.2) ---
+    st.subheader("🇺🇸 US Economic Health")
+    eco_col1, eco_col2, eco_col3 = st.columns(3)
+
+    eco_data = snapshot['economic']
+
+    with eco_col1:
+        st.metric("Inflation Rate (CPI YoY)", f"{eco_data['cpi_yoy']}%")
+    with eco_col2:
+        st.metric("Unemployment Rate", f"{eco_data['unemployment']}%")
+    with eco_col3:
+        st.metric("GDP Growth (Ann.)", f"{eco_data['gdp_growth']}%")
+
+    st.caption(f"Source: {eco_data['source']}")
+
+    with st.expander("📚 Indicator Catalogue"):
+        indicators = snapshot['indicators']
+        if indicators.empty:
+            st.warning("Indicator catalogue unavailable.")
+        else:
+            category = st.radio("Category", ["All"] + list(indicators["Category"].unique()), horizontal=True)
+            shown = indicators if category == "All" else indicators[indicators["Category"] == category]
+            st.dataframe(
+                shown,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "Latest": st.column_config.NumberColumn(format="%.2f"),
+                    "Previous": st.column_config.NumberColumn(format="%.2f"),
+                    "Z-Score (5Y)": st.column_config.NumberColumn(format="%.2f"),
+                    "Percentile (10Y)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f"),
+                },
+            )
+            st.caption("Z-score and percentile rank of the latest reading within its trailing 5/10-year history.")
+
+    st.markdown("---")
+
+
+    st.subheader("📈 US Treasury Yields (Custom: 4M, 8M, 1Y, 3Y, 5Y)")
+
+    yield_df = snapshot['yield_curve']
+
+    if not yield_df.empty:
+        # --- High Yield Spread (Replacement for Inversion Check) ---
+        hy_data = snapshot['hy_spread']
+
+        col_spread1, col_spread2 = st.columns([1, 2])
+        with col_spread1:
+            if hy_data:
+                st.metric(
+                    "High Yield Spread (BofA)", 
+                    f"{hy_data['value']:.2f}%", 
+                    f"{hy_data['delta']:.2f}%", 
+                    delta_color="inverse" # Rising spread is bad (red)
+                )
+            else:
+                st.warning("Spread data unavailable")
+
+        with col_spread2:
+            st.caption("**ICE BofA US High Yield Index Option-Adjusted Spread**")
+            st.caption("A proxy for credit risk. Rising spread = Stress/Fear. Falling spread = Confident market.")
+
+        # Plot
+        fig = go.Figure()
+
+        # Trace 1: Current
+        fig.add_trace(go.Scatter(
+            x=yield_df['Maturity'], 
+            y=yield_df['Yield'], 
+            name='Current',
+            line=dict(color='#00FF00', width=3),
+            mode='lines+markers'
+        ))
+
+        # Trace 2: 1 Month Ago
+        fig.add_trace(go.Scatter(
+            x=yield_df['Maturity'], 
+            y=yield_df['Yield 1M Ago'], 
+            name='1 Month Ago',
+            line=dict(color='gray', width=2, dash='dot'),
+            mode='lines+markers'
+        ))
+
+        fig.update_layout(
+            title="Yield Curve: Current vs 1 Month Ago",
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)',
-            yaxis=dict(autorange="reversed"), # Top performer at top
-            xaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
-            height=400
+            yaxis=dict(title="Yield (%)", showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
+            xaxis=dict(showgrid=False),
+            dragmode='pan',
+            hovermode='x unified'
         )
-        st.plotly_chart(fig_sec, use_container_width=True)
+
+        st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': True})
+
     else:
-        st.warning("Sector data unavailable.")
+        st.error("Could not load Yield Curve data.")
+
+    # --- YIELD CURVE HISTORY ---
+    with st.expander("🎞️ Yield Curve History & Spreads"):
+        hc1, hc2, hc3 = st.columns([1, 2, 1])
+        with hc1:
+            method = st.selectbox("Curve fit", METHODS, index=METHODS.index(YIELD_HISTORY_METHOD))
+        with hc2:
+            mat_text = st.text_input("Maturities (years, comma separated)",
+                                     value=", ".join(f"{m:g}" for m in YIELD_HISTORY_MATURITIES))
+        with hc3:
+            years_back = st.slider("Years", 1, 20, YIELD_HISTORY_YEARS)
+
+        try:
+            maturities = tuple(sorted({float(m) for m in mat_text.split(",") if m.strip()}))
+        except ValueError:
+            st.error("Maturities must be numbers, e.g. 0.25, 2, 10")
+            maturities = ()
+
+        # Expanders run even when collapsed: only build the (slow) animation on request
+        if maturities and st.checkbox("Show curve animation and spreads", value=False, key="show_yield_history"):
+            yield_history = snapshot.get("yield_history")
+            if (method, maturities, years_back) != (YIELD_HISTORY_METHOD, YIELD_HISTORY_MATURITIES, YIELD_HISTORY_YEARS) \
+                    or yield_history is None:
+                with st.spinner("Fitting curves..."), span("compute.yield_history"):
+                    yield_history = build_yield_history(method, maturities, years_back)
+
+            if yield_history is None:
+                st.warning("Yield history unavailable.")
+            else:
+                frames = yield_history["frames"]
+                fig_anim = px.line(
+                    frames, x="Maturity", y="Yield", animation_frame="Date",
+                    markers=True, range_y=[frames["Yield"].min() - 0.25, frames["Yield"].max() + 0.25],
+                    title=f"Weekly yield curves ({method})",
+                )
+                fig_anim.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+                st.plotly_chart(fig_anim, use_container_width=True)
+
+                fig_spread = px.line(yield_history["spreads"], title="Curve spreads (bps)")
+                fig_spread.add_hline(y=0, line_dash="dash", line_color="gray")
+                fig_spread.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', hovermode='x unified')
+                st.plotly_chart(fig_spread, use_container_width=True)
+
+    st.markdown("---")
+
+    # --- ROW 4: GLOBAL MARKETS & SECTORS ---
+    st.subheader("🌐 Global Markets & Sectors")
+    gm_col1, gm_col2 = st.columns([1, 2])
+
+    with gm_col1:
+        st.markdown("#### Key Assets")
+        market_data = snapshot['market']
+
+        if "DXY" in market_data:
+            d = market_data["DXY"]
+            st.metric("🇺🇸 Dollar Index (DXY)", f"{d['price']:.2f}", f"{d['pct']:.2f}%")
+
+        if "Gold" in market_data:
+            g = market_data["Gold"]
+            st.metric("🥇 Gold (Futures)", f"${g['price']:.2f}", f"{g['pct']:.2f}%")
+
+        st.info("Performance vs previous close.")
+
+    with gm_col2:
+        sector_horizon = st.radio("Horizon", list(HORIZONS.keys()), index=0, horizontal=True)
+        st.markdown(f"#### 🏗️ Sector Performance ({sector_horizon})")
+        sector_df = snapshot['sectors'][sector_horizon].copy()  # Shared snapshot: don't mutate
+
+        if not sector_df.empty:
+            # Bar Chart
+            # Color based on value
+            sector_df['Color'] = sector_df['Change (%)'].apply(lambda x: '#00FF00' if x >= 0 else '#FF0000')
+
+            fig_sec = px.bar(
+                sector_df, 
+                x='Change (%)', 
+                y='Sector', 
+                orientation='h', 
+                text_auto='.2f',
+                title="S&P 500 Sectors",
+            )
+            fig_sec.update_traces(marker_color=sector_df['Color'])
+            fig_sec.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                yaxis=dict(autorange="reversed"), # Top performer at top
+                xaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
+                height=400
+            )
+            st.plotly_chart(fig_sec, use_container_width=True)
+        else:
+            st.warning("Sector data unavailable.")
+
+    # --- SECTOR ROTATION ---
+    with st.expander("🔄 Sector Rotation (vs SPY)"):
+        analytics = snapshot['sector_analytics']
+        if analytics:
+            st.markdown("**Returns (%)**")
+            st.dataframe(analytics["returns"].style.format("{:.2f}"), use_container_width=True)
+            st.markdown("**Relative strength vs SPY (pp)**")
+            st.dataframe(analytics["relative"].style.format("{:.2f}"), use_container_width=True)
+
+            rrg = analytics["rrg"]
+            fig_rrg = go.Figure()
+            for sector, tail in rrg.groupby("Symbol"):
+                fig_rrg.add_trace(go.Scatter(
+                    x=tail["RS-Ratio"],
+                    y=tail["RS-Momentum"],
+                    mode='lines+markers',
+                    name=sector,
+                    marker=dict(size=[4] * (len(tail) - 1) + [11]),  # Head = latest week
+                    hovertext=tail["Date"].dt.strftime("%Y-%m-%d"),
+                ))
+            fig_rrg.add_hline(y=100, line_color="gray")
+            fig_rrg.add_vline(x=100, line_color="gray")
+            fig_rrg.update_layout(
+                title="Relative Rotation Graph (weekly)",
+                xaxis_title="RS-Ratio",
+                yaxis_title="RS-Momentum",
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                height=550
+            )
+            st.plotly_chart(fig_rrg, use_container_width=True)
+            st.caption("Leading (top-right) → Weakening (bottom-right) → Lagging (bottom-left) → Improving (top-left)")
+        else:
+            st.warning("Sector rotation data unavailable.")
+
+    # End of Dashboard
+finally:
+    instrumentation.end_rerun()
 
-# End of Dashboard
+render_debug_panel()
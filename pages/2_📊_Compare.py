@@ -0,0 +1,78 @@
+import streamlit as st
+import plotly.graph_objs as go
+from auth import check_password
+from comparison import COMPARE_PARAMS, MAX_SYMBOLS, fetch_closes, rebase
+from tickers_data import TICKERS
+
+if not check_password():
+    st.stop()
+
+st.set_page_config(
+    page_title="Compare",
+    page_icon="📊",
+    layout="wide"
+)
+
+st.title("📊 Performance Comparison")
+st.markdown("---")
+
+# --- SYMBOL SELECTION ---
+labels = [label for label, symbol in TICKERS.items() if symbol != "CUSTOM"]
+col_sel, col_extra, col_hz = st.columns([3, 2, 1])
+with col_sel:
+    selected = st.multiselect("Popular assets", labels, default=labels[:3])
+with col_extra:
+    extra = st.text_input("Other symbols (comma separated)", value="")
+with col_hz:
+    horizon = st.selectbox("Horizon", list(COMPARE_PARAMS.keys()), index=2)
+
+tickers = [TICKERS[label] for label in selected]
+tickers += [s.strip().upper() for s in extra.split(",") if s.strip()]
+tickers = list(dict.fromkeys(tickers))
+
+if len(tickers) > MAX_SYMBOLS:
+    st.warning(f"Comparing the first {MAX_SYMBOLS} symbols only.")
+    tickers = tickers[:MAX_SYMBOLS]
+
+if not tickers:
+    st.info("Pick at least one symbol to compare.")
+    st.stop()
+
+with st.spinner("Loading prices..."):
+    closes = fetch_closes(tickers, horizon)
+
+if closes.empty:
+    st.error("No data found for the selected symbols.")
+    st.stop()
+
+missing = [t for t in tickers if t not in closes.columns]
+if missing:
+    st.warning(f"No data for: {', '.join(missing)}")
+
+perf = rebase(closes)
+
+# --- PLOT ---
+fig = go.Figure()
+for symbol in perf.columns:
+    fig.add_trace(go.Scatter(
+        x=perf.index,
+        y=perf[symbol],
+        mode='lines',
+        name=symbol,
+    ))
+fig.add_hline(y=100, line_dash="dash", line_color="gray")
+fig.update_layout(
+    title="Performance (rebased to 100)",
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)', side='right'),
+    xaxis=dict(showgrid=False),
+    hovermode='x unified',
+    dragmode='pan',
+    height=600
+)
+st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': True})
+
+# --- SUMMARY TABLE ---
+summary = (perf.iloc[-1] - 100).sort_values(ascending=False).rename("Return (%)").to_frame()
+st.dataframe(summary.style.format("{:.2f}"), use_container_width=True)
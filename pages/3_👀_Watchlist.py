@@ -0,0 +1,68 @@
+import streamlit as st
+from auth import check_password, current_user
+from tickers_data import TICKERS
+from watchlist import REFRESH_SECONDS, load_watchlist, refresh_rows, save_watchlist
+
+if not check_password():
+    st.stop()
+
+st.set_page_config(
+    page_title="Watchlist",
+    page_icon="👀",
+    layout="wide"
+)
+
+st.title("👀 Watchlist")
+st.markdown("---")
+
+user = current_user()
+if "watchlist" not in st.session_state:
+    st.session_state["watchlist"] = load_watchlist(user)
+symbols = st.session_state["watchlist"]
+
+# --- EDIT LIST ---
+with st.expander("✏️ Edit watchlist"):
+    col_add, col_btn = st.columns([3, 1])
+    with col_add:
+        popular = [s for s in TICKERS.values() if s != "CUSTOM" and s not in symbols]
+        to_add = st.multiselect("Add popular assets", popular)
+        custom = st.text_input("Add other symbols (comma separated)", value="")
+    to_remove = st.multiselect("Remove", symbols)
+    with col_btn:
+        if st.button("Save", use_container_width=True):
+            new = [s for s in symbols if s not in to_remove] + to_add
+            new += [s.strip().upper() for s in custom.split(",") if s.strip()]
+            st.session_state["watchlist"] = list(dict.fromkeys(new))
+            save_watchlist(user, st.session_state["watchlist"])
+            st.rerun()
+
+
+# --- TABLE (refreshes itself without rerunning the whole page) ---
+@st.fragment(run_every=REFRESH_SECONDS)
+def watchlist_table(symbols):
+    if not symbols:
+        st.info("Your watchlist is empty.")
+        return
+
+    table = refresh_rows(symbols)
+    if table.empty:
+        st.warning("No quotes available right now.")
+        return
+
+    # Sparklines are rendered by the data grid itself: no Plotly figure per row
+    st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        height=min(35 * (len(table) + 1) + 3, 900),
+        column_config={
+            "Price": st.column_config.NumberColumn(format="%.2f"),
+            "Change (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            "RSI": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.1f"),
+            "Last 30": st.column_config.LineChartColumn("Last 30 days"),
+        },
+    )
+    st.caption(f"{len(table)} symbols · quotes refresh every {REFRESH_SECONDS}s")
+
+
+watchlist_table(symbols)
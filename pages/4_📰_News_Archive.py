@@ -0,0 +1,55 @@
+import streamlit as st
+import pandas as pd
+from auth import check_password
+from tickers_data import TICKERS
+import news_archive
+
+if not check_password():
+    st.stop()
+
+st.set_page_config(
+    page_title="News Archive",
+    page_icon="📰",
+    layout="wide"
+)
+
+st.title("📰 News Archive")
+
+stats = news_archive.stats()
+if stats["items"]:
+    st.caption(
+        f"{stats['items']:,} headlines archived since {stats['oldest']:%Y-%m-%d} · "
+        f"{stats['tickers']} tickers tagged · searched locally, the feeds are not queried"
+    )
+else:
+    st.info("The archive is empty. Headlines are added as the dashboard and the cache warmer fetch news.")
+st.markdown("---")
+
+# --- FILTERS ---
+col_q, col_t, col_d = st.columns([3, 2, 1])
+with col_q:
+    query = st.text_input("Search headlines", value="", placeholder="e.g. rate cut, earnings guidance")
+with col_t:
+    symbols = ["All"] + [s for s in TICKERS.values() if s != "CUSTOM"]
+    ticker = st.selectbox("Ticker", symbols, index=0)
+with col_d:
+    days = st.selectbox("Period", [7, 30, 90, 365, None], index=2,
+                        format_func=lambda d: "All time" if d is None else f"Last {d} days")
+
+results = news_archive.search(query, ticker=None if ticker == "All" else ticker, days=days, limit=200)
+
+if not results:
+    st.warning("No archived headlines match.")
+else:
+    st.caption(f"{len(results)} most recent matches")
+    for item in results:
+        st.markdown(f"**[{item['title']}]({item['link']})**")
+        tags = " ".join(f"`{t}`" for t in item["tickers"])
+        st.caption(f"{item['source']} · {item['published']:%Y-%m-%d %H:%M} UTC {tags}")
+
+    with st.expander("Mentions per ticker"):
+        counts = pd.Series([t for item in results for t in item["tickers"]]).value_counts()
+        if counts.empty:
+            st.caption("No tagged tickers in these results.")
+        else:
+            st.bar_chart(counts)
@@ -0,0 +1,95 @@
+import streamlit as st
+import pandas as pd
+from auth import check_password, current_user
+from market_data import FETCH_PARAMS
+from tickers_data import TICKERS
+import alerts
+
+if not check_password():
+    st.stop()
+
+st.set_page_config(
+    page_title="Alerts",
+    page_icon="🔔",
+    layout="wide"
+)
+
+st.title("🔔 Alerts")
+st.caption(
+    f"Rules are checked on every new bar: in the background every {alerts.POLL_SECONDS}s, "
+    "and whenever the dashboard loads the ticker."
+)
+st.markdown("---")
+
+user = current_user()
+engine = alerts.get_engine()
+
+# --- NEW RULE ---
+with st.expander("➕ New alert", expanded=not engine.rules(user)):
+    col_t, col_f, col_o, col_v = st.columns([2, 2, 2, 2])
+    with col_t:
+        popular = [s for s in TICKERS.values() if s != "CUSTOM"]
+        symbol = st.selectbox("Ticker", popular + ["Other..."])
+        if symbol == "Other...":
+            symbol = st.text_input("Symbol", value="").strip().upper()
+    with col_o:
+        op = st.selectbox("Condition", alerts.OPS, format_func=lambda o: alerts.OP_LABELS[o])
+    with col_f:
+        field = st.selectbox("Field", alerts.FIELDS[:-1], index=alerts.FIELD_INDEX["Close"],
+                             disabled=op == "volume_spike")
+    with col_v:
+        value, other = None, None
+        if op == "volume_spike":
+            value = st.number_input("× average volume", min_value=1.0, value=alerts.VOLUME_SPIKE_FACTOR, step=0.1)
+        else:
+            target = st.radio("Compare to", ["Value", "Field"], horizontal=True)
+            if target == "Value":
+                value = st.number_input("Value", value=70.0 if field == "RSI" else 0.0)
+            else:
+                other = st.selectbox("Other field", [f for f in alerts.FIELDS if f != field])
+
+    col_tf, col_r, col_btn = st.columns([2, 2, 1])
+    with col_tf:
+        timeframes = list(FETCH_PARAMS)
+        timeframe = st.selectbox("Bars", timeframes, index=timeframes.index(alerts.DEFAULT_TIMEFRAME),
+                                 format_func=lambda t: f"{t} ({FETCH_PARAMS[t]['interval']} bars)")
+    with col_r:
+        repeat = st.checkbox("Fire on every bar that matches", value=False,
+                             help="Otherwise the alert fires once and is disarmed.")
+    with col_btn:
+        if st.button("Create", use_container_width=True, disabled=not symbol):
+            rule = alerts.make_rule(user, symbol, field, op, value=value, other=other,
+                                    timeframe=timeframe, repeat=repeat)
+            alerts.add_rule(rule)
+            st.rerun()
+
+# --- RULES ---
+st.subheader("My rules")
+rules = engine.rules(user)
+if not rules:
+    st.info("No alerts yet.")
+for rule in sorted(rules, key=lambda r: r["created"], reverse=True):
+    col_d, col_s, col_a, col_x = st.columns([6, 1, 1, 1])
+    col_d.markdown(f"**{alerts.describe(rule)}**" + (" · every bar" if rule["repeat"] else ""))
+    col_s.caption("Armed" if rule["active"] else "Fired")
+    if not rule["active"] and col_a.button("Re-arm", key=f"arm_{rule['id']}"):
+        alerts.set_active(rule["id"], True)
+        st.rerun()
+    if col_x.button("Delete", key=f"del_{rule['id']}"):
+        alerts.remove_rule(rule["id"])
+        st.rerun()
+
+# --- LOG ---
+st.markdown("---")
+st.subheader("Recent alerts")
+fired = engine.recent(user)
+if not fired:
+    st.caption("Nothing has fired yet.")
+else:
+    log = pd.DataFrame({
+        "Fired (UTC)": [alerts.fired_at(a) for a in fired],
+        "Alert": [a["message"] for a in fired],
+        "Value": [a["value"] for a in fired],
+        "Bar": [str(a["bar"]) for a in fired],
+    })
+    st.dataframe(log, hide_index=True, use_container_width=True)
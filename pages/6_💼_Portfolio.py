@@ -0,0 +1,123 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objs as go
+from auth import check_password
+from tickers_data import TICKERS
+import portfolio
+
+if not check_password():
+    st.stop()
+
+st.set_page_config(
+    page_title="Portfolio",
+    page_icon="💼",
+    layout="wide"
+)
+
+st.title("💼 Portfolio Optimizer")
+st.caption("Long-only portfolios from the cached price history: expected returns and covariances are historical.")
+st.markdown("---")
+
+# --- INPUTS ---
+labels = [label for label, symbol in TICKERS.items()
+          if symbol != "CUSTOM" and not symbol.startswith("^")]
+col_sel, col_extra = st.columns([3, 2])
+with col_sel:
+    selected = st.multiselect("Assets", labels, default=labels[:6])
+with col_extra:
+    extra = st.text_input("Other symbols (comma separated)", value="")
+
+col_lb, col_cap, col_rf = st.columns(3)
+with col_lb:
+    lookback = st.selectbox("Lookback", list(portfolio.LOOKBACKS), index=list(portfolio.LOOKBACKS).index(portfolio.DEFAULT_LOOKBACK))
+with col_cap:
+    cap = st.slider("Max weight per asset", min_value=5, max_value=100, value=100, step=5, format="%d%%") / 100
+with col_rf:
+    risk_free = st.number_input("Risk-free rate (%)", min_value=0.0, max_value=20.0,
+                                value=portfolio.RISK_FREE_RATE * 100, step=0.25) / 100
+
+tickers = [TICKERS[label] for label in selected]
+tickers += [s.strip().upper() for s in extra.split(",") if s.strip()]
+tickers = list(dict.fromkeys(tickers))
+
+if len(tickers) > portfolio.MAX_ASSETS:
+    st.warning(f"Optimizing over the first {portfolio.MAX_ASSETS} symbols only.")
+if len(tickers) < 2:
+    st.info("Pick at least two assets.")
+    st.stop()
+
+with st.spinner("Optimizing..."):
+    report = portfolio.optimize(tickers, lookback, cap=cap, risk_free=risk_free)
+
+if report["excluded"]:
+    st.warning(f"Not enough price history for: {', '.join(report['excluded'])}")
+if not report["valid"]:
+    st.error(report["message"])
+    st.stop()
+
+portfolios = report["portfolios"]
+MARKERS = {"Minimum Variance": "diamond", "Maximum Sharpe": "star", "Risk Parity": "square"}
+
+# --- KEY PORTFOLIOS ---
+cols = st.columns(len(portfolios))
+for col, (name, p) in zip(cols, portfolios.items()):
+    col.metric(name, f"{p['return']:.2%} / yr", f"vol {p['volatility']:.2%} · Sharpe {p['sharpe']:.2f}",
+               delta_color="off")
+
+# --- EFFICIENT FRONTIER ---
+frontier = report["frontier"]
+assets = report["assets"]
+fig = go.Figure()
+fig.add_trace(go.Scatter(
+    x=frontier["volatility"], y=frontier["return"], mode="lines", name="Efficient frontier",
+    line=dict(color="#00C805", width=3),
+    customdata=frontier["sharpe"], hovertemplate="vol %{x:.2%}<br>return %{y:.2%}<br>Sharpe %{customdata:.2f}",
+))
+fig.add_trace(go.Scatter(
+    x=assets["volatility"], y=assets["return"], mode="markers+text", name="Assets",
+    text=assets.index, textposition="top center", marker=dict(size=8, color="gray"),
+))
+for name, p in portfolios.items():
+    fig.add_trace(go.Scatter(
+        x=[p["volatility"]], y=[p["return"]], mode="markers", name=name,
+        marker=dict(size=16, symbol=MARKERS[name]),
+    ))
+fig.update_layout(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    xaxis=dict(title="Annualized volatility", tickformat=".0%", showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
+    yaxis=dict(title="Annualized return", tickformat=".0%", showgrid=True, gridcolor='rgba(128,128,128,0.2)'),
+    height=550
+)
+st.plotly_chart(fig, use_container_width=True)
+
+# --- WEIGHTS ---
+col_w, col_f = st.columns(2)
+with col_w:
+    st.subheader("Weights")
+    weights = pd.DataFrame({name: p["weights"] for name, p in portfolios.items()})
+    weights = weights[(weights > 1e-4).any(axis=1)]
+    st.dataframe(weights.style.format("{:.1%}"), use_container_width=True)
+
+with col_f:
+    st.subheader("Frontier portfolio")
+    point = st.slider("Target return", 0, len(frontier) - 1, len(frontier) // 2,
+                      format=" ", help="From minimum variance (left) to maximum return (right)")
+    chosen = report["frontier_weights"].iloc[point]
+    chosen = chosen[chosen > 1e-4].sort_values(ascending=False)
+    st.caption(f"Return {frontier['return'].iloc[point]:.2%} · volatility {frontier['volatility'].iloc[point]:.2%} "
+               f"· Sharpe {frontier['sharpe'].iloc[point]:.2f}")
+    pie = go.Figure(go.Pie(labels=chosen.index, values=chosen.to_numpy(), hole=0.4))
+    pie.update_layout(paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=10, b=10, l=10, r=10), height=320)
+    st.plotly_chart(pie, use_container_width=True)
+
+# --- CORRELATION ---
+with st.expander("Correlation matrix"):
+    corr = report["correlation"]
+    heat = go.Figure(go.Heatmap(z=corr.to_numpy(), x=corr.columns, y=corr.index, zmin=-1, zmax=1,
+                                colorscale="RdBu", reversescale=True))
+    heat.update_layout(paper_bgcolor='rgba(0,0,0,0)', height=max(300, 25 * len(corr)))
+    st.plotly_chart(heat, use_container_width=True)
+
+st.caption(f"*{report['lookback']} of {'weekly' if portfolio.LOOKBACKS[lookback]['per_year'] == 52 else 'daily'} "
+           "returns. Past returns are not a forecast.*")
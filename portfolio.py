@@ -0,0 +1,379 @@
+"""
+Long-only portfolio construction over any set of tracked tickers: minimum
+variance, maximum Sharpe, risk parity and the efficient frontier, with an
+optional cap on every weight.
+
+Expected returns and covariances come from the shared bar cache (the same
+bars the dashboard's 1Y/5Y views use), aligned on a fixed grid of dates. Per
+lookback, the return panel is kept with its running sums of cross-products, so
+a new day is a rank-k update, a symbol whose bars changed costs one row, and
+asking again for known symbols costs nothing.
+
+Optimizers minimize 1/2 w'Cw - g m'w over the capped simplex with accelerated
+projected gradient. The frontier solves all its points at once as one matrix
+iteration (one g per column).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from instrumentation import timed
+
+# lookback -> dashboard timeframe whose cached bars are used, grid frequency,
+# returns in the window, periods per year
+LOOKBACKS = {
+    "1Y": {"timeframe": "1Y", "freq": "B", "observations": 252, "per_year": 252},
+    "2Y": {"timeframe": "1Y", "freq": "B", "observations": 504, "per_year": 252},
+    "5Y": {"timeframe": "5Y", "freq": "W-FRI", "observations": 260, "per_year": 52},
+}
+DEFAULT_LOOKBACK = "1Y"
+RISK_FREE_RATE = 0.02  # same as the quantitative report's Sharpe ratio
+FRONTIER_POINTS = 100
+MAX_ASSETS = 200
+# Symbols with prices on fewer grid dates than this are left out
+MIN_COVERAGE = 0.8
+# Symbols kept per lookback panel before it is rebuilt from the request alone
+MAX_PANEL_SYMBOLS = 1000
+
+MAX_ITER = 3000
+TOLERANCE = 1e-9
+
+
+class CovarianceCache:
+    """
+    Returns of a lookback window on a fixed date grid (rows: dates, columns:
+    symbols) with the running sums sum(r r') and sum(r) the moments come from.
+    Missing prices count as zero returns.
+    """
+
+    def __init__(self, freq, observations):
+        self.freq = freq
+        self.observations = observations
+        self.grid = None  # observations + 1 price dates
+        self.symbols = []
+        self.position = {}
+        self.stamps = {}  # symbol -> (last bar, last close) its column was built from
+        self.returns = np.zeros((observations, 0))
+        self.coverage = np.zeros(0)
+        self.cross = np.zeros((0, 0))
+        self.sums = np.zeros(0)
+
+    def _make_grid(self, today=None):
+        end = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+        return pd.date_range(end=end, periods=self.observations + 1, freq=self.freq)
+
+    def _column(self, df, grid):
+        # Simple returns between grid dates, from the last close on or before each
+        close = df["Close"].astype(float).dropna()
+        index = close.index.tz_localize(None) if close.index.tz is not None else close.index
+        close = pd.Series(close.to_numpy(), index=index.normalize())
+        close = close.groupby(level=0).last()
+        prices = close.reindex(grid, method="ffill").to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = prices[1:] / prices[:-1] - 1
+        valid = np.isfinite(returns)
+        return np.where(valid, returns, 0.0), valid.mean()
+
+    def _reset(self, grid):
+        self.__init__(self.freq, self.observations)
+        self.grid = grid
+
+    def update(self, bars, today=None):
+        """
+        Brings the panel up to date for `bars` ({symbol: frame}): rolls the
+        window forward if the grid moved, then rebuilds only the columns (and
+        their cross-product rows) of new symbols or symbols with new bars.
+        """
+        grid = self._make_grid(today)
+        shift = None
+        if self.grid is not None and grid[0] in self.grid:
+            shift = self.grid.get_loc(grid[0])
+        if shift is None or shift >= self.observations \
+                or len(set(self.symbols) | set(bars)) > MAX_PANEL_SYMBOLS:
+            self._reset(grid)
+            shift = 0
+
+        if shift:
+            # Symbols not in this request can't be rolled forward: drop them
+            kept = [i for i, s in enumerate(self.symbols) if s in bars]
+            old = self.returns[:, kept]
+            self.symbols = [self.symbols[i] for i in kept]
+            self.position = {s: i for i, s in enumerate(self.symbols)}
+            self.stamps = {s: self.stamps[s] for s in self.symbols}
+            self.cross = self.cross[np.ix_(kept, kept)] - old[:shift].T @ old[:shift]
+            self.sums = self.sums[kept] - old[:shift].sum(axis=0)
+            self.coverage = self.coverage[kept]
+            self.returns = np.vstack([old[shift:], np.zeros((shift, len(kept)))])
+            self.grid = grid
+
+        dirty = []
+        for symbol, df in bars.items():
+            if df is None or df.empty:
+                continue
+            stamp = (df.index[-1], float(df["Close"].iloc[-1]))
+            j = self.position.get(symbol)
+            if j is not None and not shift and self.stamps[symbol] == stamp:
+                continue
+            column, coverage = self._column(df, grid)
+            if j is None:
+                j = len(self.symbols)
+                self.symbols.append(symbol)
+                self.position[symbol] = j
+                self.returns = np.column_stack([self.returns, column])
+                self.coverage = np.append(self.coverage, coverage)
+                self.sums = np.append(self.sums, 0.0)
+                self.cross = np.pad(self.cross, ((0, 1), (0, 1)))
+                dirty.append(j)
+            else:
+                # Bars restated inside the window (e.g. dividend adjustment): full row
+                if not np.allclose(self.returns[:self.observations - shift, j], column[:self.observations - shift]):
+                    dirty.append(j)
+                self.returns[:, j] = column
+                self.coverage[j] = coverage
+            self.stamps[symbol] = stamp
+
+        if shift:
+            # Rank-k update with the rows that entered the window
+            entered = self.returns[-shift:]
+            self.cross += entered.T @ entered
+            self.sums += entered.sum(axis=0)
+        if dirty:
+            rows = self.returns.T @ self.returns[:, dirty]
+            self.cross[:, dirty] = rows
+            self.cross[dirty, :] = rows.T
+            self.sums[dirty] = self.returns[:, dirty].sum(axis=0)
+
+    def moments(self, symbols, per_year):
+        """
+        Annualized mean returns and covariance matrix of `symbols`.
+        """
+        ix = [self.position[s] for s in symbols]
+        n = self.observations
+        mean = self.sums[ix] / n
+        cov = (self.cross[np.ix_(ix, ix)] - n * np.outer(mean, mean)) / (n - 1)
+        return mean * per_year, cov * per_year
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+@timed("compute.covariance")
+def covariance(tickers, lookback=DEFAULT_LOOKBACK):
+    """
+    (symbols, expected returns Series, covariance DataFrame, excluded symbols)
+    for `tickers` over a lookback, from the cached bars (batched download only
+    for symbols not cached yet).
+    """
+    spec = LOOKBACKS[lookback]
+    params = market_data.FETCH_PARAMS[spec["timeframe"]]
+    bars = market_data.get_bars_batch(tickers, params["period"], params["interval"])
+    with _lock:
+        cache = _caches.get(lookback)
+        if cache is None:
+            cache = _caches[lookback] = CovarianceCache(spec["freq"], spec["observations"])
+        cache.update(bars)
+        symbols = [t for t in dict.fromkeys(tickers)
+                   if t in cache.position and cache.coverage[cache.position[t]] >= MIN_COVERAGE]
+        mean, cov = cache.moments(symbols, spec["per_year"])
+    excluded = [t for t in dict.fromkeys(tickers) if t not in symbols]
+    return symbols, pd.Series(mean, index=symbols), pd.DataFrame(cov, index=symbols, columns=symbols), excluded
+
+
+# --- Optimizers (plain arrays: m is a vector, C a matrix) ---
+
+def project_capped_simplex(v, cap=1.0):
+    """
+    Euclidean projection of every column of `v` onto {w : sum(w) = 1,
+    0 <= w <= cap}, i.e. clip(v - t, 0, cap) with the shift t that makes each
+    column sum to one. The sum is piecewise linear in t with kinks at v and
+    v - cap: sort the kinks, walk them with cumulative sums, interpolate.
+    """
+    v = np.asarray(v, dtype=float)
+    column = v.ndim == 1
+    if column:
+        v = v[:, None]
+    n = v.shape[0]
+    kinks = np.concatenate([v - cap, v])
+    # Past a kink at v - cap a weight leaves the cap (+1 free), past v it hits zero (-1)
+    kind = np.concatenate([np.ones_like(v), -np.ones_like(v)])
+    order = np.argsort(kinks, axis=0)
+    kinks = np.take_along_axis(kinks, order, axis=0)
+    free = np.cumsum(np.take_along_axis(kind, order, axis=0), axis=0)
+    # Sum at every kink, from n * cap (all capped) down to 0 (all zero)
+    total = n * cap - np.concatenate([np.zeros((1, v.shape[1])), np.cumsum(free[:-1] * np.diff(kinks, axis=0), axis=0)])
+    # Last kink where the sum is still >= 1, then linear inside its segment
+    j = np.clip((total >= 1).sum(axis=0) - 1, 0, 2 * n - 1)
+    cols = np.arange(v.shape[1])
+    tau = kinks[j, cols] + (total[j, cols] - 1) / np.maximum(free[j, cols], 1)
+    w = np.clip(v - tau, 0, cap)
+    return w[:, 0] if column else w
+
+
+def _solve(mean, cov, gammas, cap, start=None):
+    """
+    Minimizes 1/2 w'Cw - g m'w over the capped simplex for every g in
+    `gammas` at once (one column each), by FISTA with adaptive restart.
+    """
+    gammas = np.atleast_1d(np.asarray(gammas, dtype=float))
+    n = len(mean)
+    step = 1.0 / max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    pull = np.outer(mean, gammas)
+    w = start if start is not None else project_capped_simplex(np.full((n, len(gammas)), 1.0 / n), cap)
+    y = w.copy()
+    t = np.ones(len(gammas))
+    for _ in range(MAX_ITER):
+        w_next = project_capped_simplex(y - step * (cov @ y - pull), cap)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        # Restart momentum on columns where it points uphill
+        restart = ((y - w_next) * (w_next - w)).sum(axis=0) > 0
+        t_next = np.where(restart, 1.0, t_next)
+        momentum = np.where(restart, 0.0, (t - 1) / t_next)
+        y = w_next + momentum * (w_next - w)
+        converged = np.abs(w_next - w).max() < TOLERANCE
+        w, t = w_next, t_next
+        if converged:
+            break
+    return w
+
+
+def _max_return(mean, cap):
+    # Fill the best assets up to the cap
+    w = np.zeros(len(mean))
+    left = 1.0
+    for i in np.argsort(-mean):
+        w[i] = min(cap, left)
+        left -= w[i]
+        if left <= 0:
+            break
+    return w
+
+
+def _gamma_scale(mean, cov):
+    # Return weight beyond which the variance term no longer matters
+    spread = max(np.ptp(mean), 1e-12)
+    return 100 * max(np.linalg.eigvalsh(cov)[-1], 1e-12) / spread
+
+
+def min_variance(cov, cap=1.0):
+    """
+    Long-only minimum-variance weights.
+    """
+    return _solve(np.zeros(len(cov)), cov, [0.0], cap)[:, 0]
+
+
+def efficient_frontier(mean, cov, cap=1.0, points=FRONTIER_POINTS):
+    """
+    (gammas, weights) of `points` frontier portfolios from minimum variance to
+    maximum return, roughly evenly spaced in return: a sweep over g locates
+    the target returns, then all points are solved together warm-started.
+    weights has one column per point.
+    """
+    sweep = np.concatenate([[0.0], _gamma_scale(mean, cov) * np.logspace(-6, 0, points - 1)])
+    weights = _solve(mean, cov, sweep, cap)
+    returns = np.maximum.accumulate(mean @ weights)
+
+    targets = np.linspace(returns[0], max(returns[-1], mean @ _max_return(mean, cap)), points)
+    position = np.interp(targets, returns, np.arange(points))
+    gammas = np.interp(position, np.arange(points), sweep)
+    start = weights[:, np.rint(position).astype(int)]
+    return gammas, _solve(mean, cov, gammas, cap, start=start)
+
+
+def _sharpe(w, mean, cov, risk_free):
+    vol = np.sqrt(max(w @ cov @ w, 0))
+    return (mean @ w - risk_free) / vol if vol > 0 else -np.inf
+
+
+def max_sharpe(mean, cov, cap=1.0, risk_free=RISK_FREE_RATE, frontier=None, refine=32):
+    """
+    Weights of the frontier portfolio with the highest Sharpe ratio: best
+    point of the frontier (computed if not given), refined by solving
+    `refine` more points between its neighbours in one batch.
+    """
+    gammas, weights = frontier if frontier is not None else efficient_frontier(mean, cov, cap, points=25)
+    ratios = [_sharpe(weights[:, k], mean, cov, risk_free) for k in range(weights.shape[1])]
+    best = int(np.argmax(ratios))
+    lo, hi = gammas[max(best - 1, 0)], gammas[min(best + 1, len(gammas) - 1)]
+    start = np.repeat(weights[:, [best]], refine, axis=1)
+    dense = _solve(mean, cov, np.linspace(lo, hi, refine), cap, start=start)
+    candidates = [weights[:, best]] + [dense[:, k] for k in range(refine)]
+    return max(candidates, key=lambda w: _sharpe(w, mean, cov, risk_free))
+
+
+def risk_parity(cov, cap=1.0, budgets=None):
+    """
+    Long-only weights with equal (or `budgets`) risk contributions, by Newton's
+    method on min 1/2 y'Cy - sum(b log y) (w = y / sum(y)). With a cap that
+    binds, returns the closest capped weights.
+    """
+    n = len(cov)
+    b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+    y = 1 / np.sqrt(np.maximum(np.diag(cov), 1e-12))
+    y *= np.sqrt(1 / max(y @ cov @ y, 1e-12))
+
+    def objective(y):
+        return 0.5 * y @ cov @ y - b @ np.log(y)
+
+    for _ in range(100):
+        grad = cov @ y - b / y
+        if np.abs(grad).max() < 1e-10:
+            break
+        step = np.linalg.solve(cov + np.diag(b / y ** 2), grad)
+        alpha, current = 1.0, objective(y)
+        while alpha > 1e-8:
+            candidate = y - alpha * step
+            if (candidate > 0).all() and objective(candidate) <= current:
+                break
+            alpha /= 2
+        y = candidate if (candidate > 0).all() else y
+    w = y / y.sum()
+    return project_capped_simplex(w, cap) if w.max() > cap else w
+
+
+def _stats(w, mean, cov, risk_free):
+    vol = float(np.sqrt(max(w @ cov @ w, 0)))
+    ret = float(mean @ w)
+    return {"return": ret, "volatility": vol, "sharpe": (ret - risk_free) / vol if vol > 0 else np.nan}
+
+
+@timed("compute.portfolio")
+def optimize(tickers, lookback=DEFAULT_LOOKBACK, cap=1.0, risk_free=RISK_FREE_RATE, points=FRONTIER_POINTS):
+    """
+    Portfolio report for `tickers`: minimum variance, maximum Sharpe and risk
+    parity portfolios ({"weights", "return", "volatility", "sharpe"}), the
+    efficient frontier and each asset's own return and volatility.
+    """
+    tickers = list(dict.fromkeys(tickers))[:MAX_ASSETS]
+    symbols, mean, cov, excluded = covariance(tickers, lookback)
+    if len(symbols) < 2:
+        return {"valid": False, "message": "Need price history for at least two assets.", "excluded": excluded}
+    if cap * len(symbols) < 1:
+        return {"valid": False, "message": f"A {cap:.0%} cap needs at least {int(np.ceil(1 / cap))} assets.",
+                "excluded": excluded}
+
+    m, c = mean.to_numpy(), cov.to_numpy()
+    gammas, weights = efficient_frontier(m, c, cap, points)
+    portfolios = {
+        "Minimum Variance": weights[:, 0],
+        "Maximum Sharpe": max_sharpe(m, c, cap, risk_free, frontier=(gammas, weights)),
+        "Risk Parity": risk_parity(c, cap),
+    }
+    frontier = pd.DataFrame([_stats(weights[:, k], m, c, risk_free) for k in range(points)])
+    vols = np.sqrt(np.diag(c))
+    return {
+        "valid": True,
+        "symbols": symbols,
+        "excluded": excluded,
+        "lookback": lookback,
+        "portfolios": {
+            name: {"weights": pd.Series(w, index=symbols), **_stats(w, m, c, risk_free)}
+            for name, w in portfolios.items()
+        },
+        "frontier": frontier,
+        "frontier_weights": pd.DataFrame(weights.T, columns=symbols),
+        "assets": pd.DataFrame({"return": m, "volatility": vols}, index=symbols),
+        "correlation": pd.DataFrame(c / np.outer(vols, vols), index=symbols, columns=symbols),
+    }
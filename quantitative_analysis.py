@@ -1,14 +1,15 @@
 import pandas as pd
 import numpy as np
+from instrumentation import timed
 
+@timed("compute.analyze_quantitative")
 def analyze_quantitative(df):
     """
-    Calculates quantitative metrics from historical price data.
+    Calculates quantitative metrics from historical price data (`df` is not modified).
     """
     if len(df) < 50:
         return {"valid": False, "message": "Need more data for Quant analysis"}
 
-    df = df.copy()
     close_prices = df['Close']
     
     # Daily Returns
@@ -26,7 +27,8 @@ def analyze_quantitative(df):
     # We will compute stats on the provided data, noting the frequency is important.
     # For robust simple stats, we'll calculate basic distribution metrics.
     
-    volatility = returns.std() * np.sqrt(252) # Standard annualized assumption
+    std = returns.std()
+    volatility = std * np.sqrt(252) # Standard annualized assumption
     
     # 2. Distribution
     skewness = returns.skew()
@@ -37,13 +39,13 @@ def analyze_quantitative(df):
     
     # Sharpe Ratio Proxy (Risk Free Rate = 2% approx 0.02)
     risk_free_daily = 0.02 / 252
-    excess_return = returns - risk_free_daily
-    sharpe_ratio = (excess_return.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0
+    excess_return = returns.mean() - risk_free_daily
+    sharpe_ratio = (excess_return / std) * np.sqrt(252) if std != 0 else 0
     
     # 4. VaR (Value at Risk) - 95% Confidence
     var_95 = np.percentile(returns, 5)
     
-    return {
+    report = {
         "valid": True,
         "metrics": {
             "Annualized Volatility": f"{volatility:.2%}",
@@ -55,3 +57,125 @@ def analyze_quantitative(df):
         },
         "count": len(returns)
     }
+
+    # Same annualization as above; needs the Open/High/Low columns
+    if all(col in df.columns for col in OHLC_COLUMNS):
+        report["range_volatility"] = volatility_estimators(df)
+    return report
+
+
+# --- Range-based volatility estimators ---
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+ESTIMATORS = {
+    "close_to_close": "Close-to-Close",
+    "parkinson": "Parkinson",
+    "garman_klass": "Garman-Klass",
+    "rogers_satchell": "Rogers-Satchell",
+    "yang_zhang": "Yang-Zhang",
+}
+CONE_HORIZONS = [5, 10, 21, 63, 126, 252]
+PERIODS_PER_YEAR = 252
+
+
+def _log_ranges(df):
+    """
+    Per-bar log ratios as Series: overnight ln(O/C_prev), ln(H/O), ln(L/O),
+    ln(C/O) and close-to-close ln(C/C_prev). Bad prices give NaN, not errors.
+    """
+    o, h, l, c = (df[col].to_numpy(dtype=float) for col in OHLC_COLUMNS)
+    prev_close = np.concatenate([[np.nan], c[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = {
+            "overnight": np.log(o / prev_close),
+            "high": np.log(h / o),
+            "low": np.log(l / o),
+            "body": np.log(c / o),
+            "close": np.log(c / prev_close),
+        }
+    return {name: pd.Series(np.where(np.isfinite(v), v, np.nan), index=df.index) for name, v in logs.items()}
+
+
+def _variance_terms(logs):
+    """
+    Per-bar variance contributions of the single-bar estimators.
+    """
+    hl = logs["high"] - logs["low"]
+    u, d, c = logs["high"], logs["low"], logs["body"]
+    return {
+        "parkinson": hl ** 2 / (4 * np.log(2)),
+        "garman_klass": 0.5 * hl ** 2 - (2 * np.log(2) - 1) * c ** 2,
+        "rogers_satchell": u * (u - c) + d * (d - c),
+    }
+
+
+def _yang_zhang_k(n):
+    return 0.34 / (1.34 + (n + 1) / (n - 1))
+
+
+def volatility_estimators(df, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Annualized volatility over the whole frame from each estimator: close-to-
+    close, Parkinson (high-low), Garman-Klass (high-low and open-close),
+    Rogers-Satchell (drift-independent) and Yang-Zhang (adds overnight gaps).
+    """
+    logs = _log_ranges(df)
+    terms = _variance_terms(logs)
+    n = int(logs["overnight"].count())
+    variances = {
+        "close_to_close": logs["close"].var(),
+        **{name: term.mean() for name, term in terms.items()},
+    }
+    if n > 1:
+        k = _yang_zhang_k(n)
+        variances["yang_zhang"] = logs["overnight"].var() + k * logs["body"].var() + (1 - k) * variances["rogers_satchell"]
+    else:
+        variances["yang_zhang"] = np.nan
+    return {name: float(np.sqrt(max(v, 0) * periods_per_year)) if pd.notna(v) else np.nan
+            for name, v in variances.items()}
+
+
+def _rolling_variance(logs, terms, name, window):
+    # One rolling pass per term of the named estimator
+    if name == "close_to_close":
+        return logs["close"].rolling(window).var()
+    if name in terms:
+        return terms[name].rolling(window).mean()
+    k = _yang_zhang_k(window)
+    return (logs["overnight"].rolling(window).var()
+            + k * logs["body"].rolling(window).var()
+            + (1 - k) * terms["rogers_satchell"].rolling(window).mean())
+
+
+def rolling_volatility(df, window=21, periods_per_year=PERIODS_PER_YEAR, estimators=None):
+    """
+    Annualized rolling volatility over `window` bars, one column per estimator
+    (all of ESTIMATORS by default).
+    """
+    logs = _log_ranges(df)
+    terms = _variance_terms(logs)
+    names = estimators or list(ESTIMATORS)
+    out = pd.DataFrame({name: _rolling_variance(logs, terms, name, window) for name in names}, index=df.index)
+    return np.sqrt(out.clip(lower=0) * periods_per_year)
+
+
+def volatility_cone(df, horizons=CONE_HORIZONS, estimator="yang_zhang", periods_per_year=PERIODS_PER_YEAR):
+    """
+    Realized-volatility cone: for each horizon (bars) the min, quartiles, max
+    and latest value of the rolling estimator over the whole history.
+    Horizons longer than the history are skipped.
+    """
+    logs = _log_ranges(df)
+    terms = _variance_terms(logs)
+    rows = {}
+    for horizon in horizons:
+        if horizon >= len(df):
+            continue
+        variance = _rolling_variance(logs, terms, estimator, horizon)
+        series = np.sqrt(variance.clip(lower=0) * periods_per_year).dropna()
+        if series.empty:
+            continue
+        q = series.quantile([0.0, 0.25, 0.5, 0.75, 1.0]).to_numpy()
+        rows[horizon] = {"min": q[0], "p25": q[1], "median": q[2], "p75": q[3], "max": q[4],
+                         "current": series.iloc[-1]}
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["min", "p25", "median", "p75", "max", "current"])
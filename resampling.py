@@ -0,0 +1,137 @@
+import pandas as pd
+
+# Intraday bar sizes we can build locally from finer bars.
+INTERVAL_DELTA = {
+    "1m": pd.Timedelta(minutes=1),
+    "2m": pd.Timedelta(minutes=2),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "60m": pd.Timedelta(hours=1),
+    "1h": pd.Timedelta(hours=1),
+    "90m": pd.Timedelta(minutes=90),
+}
+
+# How far back Yahoo serves each intraday interval (days).
+MAX_LOOKBACK_DAYS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "60m": 730,
+    "1h": 730,
+    "90m": 60,
+}
+
+# Approximate calendar length of the yfinance period strings.
+PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+# Columns of a yfinance frame and how each one aggregates into a coarser bar.
+OHLCV_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Adj Close": "last",
+    "Volume": "sum",
+}
+
+# Source intervals to try when deriving, finest first.
+SOURCE_INTERVALS = ["1m", "5m", "15m", "1h"]
+
+
+def can_derive(source_interval, target_interval):
+    """
+    True if `target_interval` bars can be built by aggregating `source_interval` bars.
+    """
+    if source_interval not in INTERVAL_DELTA or target_interval not in INTERVAL_DELTA:
+        return False
+    source = INTERVAL_DELTA[source_interval]
+    target = INTERVAL_DELTA[target_interval]
+    return target > source and target % source == pd.Timedelta(0)
+
+
+def covers(source_period, target_period):
+    """
+    True if a download over `source_period` spans at least `target_period`.
+    """
+    if source_period not in PERIOD_DAYS or target_period not in PERIOD_DAYS:
+        return False
+    return PERIOD_DAYS[source_period] >= PERIOD_DAYS[target_period]
+
+
+def source_interval(period, interval):
+    """
+    Finest interval Yahoo serves for `period` that `interval` can be derived from.
+    Returns `interval` itself when nothing finer is available.
+    """
+    days = PERIOD_DAYS.get(period)
+    if days is None or interval not in INTERVAL_DELTA:
+        return interval
+    for candidate in SOURCE_INTERVALS:
+        if candidate == interval:
+            break
+        if can_derive(candidate, interval) and days <= MAX_LOOKBACK_DAYS[candidate]:
+            return candidate
+    return interval
+
+
+def session_buckets(index, freq):
+    """
+    Assigns each timestamp to a bucket of width `freq` anchored at the first bar
+    of its session (calendar day in the exchange's timezone), so hourly bars of a
+    9:30 open land on 9:30, 10:30, ... like Yahoo's own bars.
+    """
+    day = index.normalize()
+    session_start = pd.Series(index, index=index).groupby(day).transform("min")
+    session_start = pd.DatetimeIndex(session_start.to_numpy(), tz=index.tz)
+    offset = (index - session_start) // freq
+    return session_start + offset * freq
+
+
+def resample_ohlcv(df, interval):
+    """
+    Aggregates intraday OHLCV bars into coarser `interval` bars
+    (first/max/min/last/sum), with session-aware bucket alignment.
+    """
+    if df.empty:
+        return df
+
+    freq = INTERVAL_DELTA[interval]
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in df.columns}
+    buckets = session_buckets(df.index, freq)
+
+    out = df[list(agg)].groupby(buckets).agg(agg)
+    out.index.name = df.index.name
+    # Buckets without any trades (e.g. halts) come back as all-NaN rows
+    return out.dropna(subset=["Close"])
+
+
+def trim_to_period(df, period):
+    """
+    Cuts a longer history down to what a direct download of `period` returns.
+    "Nd" periods count trading sessions, longer ones calendar time.
+    """
+    if df.empty or period not in PERIOD_DAYS:
+        return df
+
+    if period.endswith("d"):
+        sessions = df.index.normalize().unique()
+        n = int(period[:-1])
+        if len(sessions) <= n:
+            return df
+        return df[df.index >= sessions[-n]]
+
+    start = df.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])
+    return df[df.index >= start]
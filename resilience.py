@@ -0,0 +1,238 @@
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import pandas as pd
+
+from instrumentation import count, span
+
+# Per-source defaults: how long a slow call may block a page (seconds), and
+# how many consecutive failures open the breaker / how long it stays open.
+SOURCES = {
+    "yahoo": {"budget": 15.0, "failure_threshold": 3, "reset_timeout": 60},
+    "fred": {"budget": 8.0, "failure_threshold": 3, "reset_timeout": 120},
+    "alternative.me": {"budget": 4.0, "failure_threshold": 3, "reset_timeout": 120},
+    "rss": {"budget": 8.0, "failure_threshold": 3, "reset_timeout": 300},
+}
+
+# Upstream calls run here so a caller can stop waiting without killing them.
+# Background refreshes get their own pool so they never starve the calls they wait on.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream")
+_background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="revalidate")
+
+
+class SourceUnavailable(Exception):
+    """Raised when a source's breaker is open or a call exceeded its budget."""
+
+    def __init__(self, message, value=None):
+        super().__init__(message)
+        # What the call returned when it was rejected as invalid (e.g. a fallback)
+        self.value = value
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After `failure_threshold` consecutive failures
+    it opens and rejects calls for `reset_timeout` seconds, then lets a single
+    trial call through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(source):
+    with _breakers_lock:
+        if source not in _breakers:
+            conf = SOURCES.get(source, {})
+            _breakers[source] = CircuitBreaker(
+                source,
+                failure_threshold=conf.get("failure_threshold", 3),
+                reset_timeout=conf.get("reset_timeout", 60),
+            )
+        return _breakers[source]
+
+
+def breaker_states():
+    with _breakers_lock:
+        return {name: b.state for name, b in _breakers.items()}
+
+
+def is_valid(value):
+    """
+    Default success test for the fetch_* functions, which swallow errors and
+    return None / empty containers instead of raising.
+    """
+    if value is None:
+        return False
+    if isinstance(value, pd.DataFrame):
+        return not value.empty
+    if isinstance(value, (dict, list)):
+        return len(value) > 0
+    return True
+
+
+def call(source, fn, *args, budget=None, valid=is_valid, **kwargs):
+    """
+    Runs an upstream call through the source's breaker and latency budget.
+    Raises SourceUnavailable if the breaker is open, the budget is exceeded,
+    or the result fails `valid`.
+    """
+    b = breaker(source)
+    if not b.allow():
+        count("upstream_calls", source=source, result="rejected")
+        raise SourceUnavailable(f"{source}: circuit open")
+
+    budget = budget if budget is not None else SOURCES.get(source, {}).get("budget", 10.0)
+    future = _executor.submit(fn, *args, **kwargs)
+    try:
+        with span(f"upstream.{source}"):
+            value = future.result(timeout=budget)
+    except TimeoutError:
+        b.record_failure()
+        count("upstream_calls", source=source, result="timeout")
+        raise SourceUnavailable(f"{source}: no answer within {budget:g}s")
+    except Exception:
+        b.record_failure()
+        count("upstream_calls", source=source, result="error")
+        raise
+
+    if not valid(value):
+        b.record_failure()
+        count("upstream_calls", source=source, result="invalid")
+        raise SourceUnavailable(f"{source}: empty or invalid response", value=value)
+    b.record_success()
+    count("upstream_calls", source=source, result="ok")
+    return value
+
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def revalidate(key, fn, *args, **kwargs):
+    """
+    Schedules `fn(*args, **kwargs)` in the background unless a refresh for
+    `key` is already running. Used to refresh stale cache entries.
+    """
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Background refresh {key} failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _background.submit(run)
+
+
+def resilient(source, ttl, default=None, valid=is_valid):
+    """
+    Stale-while-revalidate wrapper for a fetch_* function.
+
+    - Fresh cached value: returned at once.
+    - Stale value: returned at once, and refreshed in the background.
+    - Nothing cached yet: called within the source's latency budget; on failure
+      the function's own fallback result (or `default`) is returned.
+
+    `wrapper.status(*args)` reports {"stale", "age", "breaker"} for the last call.
+    """
+    def decorator(fn):
+        store = {}  # args -> (fetched_at, value)
+        lock = threading.Lock()
+
+        def refresh(key, args, kwargs):
+            value = call(source, fn, *args, valid=valid, **kwargs)
+            with lock:
+                store[key] = (time.time(), value)
+            return value
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(f"fetch.{fn.__name__}"):
+                return lookup(args, kwargs)
+
+        def lookup(args, kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            entry = store.get(key)
+            if entry is not None:
+                if time.time() - entry[0] >= ttl:
+                    count("cache_requests", cache=fn.__name__, result="stale")
+                    if breaker(source).state != "open":
+                        revalidate((fn.__qualname__, key), refresh, key, args, kwargs)
+                else:
+                    count("cache_requests", cache=fn.__name__, result="hit")
+                return entry[1]
+
+            count("cache_requests", cache=fn.__name__, result="miss")
+            try:
+                return refresh(key, args, kwargs)
+            except SourceUnavailable as e:
+                print(f"{fn.__name__}: {e}")
+                # The function's own fallback result, if it produced one
+                if e.value is not None:
+                    return e.value
+            except Exception as e:
+                print(f"{fn.__name__} failed: {e}")
+            return default() if callable(default) else default
+
+        def status(*args, **kwargs):
+            entry = store.get((args, tuple(sorted(kwargs.items()))))
+            age = None if entry is None else time.time() - entry[0]
+            return {
+                "stale": entry is None or age >= ttl,
+                "age": age,
+                "breaker": breaker(source).state,
+            }
+
+        wrapper.status = status
+        return wrapper
+    return decorator
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Lookback horizons as calendar offsets. "YTD" is handled separately.
+HORIZONS = {
+    "1D": None,
+    "1W": pd.DateOffset(weeks=1),
+    "1M": pd.DateOffset(months=1),
+    "3M": pd.DateOffset(months=3),
+    "YTD": "YTD",
+    "1Y": pd.DateOffset(years=1),
+}
+
+# RRG smoothing (weeks) and how many weekly points each tail shows.
+RRG_WINDOW = 10
+RRG_TAIL = 8
+
+
+def horizon_returns(closes, horizons=HORIZONS):
+    """
+    % return of every column over every horizon, computed with one as-of lookup
+    per horizon on the whole frame. Returns horizons x symbols.
+    """
+    closes = closes.ffill()
+    last_date = closes.index[-1]
+    last = closes.iloc[-1]
+
+    out = {}
+    for name, offset in horizons.items():
+        if offset is None:
+            base = closes.iloc[-2] if len(closes) > 1 else last
+        elif offset == "YTD":
+            # Last close of the previous year
+            base = closes.asof(pd.Timestamp(year=last_date.year, month=1, day=1, tz=last_date.tz) - pd.Timedelta(days=1))
+        else:
+            base = closes.asof(last_date - offset)
+        out[name] = (last / base - 1) * 100
+    return pd.DataFrame(out).T
+
+
+def relative_strength(returns, benchmark="SPY"):
+    """
+    Return spread (percentage points) of each symbol over the benchmark, per horizon.
+    """
+    return returns.drop(columns=benchmark).sub(returns[benchmark], axis=0)
+
+
+def rrg_series(closes, benchmark="SPY", window=RRG_WINDOW, tail=RRG_TAIL):
+    """
+    Relative Rotation Graph coordinates on weekly closes, in long format
+    (Date, Symbol, RS-Ratio, RS-Momentum). Both axes are centred on 100:
+    RS-Ratio is the normalised trend of price relative to the benchmark and
+    RS-Momentum the normalised rate of change of RS-Ratio.
+    """
+    weekly = closes.ffill().resample("W-FRI").last()
+    rs = weekly.drop(columns=benchmark).div(weekly[benchmark], axis=0) * 100
+
+    def normalise(frame):
+        mean = frame.rolling(window).mean()
+        std = frame.rolling(window).std().replace(0, np.nan)
+        return 100 + (frame - mean) / std
+
+    rs_ratio = normalise(rs)
+    rs_momentum = normalise(rs_ratio.pct_change(fill_method=None))
+
+    ratio = rs_ratio.tail(tail).stack().rename("RS-Ratio")
+    momentum = rs_momentum.tail(tail).stack().rename("RS-Momentum")
+    out = pd.concat([ratio, momentum], axis=1).dropna().reset_index()
+    out.columns = ["Date", "Symbol", "RS-Ratio", "RS-Momentum"]
+    return out
+
+
+def rrg_quadrant(rs_ratio, rs_momentum):
+    if rs_ratio >= 100:
+        return "Leading" if rs_momentum >= 100 else "Weakening"
+    return "Improving" if rs_momentum >= 100 else "Lagging"
@@ -0,0 +1,343 @@
+import collections
+import functools
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Bar spacing per yfinance interval, for synthetic indexes.
+FREQ = {
+    "1m": "1min",
+    "5m": "5min",
+    "15m": "15min",
+    "1h": "1h",
+    "1d": "B",
+    "1wk": "W-FRI",
+}
+
+
+def synthetic_ohlcv(rows, interval="1d", start_price=100.0, seed=0, end=None):
+    """
+    Geometric random walk with consistent Open/High/Low/Close/Volume columns,
+    shaped like a flattened yf.download frame.
+    """
+    rng = np.random.default_rng(seed)
+    # Shrink per-bar volatility on very long series so prices stay realistic
+    sigma = min(0.01, 1.0 / np.sqrt(rows))
+    returns = rng.normal(0.0, sigma, rows)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[start_price], close[:-1]]) * (1 + rng.normal(0, sigma / 5, rows))
+    spread = np.abs(rng.normal(0, sigma / 2, rows)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(100_000, 5_000_000, rows).astype(float)
+
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().floor("min")
+    index = pd.date_range(end=end, periods=rows, freq=FREQ.get(interval, interval))
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def synthetic_yields(days, seed=0):
+    """
+    Daily Treasury yields (%) for the yield_curve tenors, columns in years.
+    """
+    from yield_curve import TENORS
+
+    rng = np.random.default_rng(seed)
+    maturities = np.array(sorted(TENORS.values()))
+    level = 3 + np.cumsum(rng.normal(0, 0.03, days))
+    slope = np.cumsum(rng.normal(0, 0.01, days))
+    curve = level[:, None] + slope[:, None] * np.log1p(maturities)[None, :]
+    curve += rng.normal(0, 0.01, curve.shape)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    return pd.DataFrame(curve, index=index, columns=maturities)
+
+
+# --- Offline stand-in for the upstream APIs (load tests, demos) ---
+
+# Regular-session bars per day for the intraday intervals.
+SESSION_OPEN = "09:30"
+SESSION_MINUTES = 390
+INTRADAY_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "1h": 60, "90m": 90}
+PERIOD_ROWS_CAP = 20_000
+
+
+def _seed(name):
+    return zlib.crc32(name.encode())
+
+
+def _period_days(period):
+    from resampling import PERIOD_DAYS
+
+    if period == "max":
+        return 30 * 365
+    if period == "ytd":
+        return pd.Timestamp.today().dayofyear
+    return PERIOD_DAYS.get(period, 31)
+
+
+def synthetic_bars(symbol, period="1mo", interval="1d"):
+    """
+    Bars shaped like yf.download(symbol, period, interval) after flattening:
+    intraday intervals only cover the 09:30-16:00 session of business days.
+    Prices depend on the symbol only, so every call agrees with the last one.
+    """
+    days = _period_days(period)
+    start_price = 20 + _seed(symbol) % 480
+    if interval in INTRADAY_MINUTES:
+        step = INTRADAY_MINUTES[interval]
+        sessions = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=max(1, days * 5 // 7))
+        offsets = pd.to_timedelta(np.arange(0, SESSION_MINUTES, step), unit="min") + pd.Timedelta(SESSION_OPEN + ":00")
+        index = (sessions.values[:, None] + offsets.values[None, :]).ravel()[-PERIOD_ROWS_CAP:]
+        df = synthetic_ohlcv(len(index), start_price=start_price, seed=_seed(symbol))
+        df.index = pd.DatetimeIndex(index)
+        return df
+    rows = max(1, days * 5 // 7 if interval == "1d" else days // 7)
+    return synthetic_ohlcv(
+        min(rows, PERIOD_ROWS_CAP), interval=interval, start_price=start_price,
+        seed=_seed(symbol), end=pd.Timestamp.today().normalize(),
+    )
+
+
+def _fake_download(tickers, period="1mo", interval="1d", **kwargs):
+    symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+    # Recent yfinance always returns (Price, Ticker) columns, even for one symbol
+    frames = {s: synthetic_bars(s, period, interval) for s in symbols}
+    return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+
+OptionChain = collections.namedtuple("OptionChain", ["calls", "puts", "underlying"])
+
+
+class _FakeTicker:
+    def __init__(self, symbol):
+        self.ticker = symbol
+
+    @property
+    def info(self):
+        rng = np.random.default_rng(_seed(self.ticker))
+        return {
+            "symbol": self.ticker,
+            "currency": "USD",
+            "sector": "Technology",
+            "industry": "Synthetic Data",
+            "longBusinessSummary": f"{self.ticker} is an offline stand-in used for load tests. " * 5,
+            "marketCap": int(rng.integers(1e9, 3e12)),
+            "trailingPE": round(float(rng.uniform(8, 60)), 2),
+            "forwardPE": round(float(rng.uniform(8, 50)), 2),
+            "pegRatio": round(float(rng.uniform(0.5, 3)), 2),
+            "priceToBook": round(float(rng.uniform(1, 20)), 2),
+            "returnOnEquity": float(rng.uniform(-0.1, 0.5)),
+            "returnOnAssets": float(rng.uniform(-0.05, 0.2)),
+            "profitMargins": float(rng.uniform(-0.1, 0.4)),
+            "operatingMargins": float(rng.uniform(-0.1, 0.5)),
+            "debtToEquity": round(float(rng.uniform(0, 200)), 2),
+            "currentRatio": round(float(rng.uniform(0.5, 3)), 2),
+            "quickRatio": round(float(rng.uniform(0.3, 2.5)), 2),
+            "freeCashflow": int(rng.integers(-1e9, 1e11)),
+            "revenueGrowth": float(rng.uniform(-0.2, 0.5)),
+            "earningsGrowth": float(rng.uniform(-0.5, 1.0)),
+            "mostRecentQuarter": int(self._statements(True).columns[0].timestamp()),
+            "lastFiscalYearEnd": int(self._statements(False).columns[0].timestamp()),
+        }
+
+    def _statements(self, quarterly):
+        """
+        Income, balance-sheet and cash-flow items (rows) by period end (columns,
+        newest first) like yfinance's statements: 5 quarters or 4 fiscal years.
+        """
+        rng = np.random.default_rng(_seed(self.ticker) + quarterly)
+        ends = pd.date_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=45),
+                             periods=5 if quarterly else 4, freq="QE" if quarterly else "YE")[::-1]
+        n = len(ends)
+        scale = (1 if quarterly else 4) * float(rng.uniform(1e9, 3e10))
+        revenue = scale * np.exp(np.cumsum(rng.normal(-0.02, 0.05, n)))
+        gross = revenue * rng.uniform(0.3, 0.7)
+        operating = gross * rng.uniform(0.2, 0.7, n)
+        net = operating * rng.uniform(0.6, 0.85, n)
+        assets = np.full(n, scale * rng.uniform(4, 12))
+        equity = assets * rng.uniform(0.2, 0.6)
+        ocf = net * rng.uniform(0.9, 1.4, n)
+        capex = -revenue * rng.uniform(0.02, 0.1, n)
+        return pd.DataFrame({
+            "Total Revenue": revenue,
+            "Gross Profit": gross,
+            "Operating Income": operating,
+            "Net Income": net,
+            "Total Assets": assets,
+            "Stockholders Equity": equity,
+            "Total Debt": assets * rng.uniform(0.1, 0.5),
+            "Cash And Cash Equivalents": assets * rng.uniform(0.05, 0.2),
+            "Current Assets": assets * rng.uniform(0.2, 0.4),
+            "Current Liabilities": assets * rng.uniform(0.1, 0.3),
+            "Ordinary Shares Number": np.full(n, float(rng.integers(1e8, 1e10))),
+            "Operating Cash Flow": ocf,
+            "Capital Expenditure": capex,
+            "Free Cash Flow": ocf + capex,
+        }, index=ends).T
+
+    @property
+    def quarterly_income_stmt(self):
+        return self._statements(True).loc[["Total Revenue", "Gross Profit", "Operating Income", "Net Income"]]
+
+    @property
+    def income_stmt(self):
+        return self._statements(False).loc[["Total Revenue", "Gross Profit", "Operating Income", "Net Income"]]
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._statements(True).iloc[4:11]
+
+    @property
+    def balance_sheet(self):
+        return self._statements(False).iloc[4:11]
+
+    @property
+    def quarterly_cashflow(self):
+        return self._statements(True).iloc[11:]
+
+    @property
+    def cashflow(self):
+        return self._statements(False).iloc[11:]
+
+    @property
+    def news(self):
+        return [
+            {
+                "title": f"{self.ticker} headline {i}",
+                "link": f"https://example.com/{self.ticker}/{i}",
+                "provider": {"displayName": "Offline Wire"},
+            }
+            for i in range(10)
+        ]
+
+    def history(self, period="1mo", interval="1d", **kwargs):
+        return synthetic_bars(self.ticker, period, interval)
+
+    @property
+    def options(self):
+        if self.ticker.endswith("-USD") or self.ticker.startswith("^"):
+            return ()
+        fridays = pd.date_range(pd.Timestamp.today().normalize(), periods=12, freq="W-FRI")
+        monthly = pd.date_range(fridays[-1], periods=6, freq="WOM-3FRI")[1:]
+        return tuple(d.strftime("%Y-%m-%d") for d in fridays.append(monthly))
+
+    def option_chain(self, expiry):
+        """
+        Calls and puts priced off a skewed smile, with a 2% bid/ask spread.
+        """
+        from options_analysis import bs_price
+
+        spot = float(synthetic_bars(self.ticker, "1mo", "1d")["Close"].iloc[-1])
+        t = max((pd.Timestamp(expiry) - pd.Timestamp.today()).days + 0.5, 0.5) / 365
+        strikes = np.round(spot * np.linspace(0.6, 1.4, 81), 1)
+        x = np.log(strikes / spot)
+        sigma = 0.25 + 0.4 * x ** 2 - 0.15 * x + 0.05 / np.sqrt(t * 12)
+        sides = {}
+        for kind in ("call", "put"):
+            price = bs_price(spot, strikes, t, 0.04, sigma, kind == "call")
+            sides[kind] = pd.DataFrame({
+                "contractSymbol": [f"{self.ticker}{expiry.replace('-', '')}{kind[0].upper()}{k:08.1f}" for k in strikes],
+                "strike": strikes,
+                "lastPrice": price.round(2),
+                "bid": (price * 0.99).round(2),
+                "ask": (price * 1.01 + 0.01).round(2),
+                "volume": 100,
+                "openInterest": 1000,
+                "impliedVolatility": sigma,
+            })
+        return OptionChain(sides["call"], sides["put"], {"regularMarketPrice": spot})
+
+
+def _fake_fred(names, data_source=None, start=None, end=None, **kwargs):
+    names = [names] if isinstance(names, str) else list(names)
+    start = pd.Timestamp(start or "2000-01-01")
+    end = pd.Timestamp(end or pd.Timestamp.today()).normalize()
+    daily = pd.bdate_range(start, end)
+    monthly = pd.date_range(start, end, freq="MS")
+    columns = {}
+    for name in names:
+        rng = np.random.default_rng(_seed(name))
+        # Rates and spreads are published daily around a few %, the rest monthly as index levels
+        if name.startswith(("DGS", "BAML", "T10Y", "DFF")):
+            values = 2 + np.abs(np.cumsum(rng.normal(0, 0.02, len(daily))) + rng.uniform(0, 3))
+            columns[name] = pd.Series(values, index=daily)
+        else:
+            values = 100 * np.exp(np.cumsum(rng.normal(0.002, 0.004, len(monthly))))
+            columns[name] = pd.Series(values, index=monthly)
+    df = pd.DataFrame(columns)
+    df.index.name = "DATE"
+    return df
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+def _fake_get(url, params=None, **kwargs):
+    if "alternative.me" in url:
+        return _FakeResponse({
+            "data": [{"value": "55", "value_classification": "Greed", "timestamp": str(int(time.time()))}],
+            "metadata": {"error": None},
+        })
+    if "finance/search" in url:
+        query = (params or {}).get("q", "").upper()
+        return _FakeResponse({"quotes": [{"symbol": query, "shortname": query, "exchange": "NMS"}]})
+    return _FakeResponse({})
+
+
+def _fake_parse(url, **kwargs):
+    import feedparser
+
+    entries = [
+        feedparser.FeedParserDict(
+            title=f"Market headline {i}",
+            link=f"{url.rstrip('/')}/item-{i}",
+            published=time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(time.time() - i * 600)),
+        )
+        for i in range(20)
+    ]
+    return feedparser.FeedParserDict(entries=entries)
+
+
+def _with_latency(fn, latency):
+    if not latency:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        time.sleep(latency)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def install_offline_stand_in(latency=0.0):
+    """
+    Replaces yfinance, FRED (pandas_datareader), requests.get and feedparser.parse
+    with synthetic answers for the rest of the process. `latency` (seconds) is
+    added to every upstream call to mimic network round trips.
+    """
+    import feedparser
+    import pandas_datareader.data as web
+    import requests
+    import yfinance as yf
+
+    yf.download = _with_latency(_fake_download, latency)
+    # One round trip per Ticker object: .info, .news and .history all hit it
+    yf.Ticker = _with_latency(_FakeTicker, latency)
+    web.DataReader = _with_latency(_fake_fred, latency)
+    requests.get = _with_latency(_fake_get, latency)
+    feedparser.parse = _with_latency(_fake_parse, latency)
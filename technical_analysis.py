@@ -1,5 +1,12 @@
 import pandas as pd
 import numpy as np
+from instrumentation import timed
+
+# Columns added by add_indicators.
+INDICATOR_COLUMNS = ["SMA_50", "SMA_200", "RSI", "MACD", "Signal_Line"]
+
+def has_indicators(df):
+    return all(col in df.columns for col in INDICATOR_COLUMNS)
 
 def calculate_rsi(series, window=14):
     delta = series.diff()
@@ -9,6 +16,7 @@ def calculate_rsi(series, window=14):
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
+@timed("compute.add_indicators")
 def add_indicators(df):
     """
     Adds technical indicators to the DataFrame in-place.
@@ -30,16 +38,18 @@ def add_indicators(df):
     
     return df
 
+@timed("compute.analyze_technical")
 def analyze_technical(df):
     """
     Performs technical analysis on a DataFrame with OHLCV data.
+    Frames that already carry the indicator columns are read, never modified.
     """
     if len(df) < 50:
         return {"valid": False, "message": "Insufficient data (need >50 periods)"}
 
-    # Work on a copy with indicators
-    df = df.copy()
-    add_indicators(df)
+    # Only raw OHLCV input needs its own copy with indicators
+    if not has_indicators(df):
+        df = add_indicators(df.copy(deep=False))
     
     close = df['Close']
     # Rest of the analysis uses the calculated columns...
@@ -79,7 +89,7 @@ def analyze_technical(df):
     # ... simplified logic for now
 
     # 5. Volume
-    avg_vol = df['Volume'].rolling(window=20).mean().iloc[-1]
+    avg_vol = df['Volume'].iloc[-20:].mean()
     current_vol = last_candle['Volume']
     vol_status = "Normal"
     if current_vol > avg_vol * 1.5:
@@ -0,0 +1,99 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from technical_analysis import calculate_rsi
+
+WATCHLIST_FILE = market_data.CACHE_DIR / "watchlists.json"
+DEFAULT_WATCHLIST = ["AAPL", "MSFT", "NVDA", "BTC-USD", "^GSPC"]
+
+# Daily bars are enough for price, day change, RSI(14), SMA 50 and a sparkline
+QUOTE_PERIOD = "3mo"
+QUOTE_INTERVAL = "1d"
+SPARKLINE_POINTS = 30
+RSI_WINDOW = 14
+SMA_WINDOW = 50
+REFRESH_SECONDS = 60
+
+_file_lock = threading.Lock()
+
+# symbol -> (last bar timestamp, last close, row). Rows are only recomputed
+# when a symbol's latest bar changed since the previous cycle.
+_rows = {}
+_rows_lock = threading.Lock()
+
+
+def load_watchlist(user):
+    """
+    Returns the user's saved symbols (the default list for new users).
+    """
+    if user is None:
+        raise ValueError("No user logged in")
+    with _file_lock:
+        if not WATCHLIST_FILE.exists():
+            return list(DEFAULT_WATCHLIST)
+        data = json.loads(WATCHLIST_FILE.read_text())
+    return data.get(user, list(DEFAULT_WATCHLIST))
+
+
+def save_watchlist(user, symbols):
+    if user is None:
+        raise ValueError("No user logged in")
+    with _file_lock:
+        data = json.loads(WATCHLIST_FILE.read_text()) if WATCHLIST_FILE.exists() else {}
+        data[user] = list(dict.fromkeys(symbols))
+        WATCHLIST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = WATCHLIST_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        tmp.replace(WATCHLIST_FILE)
+
+
+def _build_row(symbol, close):
+    """
+    Computes one watchlist row from the tail of the close series only.
+    """
+    last = float(close.iloc[-1])
+    prev = float(close.iloc[-2]) if len(close) > 1 else last
+    # RSI(14) at the last bar only depends on the last 15 closes
+    rsi = calculate_rsi(close.iloc[-(RSI_WINDOW + 1):], window=RSI_WINDOW).iloc[-1]
+    sma = close.iloc[-SMA_WINDOW:].mean() if len(close) >= SMA_WINDOW else np.nan
+
+    trend = "Neutral"
+    if not np.isnan(sma):
+        trend = "Bullish" if last > sma else "Bearish" if last < sma else "Neutral"
+
+    return {
+        "Symbol": symbol,
+        "Price": last,
+        "Change (%)": (last - prev) / prev * 100 if prev else 0.0,
+        "RSI": float(rsi),
+        "Trend": trend,
+        "Last 30": close.iloc[-SPARKLINE_POINTS:].round(4).tolist(),
+    }
+
+
+def refresh_rows(symbols):
+    """
+    Refreshes quotes for all symbols with one batched request and returns the
+    watchlist table. Indicators are only recomputed for symbols with a new bar.
+    """
+    bars = market_data.get_bars_batch(symbols, QUOTE_PERIOD, QUOTE_INTERVAL, max_age=REFRESH_SECONDS)
+    rows = []
+    with _rows_lock:
+        for symbol in symbols:
+            df = bars.get(symbol)
+            if df is None or df.empty:
+                continue
+            close = df["Close"].dropna()
+            if close.empty:
+                continue
+            stamp = (close.index[-1], float(close.iloc[-1]))
+            cached = _rows.get(symbol)
+            if cached is None or cached[:2] != stamp:
+                cached = (*stamp, _build_row(symbol, close))
+                _rows[symbol] = cached
+            rows.append(cached[2])
+    return pd.DataFrame(rows)
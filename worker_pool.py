@@ -0,0 +1,525 @@
+"""
+Process pool for CPU-heavy analysis, shared by every session of the server.
+
+Streamlit runs each session's script on a thread of one process, so pandas work
+on one session's "Max" history holds the GIL against everyone else's reruns.
+Jobs submitted here run in separate worker processes instead:
+
+    job = worker_pool.submit("analysis", bars)
+    result = worker_pool.wait(job, on_progress=lambda done, message: ...)
+
+`submit` returns a Job at once: a future with a progress fraction and message
+reported by the worker, and `cancel()` (queued jobs are dropped, running ones
+stop at their next progress checkpoint). DataFrames and Series travel both
+ways through shared memory: one block per frame holding the raw column
+buffers, so only a small descriptor is pickled through the pool's pipes.
+
+STOCK_DASHBOARD_WORKERS sets the number of processes (default: up to 4);
+0 runs jobs inline on the caller's thread, like before the pool existed.
+"""
+import contextlib
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, observe
+
+WORKERS = int(os.environ.get("STOCK_DASHBOARD_WORKERS", min(4, os.cpu_count() or 1)))
+# Ids of the most recent cancellations workers can see
+CANCEL_SLOTS = 256
+POLL_SECONDS = 0.1
+
+
+class Cancelled(Exception):
+    pass
+
+
+# --- Jobs (run in the workers: compute modules only, no network or Streamlit) ---
+
+def _indicators_job(bars):
+    # Indicator columns only
+    from technical_analysis import add_indicators
+    progress(0.1, "Computing indicators...")
+    frame = add_indicators(bars.copy(deep=False))
+    return frame[[c for c in frame.columns if c not in bars.columns]]
+
+
+def _quantitative_job(frame):
+    from quantitative_analysis import analyze_quantitative
+    progress(0.1, "Computing quantitative metrics...")
+    return analyze_quantitative(frame)
+
+
+def _analysis_job(bars):
+    # Same steps as analysis_pipeline.build, with a checkpoint between each.
+    # Only the new columns go back: the caller already has the bars.
+    from quantitative_analysis import analyze_quantitative
+    from technical_analysis import add_indicators, analyze_technical
+    progress(0.1, "Computing indicators...")
+    frame = add_indicators(bars.copy(deep=False))
+    progress(0.6, "Technical analysis...")
+    technical = analyze_technical(frame)
+    progress(0.8, "Quantitative analysis...")
+    quantitative = analyze_quantitative(frame)
+    indicators = frame[[c for c in frame.columns if c not in bars.columns]]
+    return {"indicators": indicators, "technical": technical, "quantitative": quantitative}
+
+
+JOBS = {
+    "indicators": _indicators_job,
+    "quantitative": _quantitative_job,
+    "analysis": _analysis_job,
+}
+
+
+# --- Shared-memory transport ---
+
+def _is_plain(dtype):
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def _share(obj):
+    """
+    Moves a DataFrame or Series into one new shared-memory block and returns
+    its descriptor. Columns of object or extension dtype (rare here) are
+    pickled inside the descriptor instead.
+    """
+    is_series = isinstance(obj, pd.Series)
+    frame = obj.to_frame() if is_series else obj
+    index = frame.index
+    arrays = []
+    if isinstance(index, pd.DatetimeIndex):
+        index_meta = ("datetime", str(index.tz) if index.tz is not None else None, index.unit, index.name)
+        arrays.append(index.asi8)
+    elif _is_plain(index.dtype) and not isinstance(index, pd.MultiIndex):
+        index_meta = ("array", index.dtype.str, None, index.name)
+        arrays.append(index.to_numpy())
+    else:
+        index_meta = ("pickled", index, None, None)
+
+    columns = []
+    offset = sum(a.nbytes for a in arrays)
+    offsets = [0] if arrays else []
+    for name in frame.columns:
+        values = frame[name]
+        if _is_plain(values.dtype):
+            array = np.ascontiguousarray(values.to_numpy())
+            columns.append((name, array.dtype.str, offset, len(array)))
+            arrays.append(array)
+            offsets.append(offset)
+            # Keep every column 8-byte aligned
+            offset += -(-array.nbytes // 8) * 8
+        else:
+            columns.append((name, None, values, None))
+
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        for array, start in zip(arrays, offsets):
+            np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=start)[:] = array
+    finally:
+        block.close()
+    return {
+        "__shared__": block.name,
+        "series": obj.name if is_series else None,
+        "is_series": is_series,
+        "index": index_meta,
+        "rows": len(frame),
+        "columns": columns,
+    }
+
+
+def _attach(desc, unlink):
+    """
+    Copies a shared frame out of its block (and frees the block if `unlink`).
+    """
+    block = shared_memory.SharedMemory(name=desc["__shared__"])
+    try:
+        rows = desc["rows"]
+        kind, meta, unit, name = desc["index"]
+        if kind == "datetime":
+            values = np.ndarray(rows, np.int64, buffer=block.buf).copy()
+            index = pd.DatetimeIndex(values.view(f"M8[{unit}]"), name=name)
+            if meta is not None:
+                index = index.tz_localize("UTC").tz_convert(meta)
+        elif kind == "array":
+            index = pd.Index(np.ndarray(rows, np.dtype(meta), buffer=block.buf).copy(), name=name)
+        else:
+            index = meta
+        data = {}
+        for column, dtype, start, length in desc["columns"]:
+            if dtype is None:
+                data[column] = start.to_numpy()
+            else:
+                data[column] = np.ndarray(length, np.dtype(dtype), buffer=block.buf, offset=start).copy()
+    finally:
+        block.close()
+        if unlink:
+            block.unlink()
+    frame = pd.DataFrame(data, index=index, columns=[c[0] for c in desc["columns"]])
+    if desc["is_series"]:
+        return frame.iloc[:, 0].rename(desc["series"])
+    return frame
+
+
+def _dump(value):
+    # Frames anywhere in a result (dicts, lists, tuples) go to shared memory
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return _share(value)
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_dump(v) for v in value)
+    return value
+
+
+def _load(value, unlink):
+    if isinstance(value, dict):
+        if "__shared__" in value:
+            return _attach(value, unlink)
+        return {k: _load(v, unlink) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_load(v, unlink) for v in value)
+    return value
+
+
+def _blocks(value):
+    # Names of every shared block in a descriptor tree
+    if isinstance(value, dict):
+        if "__shared__" in value:
+            return [value["__shared__"]]
+        return [name for v in value.values() for name in _blocks(v)]
+    if isinstance(value, (list, tuple)):
+        return [name for v in value for name in _blocks(v)]
+    return []
+
+
+def _free(value):
+    for name in _blocks(value):
+        try:
+            block = shared_memory.SharedMemory(name=name)
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# --- Worker side ---
+
+_local = threading.local()  # job id, progress sink and cancellation check of the running job
+_worker = {"queue": None, "cancelled": None}
+
+
+def _init_worker(queue, cancelled):
+    _worker["queue"] = queue
+    _worker["cancelled"] = cancelled
+
+
+def progress(fraction, message=""):
+    """
+    Reports how far the running job got. Also the cancellation checkpoint:
+    raises Cancelled if the job was cancelled. A no-op outside of jobs.
+    """
+    report = getattr(_local, "report", None)
+    if report is not None:
+        report(fraction, message)
+
+
+def _worker_report(job_id):
+    def report(fraction, message):
+        if job_id in _worker["cancelled"][:]:
+            raise Cancelled()
+        _worker["queue"].put((job_id, fraction, message))
+    return report
+
+
+def _run(kind, job_id, args):
+    """
+    Worker entry point: loads shared inputs (the parent frees them), runs the
+    job and returns its result with every frame moved to shared memory.
+    """
+    _local.report = _worker_report(job_id)
+    try:
+        return _dump(JOBS[kind](*_load(args, unlink=False)))
+    finally:
+        _local.report = None
+
+
+# --- Parent side ---
+
+class Job:
+    """
+    Handle on a submitted job: progress, message, done(), result(), cancel().
+    """
+
+    def __init__(self, job_id, kind):
+        self.id = job_id
+        self.kind = kind
+        self.progress = 0.0
+        self.message = "Queued..."
+        self.submitted = time.perf_counter()
+        self._future = None
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self._callbacks = []
+        self._waiters = 0
+        self.cancel_requested = False
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._done.is_set()
+
+    def cancelled(self):
+        return isinstance(self._error, Cancelled)
+
+    def result(self, timeout=None):
+        """
+        The job's result (frames rebuilt from shared memory). Raises the job's
+        exception, Cancelled, or TimeoutError.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.kind} job {self.id} still running")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def cancel(self):
+        """
+        Drops the job if it is still queued, else asks its worker to stop at
+        the next checkpoint. Returns False if it already finished.
+        """
+        if self.done():
+            return False
+        self.cancel_requested = True
+        if self._future is not None and self._future.cancel():
+            return True
+        _cancel(self.id)
+        return True
+
+    def add_done_callback(self, fn):
+        """
+        Calls fn(job) once the result is available (at once if it already is).
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def attach(self):
+        """
+        A caller starts waiting. False if the job was already abandoned (its
+        cancellation is under way) and must not be shared any more.
+        """
+        with self._lock:
+            if self.cancel_requested:
+                return False
+            self._waiters += 1
+            return True
+
+    def detach(self):
+        """
+        A caller stops waiting; the last one to leave cancels an unfinished job.
+        """
+        with self._lock:
+            self._waiters -= 1
+            abandoned = self._waiters <= 0 and not self.done()
+            if abandoned:
+                # Under the lock, so a concurrent attach() can't revive the job
+                self.cancel_requested = True
+        if abandoned:
+            self.cancel()
+
+    def _finish(self, result=None, error=None):
+        self._result, self._error = result, error
+        if error is None:
+            self.progress, self.message = 1.0, "Done"
+        outcome = "ok" if error is None else "cancelled" if isinstance(error, Cancelled) else "error"
+        count("worker_jobs", kind=self.kind, result=outcome)
+        observe(f"worker.{self.kind}", time.perf_counter() - self.submitted)
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"Job callback failed: {e}")
+
+
+_lock = threading.Lock()
+_state = {"pool": None, "queue": None, "cancelled": None, "next_slot": 0}
+_jobs = {}  # running job id -> Job, for progress messages
+_ids = itertools.count(1)
+
+
+def _listen(queue):
+    # Progress messages from every worker
+    while True:
+        try:
+            job_id, fraction, message = queue.get()
+        except (EOFError, OSError):
+            return
+        job = _jobs.get(job_id)
+        if job is not None and not job.done():
+            job.progress, job.message = fraction, message
+
+
+def get_pool():
+    """
+    The shared process pool, started on first use (None with 0 workers).
+    Every worker process is started right away, while __main__ is blanked.
+    """
+    if WORKERS <= 0:
+        return None
+    with _lock:
+        if _state["pool"] is None:
+            # Fresh interpreters: the server process runs threads a fork would copy mid-flight
+            ctx = multiprocessing.get_context("spawn")
+            if _state["queue"] is None:
+                _state["queue"] = ctx.Queue()
+                _state["cancelled"] = ctx.Array("q", CANCEL_SLOTS)
+                threading.Thread(target=_listen, args=(_state["queue"],), daemon=True, name="worker-progress").start()
+            pool = ProcessPoolExecutor(
+                max_workers=WORKERS, mp_context=ctx,
+                initializer=_init_worker, initargs=(_state["queue"], _state["cancelled"]),
+            )
+            # Spawned pools start a process per submit until all are running:
+            # one no-op each starts them all now instead of on later submits
+            with _blank_main():
+                for _ in range(WORKERS):
+                    pool.submit(int)
+            _state["pool"] = pool
+        return _state["pool"]
+
+
+@contextlib.contextmanager
+def _blank_main():
+    """
+    Streamlit runs page scripts as __main__, and spawned children import
+    __main__ from its file first: workers would run the page. Processes are
+    started (in get_pool) while __main__ is a module without a file.
+    """
+    main = sys.modules.get("__main__")
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        if main is not None:
+            sys.modules["__main__"] = main
+
+
+def _cancel(job_id):
+    with _lock:
+        cancelled = _state["cancelled"]
+        if cancelled is None:
+            return
+        cancelled[_state["next_slot"] % CANCEL_SLOTS] = job_id
+        _state["next_slot"] += 1
+
+
+def _run_inline(job, args, finish):
+    # No pool: the same job on this thread (finished before anyone could cancel it)
+    def report(fraction, message):
+        job.progress, job.message = fraction, message
+    _local.report = report
+    try:
+        result = JOBS[job.kind](*args)
+        job._finish(result=finish(result) if finish else result)
+    except Exception as e:
+        job._finish(error=e)
+    finally:
+        _local.report = None
+
+
+def completed(result, kind="cached"):
+    """
+    A Job that is already done, for results served from a cache.
+    """
+    job = Job(0, kind)
+    job._result, job.progress, job.message = result, 1.0, "Done"
+    job._done.set()
+    return job
+
+
+def submit(kind, *args, finish=None):
+    """
+    Starts job `kind` (a key of JOBS) on `args` in the pool. Returns its Job.
+    `finish(result)`, if given, runs in this process on the result (frames
+    already rebuilt) before the job counts as done; its return value becomes
+    the job's result.
+    """
+    job = Job(next(_ids), kind)
+    pool = get_pool()
+    if pool is None:
+        _run_inline(job, args, finish)
+        return job
+
+    shared = _dump(args)
+    _jobs[job.id] = job
+
+    def finished(future):
+        _free(shared)
+        _jobs.pop(job.id, None)
+        if future.cancelled():
+            job._finish(error=Cancelled())
+            return
+        error = future.exception()
+        if error is not None:
+            job._finish(error=error)
+            return
+        try:
+            # Copy the result frames out and free their blocks right away,
+            # whether or not anyone still waits for them
+            result = _load(future.result(), unlink=True)
+            if finish is not None:
+                result = finish(result)
+        except Exception as e:
+            _free(future.result())
+            job._finish(error=e)
+            return
+        job._finish(result=result)
+
+    try:
+        job._future = pool.submit(_run, kind, job.id, shared)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory): start a new pool once
+        print("Worker pool broken, restarting it")
+        with _lock:
+            if _state["pool"] is pool:
+                _state["pool"] = None
+        job._future = get_pool().submit(_run, kind, job.id, shared)
+    job._future.add_done_callback(finished)
+    return job
+
+
+def wait(job, on_progress=None, timeout=None):
+    """
+    Blocks until `job` finishes and returns its result, calling
+    on_progress(fraction, message) while it runs (every POLL_SECONDS, which
+    also gives Streamlit a point to stop the script). If the caller is
+    interrupted (a rerun stops the script), the job is cancelled unless
+    someone else is still waiting for it.
+    """
+    attached = job.attach()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        while not job._done.wait(POLL_SECONDS):
+            if on_progress is not None:
+                on_progress(job.progress, job.message)
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"{job.kind} job {job.id} still running")
+    finally:
+        if attached:
+            job.detach()
+    return job.result()
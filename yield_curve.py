@@ -0,0 +1,220 @@
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pandas_datareader.data as web
+
+from market_data import CACHE_DIR
+
+# FRED constant-maturity Treasury series and their maturity in years.
+TENORS = {
+    "DGS1MO": 1 / 12,
+    "DGS3MO": 3 / 12,
+    "DGS6MO": 6 / 12,
+    "DGS1": 1,
+    "DGS2": 2,
+    "DGS3": 3,
+    "DGS5": 5,
+    "DGS7": 7,
+    "DGS10": 10,
+    "DGS20": 20,
+    "DGS30": 30,
+}
+HISTORY_START = datetime.datetime(2001, 7, 31)  # first day of DGS1MO
+HISTORY_FILE = CACHE_DIR / "treasury_yields.pkl"
+HISTORY_TTL = 6 * 3600
+
+# Diebold-Li decay (0.0609 per month) expressed per year, and the grid that
+# per-date lambda fitting searches over.
+NS_LAMBDA = 0.0609 * 12
+NS_LAMBDA_GRID = np.linspace(0.1, 3.0, 30)
+
+METHODS = ["Linear", "Cubic Spline", "Nelson-Siegel"]
+
+_lock = threading.Lock()
+_history = None  # (fetched_at, DataFrame)
+
+
+def maturity_label(years):
+    """
+    3/12 -> "3M", 2 -> "2Y".
+    """
+    months = round(years * 12)
+    if months < 12 or months % 12:
+        return f"{months}M"
+    return f"{months // 12}Y"
+
+
+def _download(start):
+    df = web.DataReader(list(TENORS), 'fred', start, datetime.datetime.now())
+    return df.dropna(how="all")
+
+
+def fetch_yield_history(force=False):
+    """
+    Full daily history of every Treasury tenor, columns in years to maturity.
+    Kept on disk and only the days since the last stored row are downloaded.
+    """
+    global _history
+    with _lock:
+        if not force and _history is not None and time.time() - _history[0] < HISTORY_TTL:
+            return _history[1]
+
+        stored = pd.read_pickle(HISTORY_FILE) if HISTORY_FILE.exists() else pd.DataFrame()
+        # Re-download a few days back: FRED revises the latest prints
+        start = stored.index[-1] - datetime.timedelta(days=7) if not stored.empty else HISTORY_START
+        try:
+            fresh = _download(start)
+        except Exception as e:
+            print(f"Error fetching yield history (FRED): {e}")
+            fresh = pd.DataFrame()
+
+        if not fresh.empty:
+            stored = fresh if stored.empty else pd.concat([stored[stored.index < fresh.index[0]], fresh])
+            HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+            stored.to_pickle(HISTORY_FILE)
+
+        if stored.empty:
+            return stored
+        history = stored.rename(columns=TENORS)[sorted(TENORS.values())]
+        _history = (time.time(), history)
+        return history
+
+
+def fill_gaps(history):
+    """
+    Fills missing tenors of a date by interpolating along the curve, then
+    carries the last print forward over dates where nothing was published.
+    """
+    filled = history.T.interpolate(method="index", limit_direction="both").T
+    return filled.ffill().dropna()
+
+
+def linear_curves(history, maturities):
+    """
+    Piecewise-linear curves for every date at once (flat beyond the grid).
+    """
+    x = history.columns.to_numpy(dtype=float)
+    y = history.to_numpy(dtype=float)
+    m = np.clip(np.asarray(maturities, dtype=float), x[0], x[-1])
+
+    hi = np.clip(np.searchsorted(x, m, side="right"), 1, len(x) - 1)
+    lo = hi - 1
+    w = (m - x[lo]) / (x[hi] - x[lo])
+    return y[:, lo] * (1 - w) + y[:, hi] * w
+
+
+def spline_curves(history, maturities):
+    """
+    Natural cubic spline through every date's curve. The tenor grid is shared,
+    so the spline system is solved once and applied to all dates in one product.
+    """
+    x = history.columns.to_numpy(dtype=float)
+    y = history.to_numpy(dtype=float)
+    n = len(x)
+    h = np.diff(x)
+
+    # Second derivatives M (natural: M0 = Mn = 0) from A @ M_inner = B @ y
+    a = np.zeros((n - 2, n - 2))
+    b = np.zeros((n - 2, n))
+    for i in range(1, n - 1):
+        r = i - 1
+        a[r, r] = (h[i - 1] + h[i]) / 3
+        if r > 0:
+            a[r, r - 1] = h[i - 1] / 6
+        if r < n - 3:
+            a[r, r + 1] = h[i] / 6
+        b[r, i - 1] = 1 / h[i - 1]
+        b[r, i] = -1 / h[i - 1] - 1 / h[i]
+        b[r, i + 1] = 1 / h[i]
+    second = np.zeros((y.shape[0], n))
+    second[:, 1:-1] = y @ np.linalg.solve(a, b).T
+
+    m = np.clip(np.asarray(maturities, dtype=float), x[0], x[-1])
+    hi = np.clip(np.searchsorted(x, m, side="right"), 1, n - 1)
+    lo = hi - 1
+    hk = x[hi] - x[lo]
+    t_hi = (x[hi] - m) / hk
+    t_lo = (m - x[lo]) / hk
+    return (
+        y[:, lo] * t_hi + y[:, hi] * t_lo
+        + (second[:, lo] * (t_hi ** 3 - t_hi) + second[:, hi] * (t_lo ** 3 - t_lo)) * hk ** 2 / 6
+    )
+
+
+def ns_loadings(maturities, lam):
+    """
+    Nelson-Siegel level/slope/curvature loadings, shape (len(lam), len(maturities), 3).
+    """
+    m = np.asarray(maturities, dtype=float)[None, :]
+    lam = np.atleast_1d(lam)[:, None]
+    decay = (1 - np.exp(-lam * m)) / (lam * m)
+    return np.stack([np.ones_like(decay), decay, decay - np.exp(-lam * m)], axis=-1)
+
+
+def fit_nelson_siegel(history, lambdas=NS_LAMBDA_GRID):
+    """
+    Fits Nelson-Siegel betas for every date. For each candidate lambda all dates
+    are solved in one least-squares call; each date keeps its best lambda.
+    Returns (betas [dates x 3], lambda per date).
+    """
+    x = history.columns.to_numpy(dtype=float)
+    y = history.to_numpy(dtype=float).T  # tenors x dates
+    loadings = ns_loadings(x, lambdas)
+
+    best_err = np.full(y.shape[1], np.inf)
+    best_beta = np.zeros((y.shape[1], 3))
+    best_lam = np.full(y.shape[1], lambdas[0])
+    for k, lam in enumerate(lambdas):
+        beta, *_ = np.linalg.lstsq(loadings[k], y, rcond=None)
+        err = ((loadings[k] @ beta - y) ** 2).sum(axis=0)
+        better = err < best_err
+        best_err[better] = err[better]
+        best_beta[better] = beta.T[better]
+        best_lam[better] = lam
+    return best_beta, best_lam
+
+
+def nelson_siegel_curves(history, maturities):
+    beta, lam = fit_nelson_siegel(history)
+    loadings = ns_loadings(maturities, lam)  # dates x maturities x 3
+    return np.einsum("dmk,dk->dm", loadings, beta)
+
+
+def fit_curves(history, maturities, method="Linear"):
+    """
+    Yield (%) at arbitrary `maturities` (years) for every date in `history`,
+    as a DataFrame indexed by date with one column per maturity label.
+    """
+    history = fill_gaps(history)
+    if history.empty:
+        return pd.DataFrame()
+    fitters = {
+        "Linear": linear_curves,
+        "Cubic Spline": spline_curves,
+        "Nelson-Siegel": nelson_siegel_curves,
+    }
+    values = fitters[method](history, maturities)
+    return pd.DataFrame(values, index=history.index, columns=[maturity_label(m) for m in maturities])
+
+
+def spread_series(history, long=10, short=2):
+    """
+    Daily spread in basis points between two maturities (years), e.g. 10Y - 2Y.
+    """
+    curves = fit_curves(history, [long, short])
+    return ((curves.iloc[:, 0] - curves.iloc[:, 1]) * 100).rename(
+        f"{maturity_label(long)} - {maturity_label(short)}"
+    )
+
+
+def animation_frames(curves, freq="W-FRI"):
+    """
+    Long-format curves sampled every `freq` for a Plotly animation.
+    """
+    sampled = curves.resample(freq).last().dropna()
+    long = sampled.reset_index(names="Date").melt(id_vars="Date", var_name="Maturity", value_name="Yield")
+    long["Date"] = long["Date"].dt.strftime("%Y-%m-%d")
+    return long